@@ -0,0 +1,63 @@
+"""
+Import-time benchmark for fuelcell
+
+Measures how long ``import fuelcell`` takes in a fresh interpreter and which of the heavy optional dependencies (matplotlib, scipy) it pulls in. Each statement is timed in a separate subprocess so that module caching does not hide the cost.
+
+Usage::
+
+	python benchmarks/bench_import.py [--repeat N] [--output results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+heavy_modules = ['matplotlib', 'matplotlib.pyplot', 'scipy', 'scipy.stats', 'scipy.optimize']
+
+# each case is timed after `import fuelcell` so its cost is the incremental cost of the statement
+cases = {
+	'import fuelcell':'',
+	'first use of fc.visuals':'fc.visuals',
+	'first use of fc.plt':'fc.plt',
+}
+
+script = '''
+import sys, time, json
+t0 = time.perf_counter()
+import fuelcell as fc
+t1 = time.perf_counter()
+{stmt}
+t2 = time.perf_counter()
+print(json.dumps({{'import':t1-t0, 'stmt':t2-t1, 'modules':[m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+def run_case(stmt, repeat=5):
+	root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+	env = dict(os.environ, MPLBACKEND='Agg', PYTHONPATH=root + os.pathsep + os.environ.get('PYTHONPATH', ''))
+	code = script.format(stmt=stmt, heavy=heavy_modules)
+	times = []
+	modules = []
+	for i in range(repeat):
+		out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env, check=True)
+		res = json.loads(out.stdout.strip().splitlines()[-1])
+		times.append(res['stmt'] if stmt else res['import'])
+		modules = res['modules']
+	return {'median_s':statistics.median(times), 'min_s':min(times), 'max_s':max(times), 'repeat':repeat, 'heavy_modules_loaded':modules}
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+	parser.add_argument('--repeat', type=int, default=5, help='number of fresh interpreters per case')
+	parser.add_argument('--output', default=None, help='write results as JSON to this file')
+	args = parser.parse_args(argv)
+	results = {name:run_case(stmt, args.repeat) for name, stmt in cases.items()}
+	for name, res in results.items():
+		print(f"{name:<28s} {res['median_s']*1e3:8.1f} ms  loaded: {', '.join(res['heavy_modules_loaded']) or '-'}")
+	if args.output:
+		with open(args.output, 'w') as f:
+			json.dump(results, f, indent=2)
+	return results
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,188 @@
+"""
+Benchmark suite for the processing and plotting pipelines
+
+Runs every processing pipeline (cp_process, ca_process, cv_process, lsv_process, eis_process, tafel_slope) the plotting functions in fuelcell.visuals, and the batch export of report figures (render_batch). Each one is run on the files in testdata/ and on synthetic data (see synthetic.py) at a range of sizes. For every case, the suite records the wall time and the peak memory traced by tracemalloc. For the synthetic runs, it also records the scaling exponent, which is the slope of log(time) against log(size). Results are written as JSON.
+
+Passing a previous results file with --compare makes the script exit with status 1 if any case got slower than the baseline by more than --tolerance. This can be used to gate releases.
+
+Usage::
+
+	python benchmarks/bench_pipelines.py [--sizes 1e3 1e4 1e5 1e6] [--pipelines cp_process eis_process ...] [--repeat N] [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+import fuelcell as fc
+import synthetic
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+testdata = os.path.join(root, 'testdata')
+
+def step_kw(n, n_steps=20):
+	# keep the step filters meaningful at small sizes
+	length = max(int(n) // n_steps, 2)
+	return {'min_step_length':min(25, length // 2), 'pts_to_average':min(300, length // 2)}
+
+def draw(result=None):
+	# render every open figure so the benchmark includes the Agg draw, not just artist creation
+	for num in plt.get_fignums():
+		plt.figure(num).canvas.draw()
+	return result
+
+def render(data):
+	# PNG export of the campaign report figures with one worker per core
+	with tempfile.TemporaryDirectory() as folder:
+		return fc.visuals.render_batch(fc.visuals.report_tasks(data), folder)
+
+def tafel_arrays(data):
+	d = data[0]
+	processed = d.get_processed_data()
+	return processed.iloc[:,3].to_numpy(), processed.iloc[:,2].to_numpy()
+
+# each pipeline maps to (expt_type of its input, setup, run)
+# setup(data, n) prepares the input outside of the timed region and run(inputs) is timed
+pipelines = {
+	'cp_process':('cp', lambda data, n: data, lambda data, n: fc.cp_process(data, **step_kw(n))),
+	'ca_process':('ca', lambda data, n: data, lambda data, n: fc.ca_process(data, threshold=0.01, **step_kw(n))),
+	'cv_process':('cv', lambda data, n: data, lambda data, n: fc.cv_process(data)),
+	'lsv_process':('lsv', lambda data, n: data, lambda data, n: fc.lsv_process(data)),
+	'eis_process':('eis', lambda data, n: data, lambda data, n: fc.eis_process(data)),
+	'tafel_slope':('lsv', lambda data, n: tafel_arrays(fc.lsv_process(data)), lambda arrs, n: fc.tafel_slope(*arrs, auto=True)),
+	'plot_cp_raw':('cp', lambda data, n: data, lambda data, n: draw(fc.visuals.plot_cp_raw(data))),
+	'polcurve':('cp', lambda data, n: fc.cp_process(data, **step_kw(n)), lambda data, n: draw(fc.visuals.polcurve(data))),
+	'plot_cv':('cv', lambda data, n: fc.cv_process(data), lambda data, n: draw(fc.visuals.plot_cv(data))),
+	'plot_lsv':('lsv', lambda data, n: fc.lsv_process(data), lambda data, n: draw(fc.visuals.plot_lsv(data))),
+	'plot_tafel':('lsv', lambda data, n: fc.lsv_process(data), lambda data, n: draw(fc.visuals.plot_tafel(data))),
+	'plot_eis':('eis', lambda data, n: fc.eis_process(data), lambda data, n: draw(fc.visuals.plot_eis(data))),
+	'render_batch':('lsv', lambda data, n: fc.lsv_process(data), lambda data, n: render(data)),
+}
+
+def measure(run, inputs, n, repeat=3):
+	times = []
+	for i in range(repeat):
+		gc.collect()
+		t0 = time.perf_counter()
+		run(inputs, n)
+		times.append(time.perf_counter() - t0)
+		plt.close('all')
+	# memory is traced in a separate run because tracemalloc slows down allocation-heavy code
+	gc.collect()
+	tracemalloc.start()
+	run(inputs, n)
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	plt.close('all')
+	return {'wall_s':statistics.median(times), 'wall_min_s':min(times), 'peak_bytes':peak, 'repeat':repeat}
+
+def load_testdata(expt_type):
+	folder = os.path.join(testdata, expt_type)
+	if not os.path.isdir(folder):
+		return []
+	return fc.load_data(folder=folder, expt_type=expt_type, cache=False)
+
+def scaling_exponent(sizes, times):
+	sizes, times = np.asarray(sizes, dtype=float), np.asarray(times, dtype=float)
+	ok = times > 0
+	if ok.sum() < 2:
+		return None
+	slope, _ = np.polyfit(np.log(sizes[ok]), np.log(times[ok]), 1)
+	return float(slope)
+
+def run_suite(names, sizes, repeat=3, verbose=True):
+	results = {'meta':{
+		'python':platform.python_version(),
+		'numpy':np.__version__,
+		'pandas':pd.__version__,
+		'matplotlib':matplotlib.__version__,
+		'platform':platform.platform(),
+		'cpu_count':os.cpu_count(),
+		'timestamp':time.strftime('%Y-%m-%dT%H:%M:%S'),
+	}, 'testdata':{}, 'synthetic':{}}
+	for name in names:
+		expt_type, setup, run = pipelines[name]
+		data = load_testdata(expt_type)
+		if data:
+			n = sum(d.get_raw_data().shape[0] for d in data)
+			inputs = setup(data, n)
+			res = measure(run, inputs, n, repeat)
+			res.update({'files':len(data), 'points':n})
+			results['testdata'][name] = res
+			if verbose:
+				print(f"{name:<14s} testdata  {n:>10d} pts  {res['wall_s']*1e3:10.2f} ms  {res['peak_bytes']/2**20:9.2f} MiB")
+		curve = {'sizes':[], 'wall_s':[], 'peak_bytes':[]}
+		for size in sizes:
+			n = int(size)
+			data = [synthetic.generators[expt_type](n)]
+			inputs = setup(data, n)
+			res = measure(run, inputs, n, repeat)
+			curve['sizes'].append(n)
+			curve['wall_s'].append(res['wall_s'])
+			curve['peak_bytes'].append(res['peak_bytes'])
+			if verbose:
+				print(f"{name:<14s} synthetic {n:>10d} pts  {res['wall_s']*1e3:10.2f} ms  {res['peak_bytes']/2**20:9.2f} MiB")
+			del data, inputs
+		curve['scaling_exponent'] = scaling_exponent(curve['sizes'], curve['wall_s'])
+		results['synthetic'][name] = curve
+	return results
+
+def compare(results, baseline, tolerance=0.2):
+	"""
+	Lists the cases which are slower than the baseline by more than tolerance (relative)
+	"""
+	regressions = []
+	for name, res in results['testdata'].items():
+		base = baseline.get('testdata', {}).get(name)
+		if base and res['wall_s'] > base['wall_s'] * (1 + tolerance):
+			regressions.append((name, 'testdata', base['wall_s'], res['wall_s']))
+	for name, curve in results['synthetic'].items():
+		base = baseline.get('synthetic', {}).get(name)
+		if not base:
+			continue
+		base_times = dict(zip(base['sizes'], base['wall_s']))
+		for n, t in zip(curve['sizes'], curve['wall_s']):
+			if n in base_times and t > base_times[n] * (1 + tolerance):
+				regressions.append((name, n, base_times[n], t))
+	return regressions
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+	parser.add_argument('--sizes', nargs='+', type=float, default=[1e3, 1e4, 1e5, 1e6], help='synthetic data sizes in points (1e3 to 1e8)')
+	parser.add_argument('--pipelines', nargs='+', default=list(pipelines), choices=list(pipelines), help='pipelines to run')
+	parser.add_argument('--repeat', type=int, default=3, help='timed runs per case')
+	parser.add_argument('--output', default=None, help='write results as JSON to this file')
+	parser.add_argument('--compare', default=None, help='baseline results file to check for regressions')
+	parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative slowdown against the baseline')
+	args = parser.parse_args(argv)
+	results = run_suite(args.pipelines, args.sizes, args.repeat)
+	if args.output:
+		with open(args.output, 'w') as f:
+			json.dump(results, f, indent=2)
+	else:
+		json.dump({k:v for k, v in results.items() if k != 'meta'}, sys.stdout, indent=2)
+		print()
+	if args.compare:
+		with open(args.compare) as f:
+			baseline = json.load(f)
+		regressions = compare(results, baseline, args.tolerance)
+		for name, case, old, new in regressions:
+			print(f'REGRESSION {name} [{case}]: {old*1e3:.2f} ms -> {new*1e3:.2f} ms')
+		if regressions:
+			sys.exit(1)
+	return results
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,216 @@
+"""
+Synthetic data generators for the benchmark suite
+
+Each generator returns a Datum whose raw data mimics the column labels and shape of the files written by the potentiostat, so the processing functions treat it exactly like loaded data. Sizes are given as a total number of points and can range from 1e3 to 1e8; the number of steps, cycles or spectra is kept fixed so that the per-point cost is what scales.
+"""
+import numpy as np
+import pandas as pd
+
+from fuelcell.model import Datum
+
+def make_datum(name, df, expt_type):
+	d = Datum(name, df)
+	d.set_expt_type(expt_type)
+	return d
+
+def polarization(i, ocv=0.95, b=0.05, r=2e-4):
+	# simple polarization curve in V for a current in mA
+	return ocv - b * np.log10(1 + np.abs(i)) - r * i
+
+def cp_staircase(n_points=1e4, n_steps=20, max_current=1000, pyramid=True, noise=1e-3, seed=0):
+	"""
+	Chronopotentiometry data with a staircase of current holds
+
+	Parameters
+	___________
+	n_points: int or float (default=1e4)
+		Total number of points
+	n_steps: int (default=20)
+		Number of current holds. If pyramid=True, half of the holds ramp the current up and half ramp it back down.
+	max_current: float (default=1000)
+		Current of the highest hold in mA
+	pyramid: bool (default=True)
+		Whether the current is ramped up and back down
+	noise: float (default=1e-3)
+		Standard deviation of the noise added to the potential in V
+	seed: int (default=0)
+		Seed of the random number generator
+
+	Returns
+	________
+	data: Datum
+		Datum with columns time/s, <Ewe>/V, and I/mA
+	"""
+	n = int(n_points)
+	rng = np.random.default_rng(seed)
+	if pyramid:
+		half = np.linspace(max_current / (n_steps // 2), max_current, n_steps // 2)
+		levels = np.concatenate((half, half[::-1]))
+	else:
+		levels = np.linspace(max_current / n_steps, max_current, n_steps)
+	step = np.minimum(np.arange(n) * len(levels) // n, len(levels) - 1)
+	current = levels[step] + rng.normal(0, 0.1, n)
+	potential = polarization(current) + rng.normal(0, noise, n)
+	time = np.arange(n) * 0.1
+	df = pd.DataFrame({'time/s':time, '<Ewe>/V':potential, 'I/mA':current})
+	return make_datum('cp_synthetic', df, 'cp')
+
+def ca_staircase(n_points=1e4, n_steps=20, min_potential=0.5, max_potential=0.9, noise=0.1, seed=0):
+	"""
+	Chronoamperometry data with a staircase of potential holds
+
+	The potential is stepped from max_potential down to min_potential. Steps are 20 mV or larger, so pass a threshold of about 0.01 to ca_process.
+
+	Parameters
+	___________
+	n_points: int or float (default=1e4)
+		Total number of points
+	n_steps: int (default=20)
+		Number of potential holds
+	min_potential, max_potential: float (default=0.5, 0.9)
+		Potential range of the holds in V
+	noise: float (default=0.1)
+		Standard deviation of the noise added to the current in mA
+	seed: int (default=0)
+		Seed of the random number generator
+
+	Returns
+	________
+	data: Datum
+		Datum with columns time/s, Ewe/V, and <I>/mA
+	"""
+	n = int(n_points)
+	rng = np.random.default_rng(seed)
+	levels = np.linspace(max_potential, min_potential, n_steps)
+	step = np.minimum(np.arange(n) * n_steps // n, n_steps - 1)
+	potential = levels[step]
+	current = 10 ** ((0.95 - potential) / 0.05) + rng.normal(0, noise, n)
+	time = np.arange(n) * 0.1
+	df = pd.DataFrame({'time/s':time, 'Ewe/V':potential, '<I>/mA':current})
+	return make_datum('ca_synthetic', df, 'ca')
+
+def cv_cycles(n_points=1e4, n_cycles=5, e_min=0.05, e_max=1.2, noise=0.01, seed=0):
+	"""
+	Cyclic voltammetry data with a triangular potential waveform
+
+	Parameters
+	___________
+	n_points: int or float (default=1e4)
+		Total number of points
+	n_cycles: int (default=5)
+		Number of cycles
+	e_min, e_max: float (default=0.05, 1.2)
+		Vertex potentials in V
+	noise: float (default=0.01)
+		Standard deviation of the noise added to the current in mA
+	seed: int (default=0)
+		Seed of the random number generator
+
+	Returns
+	________
+	data: Datum
+		Datum with columns Ewe/V and <I>/mA
+	"""
+	n = int(n_points)
+	rng = np.random.default_rng(seed)
+	phase = np.arange(n) * n_cycles / n % 1
+	tri = 1 - np.abs(2 * phase - 1)
+	potential = e_min + (e_max - e_min) * tri
+	direction = np.where(phase < 0.5, 1, -1)
+	peak = np.exp(-((potential - 0.7) / 0.05) ** 2)
+	current = 0.5 * direction + 2 * direction * peak + rng.normal(0, noise, n)
+	df = pd.DataFrame({'Ewe/V':potential, '<I>/mA':current})
+	return make_datum('cv_synthetic', df, 'cv')
+
+def lsv_sweep(n_points=1e4, e_start=1.2, e_end=1.8, i0=1e-6, tafel=0.06, r=0.1, noise=1e-3, seed=0):
+	"""
+	Linear sweep voltammetry data following Tafel kinetics
+
+	Parameters
+	___________
+	n_points: int or float (default=1e4)
+		Total number of points
+	e_start, e_end: float (default=1.2, 1.8)
+		Start and end potentials of the sweep in V
+	i0: float (default=1e-6)
+		Exchange current in mA
+	tafel: float (default=0.06)
+		Tafel slope in V/decade
+	r: float (default=0.1)
+		Series resistance in Ohm, which bends the curve away from Tafel behavior at high current
+	noise: float (default=1e-3)
+		Relative noise added to the current
+	seed: int (default=0)
+		Seed of the random number generator
+
+	Returns
+	________
+	data: Datum
+		Datum with columns Ewe/V and <I>/mA
+	"""
+	n = int(n_points)
+	rng = np.random.default_rng(seed)
+	potential = np.linspace(e_start, e_end, n)
+	# solve eta = tafel*log10(i/i0) + r*i by fixed-point iteration in log space
+	eta = potential - e_start
+	current = i0 * 10 ** (eta / tafel)
+	for k in range(50):
+		current = i0 * 10 ** (np.maximum(eta - r * current * 1e-3, 0) / tafel)
+	current = current * (1 + rng.normal(0, noise, n))
+	df = pd.DataFrame({'Ewe/V':potential, '<I>/mA':current})
+	return make_datum('lsv_synthetic', df, 'lsv')
+
+def eis_spectra(n_points=1e4, n_spectra=10, r_s=0.02, r_ct=0.8, c_dl=0.05, f_min=0.1, f_max=1e5, gap=5, seed=0, noise=1e-4):
+	"""
+	Impedance data containing several Randles-circuit spectra
+
+	Spectra are separated by rows of zeros, as in the files exported by the potentiostat. The series and charge-transfer resistances drift slightly from spectrum to spectrum.
+
+	Parameters
+	___________
+	n_points: int or float (default=1e4)
+		Total number of points
+	n_spectra: int (default=10)
+		Number of spectra
+	r_s, r_ct: float (default=0.02, 0.8)
+		Series and charge-transfer resistances in Ohm
+	c_dl: float (default=0.05)
+		Double-layer capacitance in F
+	f_min, f_max: float (default=0.1, 1e5)
+		Frequency range of each spectrum in Hz
+	gap: int (default=5)
+		Number of zero rows between spectra
+	seed: int (default=0)
+		Seed of the random number generator
+	noise: float (default=1e-4)
+		Standard deviation of the noise added to the impedance in Ohm
+
+	Returns
+	________
+	data: Datum
+		Datum with columns freq/Hz, Re(Z)/Ohm, and -Im(Z)/Ohm
+	"""
+	n = int(n_points)
+	rng = np.random.default_rng(seed)
+	per = max(n // n_spectra - gap, 3)
+	freq = np.logspace(np.log10(f_max), np.log10(f_min), per)
+	w = 2 * np.pi * freq
+	rs = r_s * (1 + 0.05 * np.arange(n_spectra))[:,None]
+	rct = r_ct * (1 + 0.1 * np.arange(n_spectra))[:,None]
+	z = rs + rct / (1 + 1j * w * rct * c_dl)
+	z = z + rng.normal(0, noise, z.shape) + 1j * rng.normal(0, noise, z.shape)
+	block = np.zeros((n_spectra, per + gap, 3))
+	block[:,:per,0] = freq
+	block[:,:per,1] = z.real
+	block[:,:per,2] = -z.imag
+	block = block.reshape(-1, 3)
+	df = pd.DataFrame(block, columns=['freq/Hz', 'Re(Z)/Ohm', '-Im(Z)/Ohm'])
+	return make_datum('eis_synthetic', df, 'eis')
+
+generators = {
+	'cp':cp_staircase,
+	'ca':ca_staircase,
+	'cv':cv_cycles,
+	'lsv':lsv_sweep,
+	'eis':eis_spectra,
+}
@@ -1,13 +1,33 @@
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 from pathlib import Path
 import os
 import re
+import importlib
 
 from fuelcell import datums
-from fuelcell import visuals
+from fuelcell import circuits
 from fuelcell import utils
+from fuelcell import eclab
+from fuelcell import profiling
+from fuelcell import datumset
 
 from fuelcell.datums import *
-from fuelcell.visuals import *
+from fuelcell.datumset import DatumSet
+
+# visuals and matplotlib are only imported the first time they are accessed so that processing-only workflows do not pay for the plotting stack
+_lazy_modules = {'visuals':'fuelcell.visuals', 'plt':'matplotlib.pyplot'}
+_lazy_visuals = ['plot_cv', 'polcurve', 'plot_cp_raw', 'plot_tafel', 'plot_tafel_fit', 'plot_lsv', 'plot_eis', 'plot_hfr', 'plotter', 'update_artists', 'sync_legend', 'downsample', 'build_axlabel', 'check_errs', 'fig_saver', 'report_tasks', 'build_figure', 'render_figure', 'render_batch', 'render_report']
+
+def __getattr__(name):
+	if name in _lazy_modules:
+		value = importlib.import_module(_lazy_modules[name])
+	elif name in _lazy_visuals:
+		value = getattr(importlib.import_module('fuelcell.visuals'), name)
+	else:
+		raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+	globals()[name] = value
+	return value
+
+def __dir__():
+	return sorted(set(globals()) | set(_lazy_modules) | set(_lazy_visuals))
@@ -0,0 +1,585 @@
+import numpy as np
+import re
+import logging
+
+from fuelcell import profiling
+
+_log = logging.getLogger(__name__)
+
+circuit_presets = {'randles':'R0-p(R1-W1,C1)', 'randles_cpe':'R0-p(R1-W1,CPE1)', 'r-rcpe-w':'R0-p(R1,CPE1)-W1', 'tlm':'R0-T1', 'tlm_l':'L0-R0-T1'}
+# parameters of each element type as (suffix, kind). 'pos' parameters are strictly positive, 'frac' parameters lie between 0 and 1
+element_params = {'R':[('', 'pos')], 'C':[('', 'pos')], 'L':[('', 'pos')], 'CPE':[('_Q', 'pos'), ('_n', 'frac')],
+				'W':[('', 'pos')], 'Ws':[('_R', 'pos'), ('_tau', 'pos')], 'Wo':[('_R', 'pos'), ('_tau', 'pos')],
+				'T':[('_R', 'pos'), ('_Q', 'pos'), ('_n', 'frac')]}
+weightings = ['modulus', 'unit']
+theta_limit = 60
+_token_re = re.compile(r'\s*(?:(p\()|(CPE\d*|Ws\d*|Wo\d*|[RCLWT]\d*)|([(),\-]))')
+
+class Circuit():
+	"""
+	Equivalent circuit described by a circuit string
+
+	Elements are joined in series with '-' and in parallel with p(...,...). Parentheses may be used to group elements. Each element is identified by its type followed by an optional number which distinguishes elements of the same type, for example 'R0-p(R1,CPE1)-W1'. Supported elements are:
+
+	R: resistor (R)
+	C: capacitor (C)
+	L: inductor (L)
+	CPE: constant phase element, 1/(Q*(jw)**n) (Q, n)
+	W: semi-infinite Warburg element, sigma*(1-j)/sqrt(w) (sigma)
+	Ws: finite-length Warburg element with a transmissive boundary, R*tanh(sqrt(jw*tau))/sqrt(jw*tau) (R, tau)
+	Wo: finite-space Warburg element with a reflective boundary, R*coth(sqrt(jw*tau))/sqrt(jw*tau) (R, tau)
+	T: transmission line model of a porous electrode with ionic resistance R and a CPE interface, sqrt(R*Zq)*coth(sqrt(R/Zq)) with Zq = 1/(Q*(jw)**n) (R, Q, n)
+
+	Parameters
+	___________
+	description: str
+		Circuit string, or the name of one of circuit_presets
+	"""
+	def __init__(self, description):
+		if description in circuit_presets.keys():
+			description = circuit_presets[description]
+		self.description = description
+		self.param_names = []
+		self.param_kinds = []
+		self.tree = parse_circuit(description, self)
+
+	def __repr__(self):
+		return f'Circuit({self.description!r})'
+
+	def get_description(self):
+		return self.description
+
+	def get_param_names(self):
+		return list(self.param_names)
+
+	def get_param_kinds(self):
+		return list(self.param_kinds)
+
+	def impedance(self, params, freq, jacobian=False):
+		"""
+		Complex impedance of the circuit
+
+		Evaluated for all frequencies (and all parameter sets) at once.
+
+		Parameters
+		___________
+		params: array-like
+			Circuit parameters in the order of get_param_names. May be two-dimensional with one row per parameter set, in which case freq must have one row per parameter set as well (or be one-dimensional).
+		freq: array-like
+			Frequencies (Hz) at which the impedance is evaluated
+		jacobian: bool (default=False)
+			If True, the derivatives of the impedance with respect to each parameter are also returned
+
+		Returns
+		________
+		z: numpy array
+			Complex impedance at each frequency
+		dz: numpy array
+			Derivatives of the impedance with respect to each parameter, stacked along the last axis. Returned only if jacobian=True
+		"""
+		params = np.asarray(params, dtype=float)
+		freq = np.asarray(freq, dtype=float)
+		single = params.ndim == 1
+		params = np.atleast_2d(params)
+		omega = np.broadcast_to(2 * np.pi * np.atleast_2d(freq), (len(params),) + np.atleast_2d(freq).shape[1:])
+		z, dz = eval_node(self.tree, params[:,None,:], omega, len(self.param_names), jacobian)
+		if single:
+			z = z[0]
+			dz = dz[0] if jacobian else dz
+		if jacobian:
+			return z, dz
+		return z
+
+def parse_circuit(description, circuit):
+	"""
+	Parses a circuit string into a tree of series, parallel, and element nodes
+
+	Parameters
+	___________
+	description: str
+		Circuit string (see Circuit)
+	circuit: Circuit
+		Circuit whose param_names and param_kinds are filled in as elements are encountered
+
+	Returns
+	________
+	tree: tuple
+		Nested tuples of ('series', children), ('parallel', children), or ('element', type, first parameter index)
+	"""
+	tokens = []
+	pos = 0
+	description = description.strip()
+	while pos < len(description):
+		match = _token_re.match(description, pos)
+		if match is None:
+			raise ValueError(f'Invalid circuit string {description!r} at position {pos}')
+		tokens.append(match.group(match.lastindex))
+		pos = match.end()
+	names = set()
+
+	def parse_series(i):
+		children = []
+		node, i = parse_term(i)
+		children.append(node)
+		while i < len(tokens) and tokens[i] == '-':
+			node, i = parse_term(i + 1)
+			children.append(node)
+		if len(children) == 1:
+			return children[0], i
+		return ('series', children), i
+
+	def parse_term(i):
+		if i >= len(tokens):
+			raise ValueError(f'Unexpected end of circuit string {description!r}')
+		tok = tokens[i]
+		if tok == 'p(':
+			children = []
+			node, i = parse_series(i + 1)
+			children.append(node)
+			while i < len(tokens) and tokens[i] == ',':
+				node, i = parse_series(i + 1)
+				children.append(node)
+			expect(i, ')')
+			if len(children) < 2:
+				raise ValueError(f'Parallel block in {description!r} must contain at least two branches')
+			return ('parallel', children), i + 1
+		elif tok == '(':
+			node, i = parse_series(i + 1)
+			expect(i, ')')
+			return node, i + 1
+		elif tok in ['-', ',', ')']:
+			raise ValueError(f'Unexpected {tok!r} in circuit string {description!r}')
+		if tok in names:
+			raise ValueError(f'Element {tok} appears more than once in circuit string {description!r}')
+		names.add(tok)
+		etype = re.match(r'[A-Za-z]+', tok).group(0)
+		first = len(circuit.param_names)
+		for suffix, kind in element_params[etype]:
+			circuit.param_names.append(tok + suffix)
+			circuit.param_kinds.append(kind)
+		return ('element', etype, first), i + 1
+
+	def expect(i, tok):
+		if i >= len(tokens) or tokens[i] != tok:
+			raise ValueError(f'Expected {tok!r} in circuit string {description!r}')
+
+	if len(tokens) == 0:
+		raise ValueError('Circuit string is empty')
+	tree, i = parse_series(0)
+	if i != len(tokens):
+		raise ValueError(f'Unexpected {tokens[i]!r} in circuit string {description!r}')
+	return tree
+
+def eval_node(node, params, omega, nparams, jacobian=False):
+	"""
+	Impedance of a node of a circuit tree and its derivatives with respect to all circuit parameters
+
+	Parameters
+	___________
+	node: tuple
+		Node of the tree returned by parse_circuit
+	params: numpy array
+		Array of shape (number of parameter sets, 1, number of parameters)
+	omega: numpy array
+		Angular frequencies, shape (number of parameter sets, number of frequencies)
+	nparams: int
+		Total number of circuit parameters
+	jacobian: bool (default=False)
+		If True, derivatives are computed as well
+
+	Returns
+	________
+	z: numpy array
+		Complex impedance, shape (number of parameter sets, number of frequencies)
+	dz: numpy array or None
+		Derivatives of z, shape (number of parameter sets, number of frequencies, number of parameters)
+	"""
+	if node[0] == 'element':
+		etype, first = node[1], node[2]
+		z, dz_local = element_impedance(etype, params[...,first:first+len(element_params[etype])], omega, jacobian)
+		dz = None
+		if jacobian:
+			dz = np.zeros(z.shape + (nparams,), dtype=complex)
+			dz[...,first:first+len(dz_local)] = np.stack(dz_local, axis=-1)
+		return z, dz
+	results = [eval_node(child, params, omega, nparams, jacobian) for child in node[1]]
+	if node[0] == 'series':
+		z = sum(r[0] for r in results)
+		dz = sum(r[1] for r in results) if jacobian else None
+		return z, dz
+	admittance = sum(1 / r[0] for r in results)
+	z = 1 / admittance
+	dz = None
+	if jacobian:
+		dz = sum(((z / r[0])**2)[...,None] * r[1] for r in results)
+	return z, dz
+
+def element_impedance(etype, p, omega, jacobian=False):
+	"""
+	Impedance of a single circuit element and its derivatives with respect to the element's parameters
+
+	Parameters
+	___________
+	etype: str
+		Element type, one of element_params
+	p: numpy array
+		Element parameters, shape (number of parameter sets, 1, number of element parameters)
+	omega: numpy array
+		Angular frequencies, shape (number of parameter sets, number of frequencies)
+	jacobian: bool (default=False)
+		If True, derivatives are computed as well
+
+	Returns
+	________
+	z: numpy array
+		Complex impedance of the element
+	dz: list of numpy arrays
+		Derivative of z with respect to each element parameter. Empty if jacobian=False
+	"""
+	jw = 1j * omega
+	dz = []
+	if etype == 'R':
+		z = p[...,0] + 0 * jw
+		if jacobian:
+			dz = [np.ones_like(z)]
+	elif etype == 'C':
+		z = 1 / (jw * p[...,0])
+		if jacobian:
+			dz = [-z / p[...,0]]
+	elif etype == 'L':
+		z = jw * p[...,0]
+		if jacobian:
+			dz = [jw]
+	elif etype == 'CPE':
+		q, n = p[...,0], p[...,1]
+		log_jw = np.log(jw)
+		z = np.exp(-n * log_jw) / q
+		if jacobian:
+			dz = [-z / q, -log_jw * z]
+	elif etype == 'W':
+		unit = (1 - 1j) / np.sqrt(omega)
+		z = p[...,0] * unit
+		if jacobian:
+			dz = [unit]
+	elif etype in ['Ws', 'Wo']:
+		r, tau = p[...,0], p[...,1]
+		u = np.sqrt(jw * tau)
+		e = np.exp(-2 * u)
+		if etype == 'Ws':
+			# tanh(u), stable for Re(u) >= 0
+			f = (1 - e) / (1 + e)
+			df = 1 - f**2
+		else:
+			# coth(u)
+			f = (1 + e) / (1 - e)
+			df = 1 - f**2
+		g = f / u
+		z = r * g
+		if jacobian:
+			dg = (df * u - f) / u**2
+			dz = [g, r * dg * u / (2 * tau)]
+	elif etype == 'T':
+		r, q, n = p[...,0], p[...,1], p[...,2]
+		log_jw = np.log(jw)
+		zq = np.exp(-n * log_jw) / q
+		v = np.sqrt(r / zq)
+		e = np.exp(-2 * v)
+		coth = (1 + e) / (1 - e)
+		z = np.sqrt(r * zq) * coth
+		if jacobian:
+			# sqrt(r*zq) * sqrt(r/zq) = r
+			a = r * (1 - coth**2)
+			dz_dr = (z + a) / (2 * r)
+			dz_dzq = (z - a) / (2 * zq)
+			dz = [dz_dr, dz_dzq * -zq / q, dz_dzq * -log_jw * zq]
+	else:
+		raise ValueError(f'Unknown circuit element {etype}')
+	return z, dz
+
+def to_internal(params, kinds):
+	"""
+	Maps circuit parameters to the unconstrained values used during fitting
+
+	'pos' parameters are log-transformed and 'frac' parameters are logit-transformed.
+	"""
+	params = np.asarray(params, dtype=float)
+	frac = np.asarray([k == 'frac' for k in kinds])
+	eps = 1e-9
+	with np.errstate(divide='ignore', invalid='ignore'):
+		clipped = np.clip(params, eps, 1 - eps)
+		return np.where(frac, np.log(clipped / (1 - clipped)), np.log(np.maximum(params, 1e-300)))
+
+def from_internal(theta, kinds):
+	"""
+	Inverse of to_internal. Also returns the derivative of each parameter with respect to its internal value.
+	"""
+	frac = np.asarray([k == 'frac' for k in kinds])
+	with np.errstate(over='ignore'):
+		pos = np.exp(theta)
+		fr = 1 / (1 + np.exp(-theta))
+	params = np.where(frac, fr, pos)
+	dparams = np.where(frac, fr * (1 - fr), pos)
+	return params, dparams
+
+def default_guess(circuit, freq, z):
+	"""
+	Rough initial guess of the circuit parameters based on the measured spectrum
+
+	The series resistance is set to the smallest real impedance. Other resistances are set from the height of the high-frequency capacitive arc, and capacitances from the frequency of its apex. Useful as a starting point when no better guess is available.
+
+	Parameters
+	___________
+	circuit: Circuit
+		Circuit to be fit
+	freq: numpy array
+		Frequencies (Hz) of the spectrum
+	z: numpy array
+		Complex impedance of the spectrum
+
+	Returns
+	________
+	guess: numpy array
+		Initial guess for each circuit parameter
+	"""
+	r_min = max(np.min(z.real), 1e-6)
+	# apex of the capacitive arc at the highest frequency, which is not necessarily the largest -Im(Z) if there is a diffusion tail
+	order = np.argsort(-freq)
+	im = -z.imag[order]
+	padded = np.concatenate(([-np.inf], im, [-np.inf]))
+	apex = np.flatnonzero((im > 0) & (im >= padded[:-2]) & (im >= padded[2:]))
+	apex = order[apex[0]] if len(apex) > 0 else np.argmax(-z.imag)
+	w_peak = 2 * np.pi * freq[apex]
+	r_span = max(-2 * z.imag[apex], r_min * 0.1, 1e-6)
+	w_min = 2 * np.pi * np.min(freq)
+	lowest = np.argmin(freq)
+	# a transmission line turns from 45 degree to capacitive (n*90 degree) behavior once the real impedance reaches about R/3
+	phase = np.arctan2(-z.imag[order], z.real[order] - r_min)
+	low_phase = np.clip(phase[-1], np.pi / 4, np.pi / 2)
+	knee = np.flatnonzero(phase > (np.pi / 4 + low_phase) / 2)
+	knee = order[knee[0]] if len(knee) > 0 else lowest
+	n_res = sum(1 for name in circuit.param_names if re.fullmatch(r'R\d*', name))
+	guess = []
+	first_r = True
+	for name in circuit.param_names:
+		etype = re.match(r'[A-Za-z]+', name).group(0)
+		suffix = name.split('_')[-1] if '_' in name else ''
+		if etype == 'T' and suffix == 'n':
+			guess.append(min(2 * low_phase / np.pi, 0.99))
+		elif suffix == 'n':
+			guess.append(0.9)
+		elif etype == 'T' and suffix == 'R':
+			guess.append(max(3 * (z.real[knee] - r_min), r_min * 0.1, 1e-6))
+		elif etype == 'T' and suffix == 'Q':
+			guess.append(1 / (w_min * max(-z.imag[lowest], 1e-12)))
+		elif etype == 'R' and first_r:
+			guess.append(r_min)
+			first_r = False
+		elif etype == 'R':
+			guess.append(r_span / max(n_res - 1, 1))
+		elif etype in ['C', 'CPE'] or suffix == 'Q':
+			guess.append(1 / (w_peak * r_span))
+		elif etype == 'L':
+			guess.append(1e-7)
+		elif etype == 'W':
+			guess.append(r_span * np.sqrt(w_min) / 10)
+		elif suffix == 'tau':
+			guess.append(1 / w_min)
+		else:
+			guess.append(r_span)
+	return np.asarray(guess, dtype=float)
+
+@profiling.stage()
+def fit_circuit(circuit, freq, real, imag, split_pts=None, initial_guess=None, weighting='modulus', max_iter=200, tol=1e-10):
+	"""
+	Fits an equivalent circuit to any number of impedance spectra at once
+
+	Levenberg-Marquardt least-squares fit using the analytic Jacobian of the circuit. Spectra of different lengths are padded to a common length and all spectra are iterated together, with the normal equations of every spectrum solved in a single batched call. Each spectrum has its own damping parameter and stops iterating once it has converged. Positive parameters are fit in log space and CPE exponents in logit space so that the fitted values always remain physical.
+
+	Parameters
+	___________
+	circuit: Circuit or str
+		Circuit to be fit, or a circuit string
+	freq: list or numpy array
+		Frequencies (Hz) of all spectra, concatenated
+	real: list or numpy array
+		Real component of the impedance of all spectra, concatenated
+	imag: list or numpy array
+		Imaginary component of the impedance of all spectra, concatenated. By EC-Lab convention, this is -Im(Z), which is positive for a capacitive arc.
+	split_pts: array-like (default=None)
+		Indices at which each new spectrum starts, excluding 0 (as used by np.split). If unspecified, the data is treated as a single spectrum.
+	initial_guess: array-like or dict (default=None)
+		Initial guess of the circuit parameters. Either an array in the order of Circuit.get_param_names (one row per spectrum, or one row used for all spectra) or a dict mapping parameter names to values. Parameters which are not specified are estimated with default_guess.
+	weighting: {'modulus', 'unit'} (default='modulus')
+		If 'modulus', residuals are divided by the modulus of the measured impedance. If 'unit', residuals are unweighted.
+	max_iter: int (default=200)
+		Maximum number of iterations
+	tol: float (default=1e-10)
+		A spectrum has converged once an iteration reduces its residual by less than tol relative to the residual
+
+	Returns
+	________
+	params: numpy array
+		Fitted parameters with one row per spectrum. Rows of spectra with fewer points than parameters are nan.
+	chisq: numpy array
+		Weighted sum of squared residuals of each spectrum
+	"""
+	if not isinstance(circuit, Circuit):
+		circuit = Circuit(circuit)
+	if weighting not in weightings:
+		raise ValueError(f'weighting must be one of {weightings}, not {weighting}')
+	freq = np.asarray(freq, dtype=float)
+	z_all = np.asarray(real, dtype=float) - 1j * np.asarray(imag, dtype=float)
+	n = len(freq)
+	if split_pts is None:
+		split_pts = []
+	starts = np.concatenate(([0], np.asarray(split_pts, dtype=int)))
+	counts = np.diff(np.concatenate((starts, [n])))
+	kinds = circuit.get_param_kinds()
+	nparams = len(kinds)
+	nspec = len(starts)
+	params = np.full((nspec, nparams), np.nan)
+	chisq = np.full(nspec, np.nan)
+	valid = counts >= nparams
+	if not np.any(valid):
+		return params, chisq
+	starts, counts = starts[valid], counts[valid]
+	nvalid = len(starts)
+
+	# pad spectra to a common length; padded points get zero weight
+	width = counts.max()
+	offsets = np.arange(width)
+	mask = offsets[None,:] < counts[:,None]
+	idx = np.where(mask, starts[:,None] + offsets[None,:], starts[:,None])
+	f = freq[idx]
+	z = z_all[idx]
+	if weighting == 'modulus':
+		with np.errstate(divide='ignore'):
+			w = 1 / np.abs(z)
+		w[~np.isfinite(w)] = 0
+	else:
+		w = np.ones(z.shape)
+	w = np.where(mask, w, 0)
+
+	# initial guess
+	guess = np.asarray([default_guess(circuit, f[i,:counts[i]], z[i,:counts[i]]) for i in range(nvalid)])
+	if isinstance(initial_guess, dict):
+		for name, val in initial_guess.items():
+			guess[:,circuit.get_param_names().index(name)] = val
+	elif initial_guess is not None:
+		initial_guess = np.asarray(initial_guess, dtype=float)
+		if initial_guess.ndim == 2:
+			initial_guess = initial_guess[valid]
+		guess = np.broadcast_to(initial_guess, guess.shape).copy()
+	theta = to_internal(guess, kinds)
+
+	def residuals(theta, rows, jacobian=False):
+		p, dp = from_internal(theta, kinds)
+		out = circuit.impedance(p, f[rows], jacobian)
+		zm, dz = out if jacobian else (out, None)
+		diff = w[rows] * (zm - z[rows])
+		res = np.concatenate((diff.real, diff.imag), axis=1)
+		res[~np.isfinite(res)] = np.inf
+		if not jacobian:
+			return res, None
+		dz = w[rows][...,None] * dz * dp[:,None,:]
+		jac = np.concatenate((dz.real, dz.imag), axis=1)
+		return res, jac
+
+	res, jac = residuals(theta, np.arange(nvalid), True)
+	cost = np.sum(res**2, axis=1)
+	lam = np.full(nvalid, 1e-3)
+	active = np.isfinite(cost)
+	for iteration in range(max_iter):
+		rows = np.flatnonzero(active)
+		if len(rows) == 0:
+			break
+		if iteration > 0:
+			res, jac = residuals(theta[rows], rows, True)
+		else:
+			res, jac = res[rows], jac[rows]
+		jac[~np.isfinite(jac)] = 0
+		jtj = np.einsum('bmi,bmj->bij', jac, jac)
+		grad = np.einsum('bmi,bm->bi', jac, res)
+		diag = np.einsum('bii->bi', jtj)
+		diag = np.maximum(diag, 1e-12 * diag.max(axis=1, keepdims=True) + 1e-300)
+		# retry with increased damping until each spectrum improves or gives up
+		improved = np.zeros(len(rows), dtype=bool)
+		step_norm = np.zeros(len(rows))
+		new_cost = cost[rows].copy()
+		for attempt in range(10):
+			todo = ~improved & (lam[rows] < 1e10)
+			if not np.any(todo):
+				break
+			sub = rows[todo]
+			a = jtj[todo] + lam[sub][:,None,None] * (diag[todo][:,:,None] * np.eye(nparams))
+			try:
+				step = -np.linalg.solve(a, grad[todo][...,None])[...,0]
+			except np.linalg.LinAlgError:
+				step = -np.asarray([np.linalg.lstsq(ai, gi, rcond=None)[0] for ai, gi in zip(a, grad[todo])])
+			# keep parameters within a range where the impedance can still be evaluated
+			trial = np.clip(theta[sub] + step, -theta_limit, theta_limit)
+			trial_res, trial_jac = residuals(trial, sub)
+			trial_cost = np.sum(trial_res**2, axis=1)
+			better = np.isfinite(trial_cost) & (trial_cost < cost[sub])
+			pos = np.flatnonzero(todo)
+			theta[sub[better]] = trial[better]
+			new_cost[pos[better]] = trial_cost[better]
+			step_norm[pos[better]] = np.abs(step[better]).max(axis=1)
+			improved[pos[better]] = True
+			lam[sub[better]] = np.maximum(lam[sub[better]] / 10, 1e-12)
+			lam[sub[~better]] *= 10
+		converged = ~improved | (cost[rows] - new_cost <= tol * cost[rows]) | (step_norm < 1e-12)
+		cost[rows] = new_cost
+		active[rows[converged]] = False
+	fitted, dfitted = from_internal(theta, kinds)
+	params[valid] = fitted
+	chisq[valid] = cost
+	return params, chisq
+
+@profiling.stage()
+def circuit_process(data, circuit, initial_guess=None, weighting='modulus', max_iter=200):
+	"""
+	Fits an equivalent circuit to processed EIS data
+
+	All spectra are fit at once with fit_circuit. The fitted parameters are stored on each Datum as a dict mapping parameter names to values.
+
+	Parameters
+	___________
+	data: list of Datum
+		List of Datum objects containing processed EIS data with 'freq', 'real', and 'imag' columns, as returned by eis_process
+	circuit: Circuit or str
+		Circuit to be fit, or a circuit string (see Circuit)
+	initial_guess: array-like or dict (default=None)
+		Initial guess of the circuit parameters (see fit_circuit)
+	weighting: {'modulus', 'unit'} (default='modulus')
+		Weighting of the residuals (see fit_circuit)
+	max_iter: int (default=200)
+		Maximum number of iterations
+
+	Returns
+	________
+	data: list of Datum
+		The same Datum objects, with circuit parameters set
+	"""
+	if not isinstance(circuit, Circuit):
+		circuit = Circuit(circuit)
+	spectra = []
+	for d in data:
+		df = d.get_processed_data(copy=False)
+		if df is None or 'freq' not in df.columns:
+			_log.warning(f'No frequency data in {d.get_name()}, skipping equivalent circuit fit')
+			continue
+		spectra.append((d, df['freq'].to_numpy(), df['real'].to_numpy(), df['imag'].to_numpy()))
+	if len(spectra) == 0:
+		return data
+	split_pts = np.cumsum([len(s[1]) for s in spectra])[:-1]
+	freq = np.concatenate([s[1] for s in spectra])
+	real = np.concatenate([s[2] for s in spectra])
+	imag = np.concatenate([s[3] for s in spectra])
+	params, chisq = fit_circuit(circuit, freq, real, imag, split_pts, initial_guess, weighting, max_iter)
+	names = circuit.get_param_names()
+	for (d, f, re, im), p, c in zip(spectra, params, chisq):
+		d.set_circuit(circuit.get_description())
+		d.set_circuit_params(dict(zip(names, p)))
+		d.set_circuit_chisq(c)
+	return data
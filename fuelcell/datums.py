@@ -1,22 +1,27 @@
 import numpy as np
 import pandas as pd
-from scipy import stats
-from scipy.optimize import curve_fit
 import os
 import re
+import time
+import logging
 
 from fuelcell import utils
+from fuelcell import circuits
 from fuelcell.model import Datum
+from fuelcell import profiling
+
+_log = logging.getLogger(__name__)
 
 dlm_default = utils.dlm_default
-col_default_labels = {'current':'i', 'potential':'v', 'time':'t', 'current_err':'i_sd', 'potential_err':'v_sd', 'overpotential':'eta', 'tafelcurrent':'log(i)', 'realcurr':'real', 'imagcurr':'imag'}
-col_default_ids = {'current':2, 'potential':1, 'time':0, 'current_err':2, 'potential_err':3, 'overpotential':2, 'tafelcurrent':3}
+col_default_labels = {'current':'i', 'potential':'v', 'time':'t', 'current_err':'i_sd', 'potential_err':'v_sd', 'overpotential':'eta', 'tafelcurrent':'log(i)', 'realcurr':'real', 'imagcurr':'imag', 'frequency':'f'}
+col_default_ids = {'current':2, 'potential':1, 'time':0, 'current_err':2, 'potential_err':3, 'overpotential':2, 'tafelcurrent':3, 'realcurr':0, 'imagcurr':1, 'frequency':0}
 ref_electrodes = {'she':0, 'sce':0.241}
 thermo_potentials = {'none':0, 'oer':1.23}
 expt_types_all = ['cv', 'cp', 'ca', 'lsv', 'eis']
 
 ### functions to load raw data ###
-def load_data(filename=None, folder=None, pattern='', expt_type='', filetype='', delimiter=dlm_default):
+@profiling.stage()
+def load_data(filename=None, folder=None, pattern='', expt_type='', filetype='', delimiter=dlm_default, processes=1, cache=True, reuse=False):
 	"""
 	Loads data file(s) as a Datum Object
 
@@ -37,6 +42,12 @@ def load_data(filename=None, folder=None, pattern='', expt_type='', filetype='',
 		Any supported filetype. Only files of the specified file type will be loaded. Can be used in conjunction with pattern or expt_type.
 	delimiter : char (default = '\t')
 		Delimiting character if the file is a text file. Defaults to '\t' (tab-delimiting).
+	processes : int (default=1)
+		Number of worker processes used to read the files. If 1, files are read sequentially. If None or 0, one worker per CPU core is used. Files are returned in the same order regardless of the number of processes.
+	cache : bool (default=True)
+		Whether to use the on-disk cache of parsed files. Unchanged files are loaded from the cache instead of being parsed again. Set cache=False to always parse the original files.
+	reuse : bool (default=False)
+		Whether to return the Datum objects from earlier calls for files which have not changed since, instead of reading them again. Useful when repeatedly reloading a folder to pick up new or modified files. See utils.read_files for details.
 
 	Returns
 	________
@@ -56,9 +67,11 @@ def load_data(filename=None, folder=None, pattern='', expt_type='', filetype='',
 	if expt_type and not pattern:
 		pattern = r'.*' + expt_type + r'.*'
 	files = utils.get_files(dirpath, pattern, filetype, filename)
-	for f in files:
-		path = os.path.join(dirpath, f)
-		this_data = utils.read_file(path, delimiter)
+	paths = [os.path.join(dirpath, f) for f in files]
+	all_data = utils.read_files(paths, delimiter, processes, cache, reuse)
+	for f, this_data in zip(files, all_data):
+		if this_data is None:
+			continue
 		if expt_type:
 			this_data.set_expt_type(expt_type.lower())
 		else:
@@ -67,11 +80,10 @@ def load_data(filename=None, folder=None, pattern='', expt_type='', filetype='',
 				if re.match(pattern, f):
 					this_data.set_expt_type(this_type.lower())
 					break
-		if this_data is not None:
-			data.append(this_data)
+		data.append(this_data)
 	return data
 
-def ca_raw(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_default):
+def ca_raw(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_default, processes=1, cache=True, reuse=False):
 	"""
 	Loads chronoamperometry data
 
@@ -89,16 +101,22 @@ def ca_raw(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_de
 		Any supported filetype. Only files of the specified file type will be loaded. Can be used in conjunction with pattern or expt_type.
 	delimiter : char (default = '\t')
 		Delimiting character if the file is a text file. Defaults to '\t' (tab-delimiting).
+	processes : int (default=1)
+		Number of worker processes used to read the files. If None or 0, one worker per CPU core is used.
+	cache : bool (default=True)
+		Whether to use the on-disk cache of parsed files.
+	reuse : bool (default=False)
+		Whether to return the Datum objects from earlier calls for unchanged files. See load_data.
 
 	Returns
 	________
 	data:list of Datum
 		Returns a list of Datum objects, with each entry corresponding to an individual data file
 	"""
-	data = load_data(filename, folder, pattern, 'ca', filetype, delimiter)
+	data = load_data(filename, folder, pattern, 'ca', filetype, delimiter, processes, cache, reuse)
 	return data
 
-def cp_raw(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_default):
+def cp_raw(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_default, processes=1, cache=True, reuse=False):
 	"""
 	Loads chronoamperometry data
 
@@ -116,16 +134,22 @@ def cp_raw(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_de
 		Any supported filetype. Only files of the specified file type will be loaded. Can be used in conjunction with pattern or expt_type.
 	delimiter : char (default = '\t')
 		Delimiting character if the file is a text file. Defaults to '\t' (tab-delimiting).
+	processes : int (default=1)
+		Number of worker processes used to read the files. If None or 0, one worker per CPU core is used.
+	cache : bool (default=True)
+		Whether to use the on-disk cache of parsed files.
+	reuse : bool (default=False)
+		Whether to return the Datum objects from earlier calls for unchanged files. See load_data.
 
 	Returns
 	________
 	data:list of Datum
 		Returns a list of Datum objects, with each entry corresponding to an individual data file
 	"""
-	data = load_data(filename, folder, pattern, 'cp', filetype, delimiter)
+	data = load_data(filename, folder, pattern, 'cp', filetype, delimiter, processes, cache, reuse)
 	return data
 
-def cv_raw(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_default):
+def cv_raw(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_default, processes=1, cache=True, reuse=False):
 	"""
 	Loads cyclic voltammetry data
 
@@ -143,16 +167,22 @@ def cv_raw(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_de
 		Any supported filetype. Only files of the specified file type will be loaded. Can be used in conjunction with pattern or expt_type.
 	delimiter : char (default = '\t')
 		Delimiting character if the file is a text file. Defaults to '\t' (tab-delimiting).
+	processes : int (default=1)
+		Number of worker processes used to read the files. If None or 0, one worker per CPU core is used.
+	cache : bool (default=True)
+		Whether to use the on-disk cache of parsed files.
+	reuse : bool (default=False)
+		Whether to return the Datum objects from earlier calls for unchanged files. See load_data.
 
 	Returns
 	________
 	data:list of Datum
 		Returns a list of Datum objects, with each entry corresponding to an individual data file
 	"""
-	data = load_data(filename, folder, pattern, 'cv', filetype, delimiter)
+	data = load_data(filename, folder, pattern, 'cv', filetype, delimiter, processes, cache, reuse)
 	return data
 
-def lsv_raw(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_default):
+def lsv_raw(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_default, processes=1, cache=True, reuse=False):
 	"""
 	Loads linear sweep voltammetry data
 
@@ -170,16 +200,22 @@ def lsv_raw(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_d
 		Any supported filetype. Only files of the specified file type will be loaded. Can be used in conjunction with pattern or expt_type.
 	delimiter : char (default = '\t')
 		Delimiting character if the file is a text file. Defaults to '\t' (tab-delimiting).
+	processes : int (default=1)
+		Number of worker processes used to read the files. If None or 0, one worker per CPU core is used.
+	cache : bool (default=True)
+		Whether to use the on-disk cache of parsed files.
+	reuse : bool (default=False)
+		Whether to return the Datum objects from earlier calls for unchanged files. See load_data.
 
 	Returns
 	________
 	data:list of Datum
 		Returns a list of Datum objects, with each entry corresponding to an individual data file
 	"""
-	data = load_data(filename, folder, pattern, 'lsv', filetype, delimiter)
+	data = load_data(filename, folder, pattern, 'lsv', filetype, delimiter, processes, cache, reuse)
 	return data
 
-def eis_raw(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_default):
+def eis_raw(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_default, processes=1, cache=True, reuse=False):
 	"""
 	Loads electrochemical impedance spectroscopy data
 
@@ -197,17 +233,24 @@ def eis_raw(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_d
 		Any supported filetype. Only files of the specified file type will be loaded. Can be used in conjunction with pattern or expt_type.
 	delimiter : char (default = '\t')
 		Delimiting character if the file is a text file. Defaults to '\t' (tab-delimiting).
+	processes : int (default=1)
+		Number of worker processes used to read the files. If None or 0, one worker per CPU core is used.
+	cache : bool (default=True)
+		Whether to use the on-disk cache of parsed files.
+	reuse : bool (default=False)
+		Whether to return the Datum objects from earlier calls for unchanged files. See load_data.
 
 	Returns
 	________
 	data:list of Datum
 		Returns a list of Datum objects, with each entry corresponding to an individual data file
 	"""
-	data = load_data(filename, folder, pattern, 'eis', filetype, delimiter)
+	data = load_data(filename, folder, pattern, 'eis', filetype, delimiter, processes, cache, reuse)
 	return data
 
 ### high-level functions for processing data ###
-def ca_process(data=None, current_column=2, potential_column=1, area=5, reference='she', thermo_potential=0, export_data=False, save_dir='processed', threshold=5, min_step_length=50, pts_to_average=300, pyramid=False, **kwargs):
+@profiling.stage()
+def ca_process(data=None, current_column=2, potential_column=1, area=5, reference='she', thermo_potential=0, export_data=False, save_dir='processed', threshold=5, min_step_length=50, pts_to_average=300, pyramid=False, export_format='csv', **kwargs):
 	"""
 	Processes chronoamperometry data
 
@@ -233,6 +276,8 @@ def ca_process(data=None, current_column=2, potential_column=1, area=5, referenc
 		Geometric active area of the MEA. Scaling factor to convert current to current density.
 	reference: {'she', 'sce'}, int, or float (default='she')
 		Either a string identifying the reference electrode (ie 'she' or 'sce'), or the potential of the reference electrode used. sce=0.241
+	export_format: {'csv', 'xlsx', 'parquet', 'h5'} (default='csv')
+		Format used if export_data=True. With csv or xlsx, one file per Datum is written to save_dir (see utils.save_data). With parquet or h5, the whole batch is written to a single file in save_dir named after the experiment type, along with the processing parameters of each Datum (see utils.save_batch).
 	**kwargs:
 		Remaining arguments are passed to ca_raw to load data
 	"""
@@ -240,20 +285,23 @@ def ca_process(data=None, current_column=2, potential_column=1, area=5, referenc
 		data = ca_raw(**kwargs)
 	for d in data:
 		if d.get_expt_type() == 'ca':
-			raw = d.get_raw_data()
-			processed = process_steps(raw, potential_column, current_column, threshold, min_step_length, pts_to_average, pyramid, 'ca', area, reference, thermo_potential)
+			raw = d.get_raw_data(copy=False)
+			processed = process_steps(raw, potential_column, current_column, threshold, min_step_length, pts_to_average, pyramid, 'ca', area, reference, thermo_potential, d.get_raw_index())
 			d.set_processed_data(processed)
 			d.set_current_data(processed['i'])
 			d.set_potential_data(processed['v'])
 			d.set_overpotential_data(processed['eta'])
 			d.set_error_data(processed['i_sd'])
 			set_datum_params(d, area, reference, thermo_potential)
-			if export_data:
+			if export_data and export_format not in utils.batch_types:
 				name = d.get_name()
-				utils.save_data(processed, name+'.csv', save_dir)
+				utils.save_data(processed, name+'.'+export_format, save_dir)
+	if export_data and export_format in utils.batch_types:
+		utils.save_batch([d for d in data if d.get_expt_type() == 'ca'], 'ca.'+export_format, save_dir)
 	return data
 
-def cp_process(data=None, current_column=2, potential_column=1, area=5, reference='she', thermo_potential=0, export_data=False, save_dir='processed', threshold=5, min_step_length=25, pts_to_average=300, pyramid=True, **kwargs):
+@profiling.stage()
+def cp_process(data=None, current_column=2, potential_column=1, area=5, reference='she', thermo_potential=0, export_data=False, save_dir='processed', threshold=5, min_step_length=25, pts_to_average=300, pyramid=True, export_format='csv', **kwargs):
 	"""
 	Processes chronopotentiometry data
 
@@ -279,6 +327,8 @@ def cp_process(data=None, current_column=2, potential_column=1, area=5, referenc
 		Geometric active area of the MEA. Scaling factor to convert current to current density.
 	reference: {'she', 'sce'}, int, or float (default='she')
 		Either a string identifying the reference electrode (ie 'she' or 'sce'), or the potential of the reference electrode used. sce=0.241
+	export_format: {'csv', 'xlsx', 'parquet', 'h5'} (default='csv')
+		Format used if export_data=True. With csv or xlsx, one file per Datum is written to save_dir (see utils.save_data). With parquet or h5, the whole batch is written to a single file in save_dir named after the experiment type, along with the processing parameters of each Datum (see utils.save_batch).
 	**kwargs:
 		Remaining arguments are passed to cp_raw to load data
 	"""
@@ -286,20 +336,212 @@ def cp_process(data=None, current_column=2, potential_column=1, area=5, referenc
 		data = cp_raw(**kwargs)
 	for d in data:
 		if d.get_expt_type() == 'cp':
-			raw = d.get_raw_data()
-			processed = process_steps(raw, current_column, potential_column, threshold, min_step_length, pts_to_average, pyramid, 'cp', area, reference, thermo_potential)
+			raw = d.get_raw_data(copy=False)
+			processed = process_steps(raw, current_column, potential_column, threshold, min_step_length, pts_to_average, pyramid, 'cp', area, reference, thermo_potential, d.get_raw_index())
 			d.set_processed_data(processed)
 			d.set_current_data(processed['i'])
 			d.set_potential_data(processed['v'])
 			d.set_overpotential_data(processed['eta'])
 			d.set_error_data(processed['v_sd'])
 			set_datum_params(d, area, reference, thermo_potential)
-			if export_data:
+			if export_data and export_format not in utils.batch_types:
 				name = d.get_name()
-				utils.save_data(processed, name+'.csv', save_dir)
+				utils.save_data(processed, name+'.'+export_format, save_dir)
+	if export_data and export_format in utils.batch_types:
+		utils.save_batch([d for d in data if d.get_expt_type() == 'cp'], 'cp.'+export_format, save_dir)
+	return data
+
+def ca_stream(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_default, current_column=2, potential_column=1, area=5, reference='she', thermo_potential=0, export_data=False, save_dir='processed', threshold=5, min_step_length=50, pts_to_average=300, pyramid=False, chunksize=100000):
+	"""
+	Processes chronoamperometry data files in bounded memory
+
+	Streaming alternative to ca_process for files too large to load at once. Files are selected in the same way as ca_raw, and each file is processed in chunks using process_steps_stream. The raw data is never loaded, so the returned Datum objects contain processed data only.
+
+	Parameters
+	___________
+	filename, folder, pattern, filetype, delimiter:
+		See ca_raw
+	current_column, potential_column, area, reference, thermo_potential, export_data, save_dir, threshold, min_step_length, pts_to_average, pyramid:
+		See ca_process
+	chunksize: int (default=100000)
+		Number of rows read from each file at a time
+
+	Returns
+	________
+	data: list of Datum
+		Processed data, with one Datum per file
+	"""
+	data = stream_steps(filename, folder, pattern, filetype, delimiter, potential_column, current_column, threshold, min_step_length, pts_to_average, pyramid, 'ca', area, reference, thermo_potential, export_data, save_dir, chunksize)
+	return data
+
+def cp_stream(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_default, current_column=2, potential_column=1, area=5, reference='she', thermo_potential=0, export_data=False, save_dir='processed', threshold=5, min_step_length=25, pts_to_average=300, pyramid=True, chunksize=100000):
+	"""
+	Processes chronopotentiometry data files in bounded memory
+
+	Streaming alternative to cp_process for files too large to load at once, such as long durability holds. Files are selected in the same way as cp_raw, and each file is processed in chunks using process_steps_stream. The raw data is never loaded, so the returned Datum objects contain processed data only.
+
+	Parameters
+	___________
+	filename, folder, pattern, filetype, delimiter:
+		See cp_raw
+	current_column, potential_column, area, reference, thermo_potential, export_data, save_dir, threshold, min_step_length, pts_to_average, pyramid:
+		See cp_process
+	chunksize: int (default=100000)
+		Number of rows read from each file at a time
+
+	Returns
+	________
+	data: list of Datum
+		Processed data, with one Datum per file
+	"""
+	data = stream_steps(filename, folder, pattern, filetype, delimiter, current_column, potential_column, threshold, min_step_length, pts_to_average, pyramid, 'cp', area, reference, thermo_potential, export_data, save_dir, chunksize)
 	return data
 
-def cv_process(data=None, current_column=1, potential_column=0, area=5, reference='she', thermo_potential=0, export_data=False, save_dir='processed', **kwargs):
+def stream_steps(filename, folder, pattern, filetype, delimiter, control_column, response_column, threshold, min_step_length, pts_to_average, pyramid, expt_type, area, reference, thermo_potential, export_data, save_dir, chunksize):
+	"""
+	Shared implementation of ca_stream and cp_stream
+	"""
+	data = []
+	if filename:
+		if type(filename) != list:
+			filename = [filename]
+	if folder:
+		dirpath = os.path.realpath(folder)
+	else:
+		dirpath = os.getcwd()
+	if not pattern:
+		pattern = r'.*' + expt_type + r'.*'
+	files = utils.get_files(dirpath, pattern, filetype, filename)
+	for f in files:
+		path = os.path.join(dirpath, f)
+		name = os.path.basename(f).split('.')[0]
+		processed = process_steps_stream(path, control_column, response_column, threshold, min_step_length, pts_to_average, pyramid, expt_type, area, reference, thermo_potential, delimiter, chunksize)
+		d = Datum(name, None)
+		d.set_expt_type(expt_type)
+		set_step_data(d, processed, expt_type, area, reference, thermo_potential)
+		if export_data:
+			utils.save_data(processed, name+'.csv', save_dir)
+		data.append(d)
+	return data
+
+def set_step_data(d, processed, expt_type, area, reference, thermo_potential):
+	"""
+	Stores processed stepwise data and its derived values on a Datum
+	"""
+	d.set_processed_data(processed)
+	d.set_current_data(processed['i'])
+	d.set_potential_data(processed['v'])
+	d.set_overpotential_data(processed['eta'])
+	if expt_type == 'ca':
+		d.set_error_data(processed['i_sd'])
+	else:
+		d.set_error_data(processed['v_sd'])
+	set_datum_params(d, area, reference, thermo_potential)
+
+def ca_follow(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_default, current_column=2, potential_column=1, area=5, reference='she', thermo_potential=0, export_data=False, save_dir='processed', threshold=5, min_step_length=50, pts_to_average=300, pyramid=False, poll_interval=1.0, idle_timeout=None):
+	"""
+	Processes chronoamperometry files while they are being written
+
+	Live alternative to ca_stream. See follow_steps for details.
+
+	Parameters
+	___________
+	filename, folder, pattern, filetype, delimiter:
+		See ca_raw
+	current_column, potential_column, area, reference, thermo_potential, export_data, save_dir, threshold, min_step_length, pts_to_average, pyramid:
+		See ca_process
+	poll_interval, idle_timeout:
+		See follow_steps
+
+	Returns
+	________
+	updates: generator of Datum
+		Yields the Datum of a file, with updated processed data, each time one or more of its steps complete
+	"""
+	return follow_steps(filename, folder, pattern, filetype, delimiter, potential_column, current_column, threshold, min_step_length, pts_to_average, pyramid, 'ca', area, reference, thermo_potential, export_data, save_dir, poll_interval, idle_timeout)
+
+def cp_follow(filename=None, folder=None, pattern='', filetype='', delimiter=dlm_default, current_column=2, potential_column=1, area=5, reference='she', thermo_potential=0, export_data=False, save_dir='processed', threshold=5, min_step_length=25, pts_to_average=300, pyramid=True, poll_interval=1.0, idle_timeout=None):
+	"""
+	Processes chronopotentiometry files while they are being written
+
+	Live alternative to cp_stream for long holds which are still running. See follow_steps for details.
+
+	Parameters
+	___________
+	filename, folder, pattern, filetype, delimiter:
+		See cp_raw
+	current_column, potential_column, area, reference, thermo_potential, export_data, save_dir, threshold, min_step_length, pts_to_average, pyramid:
+		See cp_process
+	poll_interval, idle_timeout:
+		See follow_steps
+
+	Returns
+	________
+	updates: generator of Datum
+		Yields the Datum of a file, with updated processed data, each time one or more of its steps complete
+
+	Example
+	________
+	>>> for d in fc.cp_follow(folder='data', idle_timeout=3600):
+	...     print(d.get_name(), d.get_processed_data().tail(1))
+	"""
+	return follow_steps(filename, folder, pattern, filetype, delimiter, current_column, potential_column, threshold, min_step_length, pts_to_average, pyramid, 'cp', area, reference, thermo_potential, export_data, save_dir, poll_interval, idle_timeout)
+
+def follow_steps(filename, folder, pattern, filetype, delimiter, control_column, response_column, threshold, min_step_length, pts_to_average, pyramid, expt_type, area, reference, thermo_potential, export_data, save_dir, poll_interval=1.0, idle_timeout=None):
+	"""
+	Shared implementation of ca_follow and cp_follow
+
+	Every poll_interval seconds, the folder is listed and each matching csv or txt file is polled by a StepFollower, which parses only the rows appended since the previous poll. New files are picked up as they appear. Whenever steps of a file complete, its Datum is updated with the steady-state values of all completed steps and yielded. The step in progress is not included until the next step begins, or until following stops. If export_data is True, each file is exported to a single csv file in save_dir, which is rewritten every time its Datum is updated.
+
+	Parameters
+	___________
+	poll_interval: float (default=1.0)
+		Time between polls in seconds
+	idle_timeout: float (default=None)
+		Following stops once none of the files have grown for this many seconds. The step in progress of each file is then treated as complete and the final Datums are yielded. If None, files are followed until the generator is closed.
+	"""
+	if filename:
+		if type(filename) != list:
+			filename = [filename]
+	if folder:
+		dirpath = os.path.realpath(folder)
+	else:
+		dirpath = os.getcwd()
+	if not pattern:
+		pattern = r'.*' + expt_type + r'.*'
+	followers = {}
+	# each file is exported to one path, which is rewritten as more steps complete
+	export_paths = {}
+	last_growth = time.monotonic()
+	while True:
+		files = utils.get_files(dirpath, pattern, filetype, list(filename) if filename else None)
+		for f in files:
+			if f not in followers and f.split('.')[-1].lower() in utils.csv_types:
+				path = os.path.join(dirpath, f)
+				d = Datum(os.path.basename(f).split('.')[0], None)
+				d.set_expt_type(expt_type)
+				followers[f] = (StepFollower(path, control_column, response_column, threshold, min_step_length, pts_to_average, pyramid, expt_type, area, reference, thermo_potential, delimiter), d)
+		for f, (follower, d) in followers.items():
+			offset = follower.reader.offset
+			if follower.poll():
+				set_step_data(d, follower.get_processed(), expt_type, area, reference, thermo_potential)
+				if export_data:
+					export_paths[f] = utils.save_data(d.get_processed_data(), export_paths.get(f, d.get_name()+'.csv'), save_dir, overwrite=f in export_paths)
+				yield d
+			if follower.reader.offset != offset:
+				last_growth = time.monotonic()
+		if idle_timeout is not None and time.monotonic() - last_growth > idle_timeout:
+			for f, (follower, d) in followers.items():
+				if follower.finish():
+					set_step_data(d, follower.get_processed(), expt_type, area, reference, thermo_potential)
+					if export_data:
+						export_paths[f] = utils.save_data(d.get_processed_data(), export_paths.get(f, d.get_name()+'.csv'), save_dir, overwrite=f in export_paths)
+					yield d
+			return
+		time.sleep(poll_interval)
+
+@profiling.stage()
+def cv_process(data=None, current_column=1, potential_column=0, area=5, reference='she', thermo_potential=0, export_data=False, save_dir='processed', export_format='csv', **kwargs):
 	"""
 	Processes cyclic voltammetry data
 
@@ -317,6 +559,8 @@ def cv_process(data=None, current_column=1, potential_column=0, area=5, referenc
 		Index or label of the column containing current data. Used only if automatic column identification fails
 	potential_column : int or str (default=0)
 		Index or label of the column containing potential data. Used only if automatic column identification fails
+	export_format: {'csv', 'xlsx', 'parquet', 'h5'} (default='csv')
+		Format used if export_data=True. With csv or xlsx, one file per Datum is written to save_dir (see utils.save_data). With parquet or h5, the whole batch is written to a single file in save_dir named after the experiment type, along with the processing parameters of each Datum (see utils.save_batch).
 	**kwargs:
 		Remaining arguments are passed to cv_raw to load data
 	"""
@@ -324,24 +568,28 @@ def cv_process(data=None, current_column=1, potential_column=0, area=5, referenc
 		data = cv_raw(**kwargs)
 	for d in data:
 		if d.get_expt_type() == 'cv':
-			raw = d.get_raw_data()
-			current = find_col(raw, 'current', current_column)
+			raw = d.get_raw_data(copy=False)
+			col_index = d.get_raw_index()
+			current = find_col(raw, 'current', current_column, col_index)
 			current = current / area
-			potential = find_col(raw, 'potential', potential_column)
+			potential = find_col(raw, 'potential', potential_column, col_index)
 			potential = electrode_correct(potential, reference)
 			overpotential = overpotential_correct(potential, thermo_potential)
 			processed = pd.DataFrame({'i':current, 'v':potential, 'eta':overpotential})
 			d.set_processed_data(processed)
-			d.set_current_data(current)
-			d.set_potential_data(potential)
-			d.set_overpotential_data(overpotential)
+			d.set_current_data(processed['i'])
+			d.set_potential_data(processed['v'])
+			d.set_overpotential_data(processed['eta'])
 			set_datum_params(d, area, reference, thermo_potential)
-			if export_data:
+			if export_data and export_format not in utils.batch_types:
 				name = d.get_name()
-				utils.save_data(processed, name+'.csv', save_dir)
+				utils.save_data(processed, name+'.'+export_format, save_dir)
+	if export_data and export_format in utils.batch_types:
+		utils.save_batch([d for d in data if d.get_expt_type() == 'cv'], 'cv.'+export_format, save_dir)
 	return data
 
-def lsv_process(data=None, potential_column=0, current_column=1, area=5, reference='she', thermo_potential=0, export_data=False, save_dir='processed', **kwargs):
+@profiling.stage()
+def lsv_process(data=None, potential_column=0, current_column=1, area=5, reference='she', thermo_potential=0, export_data=False, save_dir='processed', export_format='csv', **kwargs):
 	"""
 	Processes linear sweep voltammetry data
 
@@ -357,6 +605,8 @@ def lsv_process(data=None, potential_column=0, current_column=1, area=5, referen
 		Index or label of the column containing current data. Used only if automatic column identification fails
 	potential_column : int or str (default=0)
 		Index or label of the column containing potential data. Used only if automatic column identification fails
+	export_format: {'csv', 'xlsx', 'parquet', 'h5'} (default='csv')
+		Format used if export_data=True. With csv or xlsx, one file per Datum is written to save_dir (see utils.save_data). With parquet or h5, the whole batch is written to a single file in save_dir named after the experiment type, along with the processing parameters of each Datum (see utils.save_batch).
 	**kwargs:
 		Remaining arguments are passed to cv_raw to load data
 	"""
@@ -365,27 +615,31 @@ def lsv_process(data=None, potential_column=0, current_column=1, area=5, referen
 		data = lsv_raw(**kwargs)
 	for d in data:
 		if d.get_expt_type() == 'lsv':
-			raw = d.get_raw_data()
-			potential = find_col(raw, 'potential', potential_column)
+			raw = d.get_raw_data(copy=False)
+			col_index = d.get_raw_index()
+			potential = find_col(raw, 'potential', potential_column, col_index)
 			potential = electrode_correct(potential, reference)
 			overpotential = overpotential_correct(potential, thermo_potential)
-			current = find_col(raw, 'current', current_column)
+			current = find_col(raw, 'current', current_column, col_index)
 			current = current / area
 			log_current = current - min(current) + 0.000001
 			log_current = np.log10(log_current)
 			processed = pd.DataFrame({'v':potential, 'i':current, 'eta':overpotential, 'log(i)':log_current})
 			d.set_processed_data(processed)
-			d.set_potential_data(potential)
-			d.set_overpotential_data(potential)
-			d.set_current_data(current)
-			d.set_logcurrent_data(log_current)
+			d.set_potential_data(processed['v'])
+			d.set_overpotential_data(processed['v'])
+			d.set_current_data(processed['i'])
+			d.set_logcurrent_data(processed['log(i)'])
 			set_datum_params(d, area, reference, thermo_potential)
-			if export_data:
+			if export_data and export_format not in utils.batch_types:
 				name = d.get_name()
-				utils.save_data(processed, name+'.csv', save_dir)
+				utils.save_data(processed, name+'.'+export_format, save_dir)
+	if export_data and export_format in utils.batch_types:
+		utils.save_batch([d for d in data if d.get_expt_type() == 'lsv'], 'lsv.'+export_format, save_dir)
 	return data
 
-def eis_process(data=None, freq_column=10, real_column=0, imag_column=1, area=5, threshold=5, min_step_length=5, export_data=False, save_dir='processed', **kwargs):
+@profiling.stage()
+def eis_process(data=None, freq_column=None, real_column=0, imag_column=1, area=5, threshold=5, min_step_length=5, export_data=False, save_dir='processed', fit_method='nonlinear', refine=3, circuit=None, circuit_guess=None, export_format='csv', **kwargs):
 	"""
 	Processes electrochemical impedance spectroscopy data
 
@@ -395,26 +649,44 @@ def eis_process(data=None, freq_column=10, real_column=0, imag_column=1, area=5,
 	__________
 	data: list of Datum
 		List of Datum objects containing EIS data. If unspecified, data will be loaded using eis_raw before processing.
+	freq_column: int or str (default=None)
+		Index or label of the column containing frequency data. Used only if automatic column identification fails. If unspecified and no frequency column can be identified, spectra are processed without frequencies.
+	real_column: int or str (default=0)
+		Index or label of the column containing the real component of the impedance. Used only if automatic column identification fails
+	imag_column: int or str (default=1)
+		Index or label of the column containing the imaginary component of the impedance. Used only if automatic column identification fails
 	area : int or float (default=5)
 		Geometric active area of the MEA. Scaling factor to convert current to durrent density
-	current_column : int or str (default=1)
-		Index or label of the column containing current data. Used only if automatic column identification fails
-	potential_column : int or str (default=0)
-		Index or label of the column containing potential data. Used only if automatic column identification fails
+	fit_method: {'nonlinear', 'algebraic'} (default='nonlinear')
+		Method used to fit a semicircle to each spectrum. All spectra are first fit at once with the algebraic circle fit (see fit_circles). If 'nonlinear', these fits are used as the initial guess for a nonlinear least-squares fit of each spectrum (see fit_eis_semicircle). If 'algebraic', the algebraic fits are used directly, which is much faster when processing many spectra.
+	refine: int (default=3)
+		Number of Gauss-Newton iterations used to polish the algebraic circle fits
+	circuit: str or circuits.Circuit (default=None)
+		If specified, this equivalent circuit is fit to every spectrum with frequency data (see circuits.circuit_process) and the fitted parameters are stored on each Datum. Either a circuit string such as 'R0-p(R1,CPE1)-W1' or the name of a preset in circuits.circuit_presets.
+	circuit_guess: array-like or dict (default=None)
+		Initial guess of the circuit parameters (see circuits.fit_circuit)
+	export_format: {'csv', 'xlsx', 'parquet', 'h5'} (default='csv')
+		Format used if export_data=True. With csv or xlsx, one file per Datum is written to save_dir (see utils.save_data). With parquet or h5, the whole batch is written to a single file in save_dir named after the experiment type, along with the processing parameters of each Datum (see utils.save_batch).
 	**kwargs:
 		Remaining arguments are passed to cv_raw to load data
 	"""
 	if data is None:
 		data = eis_raw(**kwargs)
+	if fit_method not in ['nonlinear', 'algebraic']:
+		raise ValueError(f'fit_method must be \'nonlinear\' or \'algebraic\', not {fit_method}')
+	spectra = []
 	new_data = []
 	for d in data:
 		if d.get_expt_type() == 'eis':
 			basename = d.get_name()
-			raw = d.get_raw_data()
-			### TODO: add support for GEIS and PEIS specifically, as well as frequency analysis ###
-			# freq_all = np.asarray(raw.iloc[:,freq_column])
-			real_all = np.asarray(raw.iloc[:,real_column])
-			imag_all = np.asarray(raw.iloc[:,imag_column])
+			raw = d.get_raw_data(copy=False)
+			col_index = d.get_raw_index()
+			### TODO: add support for GEIS and PEIS specifically ###
+			freq_all = None
+			if col_default_labels['frequency'] in col_index or freq_column is not None:
+				freq_all = find_col(raw, 'frequency', freq_column, col_index)
+			real_all = find_col(raw, 'realcurr', real_column, col_index)
+			imag_all = find_col(raw, 'imagcurr', imag_column, col_index)
 
 			# current_all = np.asarray(find_col(raw, 'current', 2))
 			# split_pts = find_steps(current_all, threshold=threshold)
@@ -422,33 +694,31 @@ def eis_process(data=None, freq_column=10, real_column=0, imag_column=1, area=5,
 			# real_splits = split_and_filter(real_all, split_pts, min_length=min_step_length)
 			# imag_splits = split_and_filter(imag_all, split_pts, min_length=min_step_length)
 			# freq_splits = split_and_filter(freq_all, split_pts, min_length=min_step_length)
-			real_splits, imag_splits = split_at_zeros(real_all, imag_all)
-			real_splits, imag_splits = drop_neg(real_splits, imag_splits)
+			bounds = split_at_zeros(real_all, imag_all, return_bounds=True)
+			starts, ends = drop_neg(real_all, imag_all, bounds)
+			positive = (real_all > 0) & (imag_all > 0)
 			i = 0
 			# for f, re, im, curr in zip(freq_splits, real_splits, imag_splits, current_splits):
-			for re, im in zip(real_splits, imag_splits):
-				re, im = np.asarray(re), np.asarray(im)
-				# f = np.asarray(f)
-				this_re = re[(im > 0) & (re > 0)]
-				this_im = im[(im > 0) & (re > 0)]
-				# this_f = f[(im > 0) & (re > 0)]
+			for start, end in zip(starts, ends):
+				mask = positive[start:end]
+				this_re = real_all[start:end][mask]
+				this_im = imag_all[start:end][mask]
 				# curr = np.asarray(curr) / area
 				# mean_curr = int(np.abs(curr.mean()))
-				# df = pd.DataFrame({'freq':this_f, 'real':this_re, 'imag':this_im})
-				df = pd.DataFrame({'real':this_re, 'imag':this_im})
+				if freq_all is not None:
+					this_f = freq_all[start:end][mask]
+					df = pd.DataFrame({'freq':this_f, 'real':this_re, 'imag':this_im})
+				else:
+					df = pd.DataFrame({'real':this_re, 'imag':this_im})
 				# this_data = Datum(str(mean_curr), df)
 				this_data = Datum(basename + f'_{i:02d}', df)
 				this_data.set_processed_data(df)
 				# this_data.set_realcurrent_data(re)
 				# this_data.set_imagcurrent_data(im)
 				# this_data.set_eis_current(mean_curr)
-				# semicirclefit
-				popt, hfr, lfr = fit_eis_semicircle(this_re, this_im)
-				this_data.set_semicircle_params(popt)
 				# midpt = (min(this_re) + max(this_re)) / 2
 				# lefthalf = this_im[this_im <= midpt]
 				# hfr_temp = this_re[(lefthalf == min(lefthalf))[0]]
-				this_data.set_hfr(hfr)
 				# this_data.set_lfr(lfr)
 				#linearfit
 				popt, hfr = fit_eis_linear(this_re, this_im)
@@ -456,14 +726,36 @@ def eis_process(data=None, freq_column=10, real_column=0, imag_column=1, area=5,
 				this_data.set_hfr_linear(hfr)
 				this_data.set_expt_type('eis')
 				new_data.append(this_data)
-				if export_data:
+				spectra.append((this_re, this_im))
+				if export_data and export_format not in utils.batch_types:
 					name = this_data.get_name()
-					utils.save_data(df, name+'.csv', save_dir)
+					utils.save_data(df, name+'.'+export_format, save_dir)
 				i += 1
+	# semicircle fit of all spectra at once
+	if len(spectra) > 0:
+		lengths = [len(re) for re, im in spectra]
+		split_pts = np.cumsum(lengths)[:-1]
+		all_re = np.concatenate([re for re, im in spectra])
+		all_im = np.concatenate([im for re, im in spectra])
+		guesses, hfrs = fit_circles(all_re, all_im, split_pts, refine)
+		for this_data, (this_re, this_im), p0, hfr in zip(new_data, spectra, guesses, hfrs):
+			if fit_method == 'nonlinear':
+				popt, hfr, lfr = fit_eis_semicircle(this_re, this_im, p0)
+			elif np.all(np.isfinite(p0)):
+				popt = p0
+			else:
+				popt, hfr = (0,0,0), 0
+			this_data.set_semicircle_params(popt)
+			this_data.set_hfr(hfr)
+	if circuit is not None:
+		circuits.circuit_process(new_data, circuit, circuit_guess)
+	if export_data and export_format in utils.batch_types:
+		utils.save_batch(new_data, 'eis.'+export_format, save_dir)
 	return new_data
 
 ### cp/ca analysis ###
-def process_steps(data, control_column=0, response_column=1, threshold=5, min_step_length=25, pts_to_average=300, pyramid=True, expt_type='cp', area=1, reference='she', thermo_potential=0):
+@profiling.stage()
+def process_steps(data, control_column=0, response_column=1, threshold=5, min_step_length=25, pts_to_average=300, pyramid=True, expt_type='cp', area=1, reference='she', thermo_potential=0, col_index=None):
 	"""
 	Processes stepwise data (ex chronopotentiometry and chronoamperometry data)
 
@@ -497,6 +789,8 @@ def process_steps(data, control_column=0, response_column=1, threshold=5, min_st
 		Geometric active area of the MEA. Scaling factor to convert current to current density.
 	reference: {'she', 'sce'}, int, or float (default='she')
 		Either a string identifying the reference electrode (ie 'she' or 'sce'), or the potential of the reference electrode used. sce=0.241
+	col_index: dict (default=None)
+		Precomputed column index of data (see utils.build_col_index). If unspecified, it is built from the column labels of data.
 	"""
 	if expt_type == 'ca':
 		control_var = 'potential'
@@ -504,25 +798,71 @@ def process_steps(data, control_column=0, response_column=1, threshold=5, min_st
 	elif expt_type == 'cp': 
 		control_var = 'current'
 		response_var = 'potential'
-	control = np.asarray(find_col(data, control_var, control_column))
-	response = np.asarray(find_col(data, response_var, response_column))
+	if col_index is None:
+		col_index = utils.build_col_index(data)
+	control = find_col(data, control_var, control_column, col_index)
+	response = find_col(data, response_var, response_column, col_index)
 	split_pts = find_steps(control, threshold=threshold)
-	control_steps = split_and_filter(control, split_pts, min_length=min_step_length)
-	response_steps = split_and_filter(response, split_pts, min_length=min_step_length)
-	control_avg = array_apply(control_steps, avg_last_pts, numpts=pts_to_average)
-	response_avg = array_apply(response_steps, avg_last_pts, numpts=pts_to_average)
-	control_std = array_apply(control_steps, std_last_pts, numpts=pts_to_average)
-	response_std = array_apply(response_steps, std_last_pts, numpts=pts_to_average)	
-	# if expt_type == 'ca':
-	# 	split_pts = find_steps(potential, threshold=threshold)
-	# elif expt_type == 'cp':
-	# 	split_pts = find_steps(current, threshold=threshold)
-	# current_steps = split_and_filter(current, split_pts, min_length=min_step_length)
-	# potential_steps = split_and_filter(potential, split_pts, min_length=min_step_length)
-	# current_avg = array_apply(current_steps, avg_last_pts, numpts=pts_to_average)
-	# potential_avg = array_apply(potential_steps, avg_last_pts, numpts=pts_to_average)
-	# current_std = array_apply(current_steps, std_last_pts, numpts=pts_to_average)
-	# potential_std = array_apply(potential_steps, std_last_pts, numpts=pts_to_average)
+	avgs, stds, _ = step_stats(np.column_stack((control, response)), split_pts, pts_to_average, min_step_length)
+	control_avg, response_avg = avgs[:,0], avgs[:,1]
+	control_std, response_std = stds[:,0], stds[:,1]
+	control_avg, response_avg, control_std, response_std = combine_steps(control_avg, response_avg, control_std, response_std, pyramid)
+	processed = scale_steps(control_avg, response_avg, control_std, response_std, expt_type, area, reference, thermo_potential)
+	return processed
+
+@profiling.stage()
+def finalize_steps(control_avg, response_avg, control_std, response_std, pyramid=True, expt_type='cp', area=1, reference='she', thermo_potential=0):
+	"""
+	Combines and scales steady-state step values
+
+	Performs steps 5 and 6 of process_steps on the steady-state average and standard deviation of each step, however they were computed.
+
+	Parameters
+	___________
+	control_avg, response_avg: numpy array
+		Steady-state average of the control and response variables for each step
+	control_std, response_std: numpy array
+		Steady-state standard deviation of the control and response variables for each step
+	pyramid: bool (default=True)
+		Specifies whether the current is ramped in both directions. Set pyramid=False if only ramping up or only ramping down.
+	expt_type: {'cp', 'ca'} (default='cp')
+		Specifies the type of experiment being analyzed. This is used to determine which variables are the control and response variables.
+	area: int or float (default=1)
+		Geometric active area of the MEA. Scaling factor to convert current to current density.
+	reference: {'she', 'sce'}, int, or float (default='she')
+		Either a string identifying the reference electrode (ie 'she' or 'sce'), or the potential of the reference electrode used. sce=0.241
+	thermo_potential: {'none', 'oer'}, int, or float (default=0)
+		Thermodynamic potential used to calculate overpotential
+
+	Returns
+	________
+	processed: DataFrame
+		Processed data with columns 'i', 'v', 'i_sd', 'v_sd', and 'eta'
+	"""
+	control_avg, response_avg, control_std, response_std = combine_steps(control_avg, response_avg, control_std, response_std, pyramid)
+	processed = scale_steps(control_avg, response_avg, control_std, response_std, expt_type, area, reference, thermo_potential)
+	return processed
+
+def combine_steps(control_avg, response_avg, control_std, response_std, pyramid=True):
+	"""
+	Combines the ramp-up and ramp-down holds of stepwise data
+
+	Performs step 5 of process_steps. Like the steps before it, this does not depend on the area, reference electrode, or thermodynamic potential.
+
+	Parameters
+	___________
+	control_avg, response_avg: numpy array
+		Steady-state average of the control and response variables for each step
+	control_std, response_std: numpy array
+		Steady-state standard deviation of the control and response variables for each step
+	pyramid: bool (default=True)
+		Specifies whether the current is ramped in both directions. If False, the values are returned unchanged.
+
+	Returns
+	________
+	control_avg, response_avg, control_std, response_std: numpy array
+		Combined values, with one entry per distinct hold
+	"""
 	if pyramid:
 		sort_idx = np.argsort(control_avg)
 		control_avg = control_avg[sort_idx]
@@ -530,18 +870,33 @@ def process_steps(data, control_column=0, response_column=1, threshold=5, min_st
 		control_std = control_std[sort_idx]
 		response_std = response_std[sort_idx]
 		split_pts = find_steps(control_avg, threshold=2)
-		# if expt_type == 'ca':
-		# 	split_pts = find_steps(potential_avg, threshold=2)
-		# elif expt_type == 'cp':
-		# 	split_pts = find_steps(current_avg, threshold=2)
-		control_steps = split_and_filter(control_avg, split_pts)
-		response_steps = split_and_filter(response_avg, split_pts)
-		control_std_steps = split_and_filter(control_std, split_pts)
-		response_std_steps = split_and_filter(response_std, split_pts)
-		control_avg = array_apply(control_steps, np.mean)
-		response_avg = array_apply(response_steps, np.mean)
-		control_std = array_apply(control_std_steps, std_agg)
-		response_std = array_apply(response_std_steps, std_agg)
+		if len(control_avg) > 0:
+			starts = np.concatenate(([0], split_pts))
+			counts = np.diff(np.concatenate((starts, [len(control_avg)])))
+			avgs = np.add.reduceat(np.column_stack((control_avg, response_avg)), starts) / counts[:,None]
+			stds = np.sqrt(np.add.reduceat(np.column_stack((control_std, response_std))**2, starts))
+			control_avg, response_avg = avgs[:,0], avgs[:,1]
+			control_std, response_std = stds[:,0], stds[:,1]
+	return control_avg, response_avg, control_std, response_std
+
+def scale_steps(control_avg, response_avg, control_std, response_std, expt_type='cp', area=1, reference='she', thermo_potential=0):
+	"""
+	Applies area, reference electrode, and thermodynamic potential to steady-state step values
+
+	Performs step 6 of process_steps. This is a linear rescale of the current and an offset of the potential, so it is cheap to repeat when only these parameters change (see reprocess).
+
+	Parameters
+	___________
+	control_avg, response_avg, control_std, response_std: numpy array
+		Steady-state values of each step, as returned by combine_steps
+	expt_type, area, reference, thermo_potential:
+		See finalize_steps
+
+	Returns
+	________
+	processed: DataFrame
+		Processed data with columns 'i', 'v', 'i_sd', 'v_sd', and 'eta'
+	"""
 	# current_avg = current_avg / area
 	# current_std = current_std / area
 	if expt_type == 'ca':
@@ -560,49 +915,736 @@ def process_steps(data, control_column=0, response_column=1, threshold=5, min_st
 		processed = pd.DataFrame({'i':control_avg, 'v':response_avg, 'i_sd':control_std, 'v_sd':response_std, 'eta':overpotential})
 	return processed
 
+@profiling.stage()
+def reprocess(data, area=None, reference=None, thermo_potential=None):
+	"""
+	Updates processed data for a new area, reference electrode, or thermodynamic potential
+
+	Changing these parameters only rescales the current and offsets the potential, so the processed data of CP, CA, CV, and LSV experiments is updated directly instead of being processed again from the raw data. The parameters previously applied to each Datum are taken from the Datum itself (see set_datum_params). Step detection and averaging are not repeated, so updating stepwise data only costs a few operations per step. Other experiment types and Datum objects without processed data are left unchanged.
+
+	Parameters
+	___________
+	data: list of Datum
+		Processed Datum objects to update
+	area: int or float (default=None)
+		New geometric active area of the MEA. If unspecified, the area is unchanged.
+	reference: {'she', 'sce'}, int, or float (default=None)
+		New reference electrode. If unspecified, the reference electrode is unchanged.
+	thermo_potential: {'none', 'oer'}, int, or float (default=None)
+		New thermodynamic potential. If unspecified, the thermodynamic potential is unchanged.
+
+	Returns
+	________
+	data: list of Datum
+		The updated Datum objects
+	"""
+	for d in data:
+		expt_type = d.get_expt_type()
+		processed = d.get_processed_data()
+		if processed is None or expt_type not in ['cp', 'ca', 'cv', 'lsv']:
+			continue
+		old_area = d.get_area()
+		new_area = old_area
+		if area is not None:
+			new_area = area / 10000 if expt_type == 'lsv' else area
+		old_ref = float(electrode_correct(0.0, d.get_refelec()))
+		new_ref = old_ref if reference is None else float(electrode_correct(0.0, reference))
+		new_rxn = d.get_thermo_potential() if thermo_potential is None else thermo_potential
+		scale = old_area / new_area
+		cols = {c:processed[c].to_numpy() for c in processed.columns}
+		cols['i'] = cols['i'] * scale
+		cols['v'] = cols['v'] + (new_ref - old_ref)
+		cols['eta'] = overpotential_correct(cols['v'], new_rxn)
+		if 'i_sd' in cols:
+			cols['i_sd'] = cols['i_sd'] * np.sqrt(scale)
+		if expt_type == 'lsv':
+			cols['log(i)'] = np.log10(cols['i'] - min(cols['i']) + 0.000001)
+		updated = pd.DataFrame(cols)
+		d.set_processed_data(updated)
+		d.set_current_data(updated['i'])
+		d.set_potential_data(updated['v'])
+		if expt_type == 'lsv':
+			d.set_overpotential_data(updated['v'])
+			d.set_logcurrent_data(updated['log(i)'])
+		else:
+			d.set_overpotential_data(updated['eta'])
+		if expt_type == 'ca':
+			d.set_error_data(updated['i_sd'])
+		elif expt_type == 'cp':
+			d.set_error_data(updated['v_sd'])
+		set_datum_params(d, new_area, new_ref, new_rxn)
+	return data
+
+@profiling.stage()
+def process_steps_stream(filename, control_column=0, response_column=1, threshold=5, min_step_length=25, pts_to_average=300, pyramid=True, expt_type='cp', area=1, reference='she', thermo_potential=0, delimiter=dlm_default, chunksize=100000):
+	"""
+	Processes stepwise data directly from a file in bounded memory
+
+	Equivalent to loading the file and calling process_steps, but the file is read in chunks of chunksize rows and only the control and response columns are parsed. Steps are detected across chunk boundaries by a StepTracker, which keeps only the last pts_to_average points of the step in progress. Memory use therefore depends on chunksize and pts_to_average rather than on the length of the file.
+
+	Only text files (csv and txt) can be read in chunks. Excel and binary files are loaded in full and processed with process_steps.
+
+	Parameters
+	___________
+	filename: str, path object, or path-like
+		Complete path to the data file
+	control_column, response_column, threshold, min_step_length, pts_to_average, pyramid, expt_type, area, reference, thermo_potential:
+		See process_steps
+	delimiter: str (default='\\t')
+		Delimiting character if the file is a txt file
+	chunksize: int (default=100000)
+		Number of rows read from the file at a time
+
+	Returns
+	________
+	processed: DataFrame
+		Processed data, identical to the output of process_steps
+	"""
+	if expt_type == 'ca':
+		control_var = 'potential'
+		response_var = 'current'
+	elif expt_type == 'cp': 
+		control_var = 'current'
+		response_var = 'potential'
+	filetype = utils.check_type(os.path.basename(filename).split('.')[-1])
+	if filetype in utils.excel_types or filetype in utils.binary_types:
+		d = utils.read_file(filename, delimiter)
+		return process_steps(d.get_raw_data(copy=False), control_column, response_column, threshold, min_step_length, pts_to_average, pyramid, expt_type, area, reference, thermo_potential, d.get_raw_index())
+	if filetype == 'csv':
+		delimiter = ','
+	header = pd.read_csv(filename, delimiter=delimiter, nrows=0)
+	control_id = find_col_id(header, control_var, control_column)
+	response_id = find_col_id(header, response_var, response_column)
+	usecols = sorted({control_id, response_id})
+	control_pos = usecols.index(control_id)
+	response_pos = usecols.index(response_id)
+	tracker = StepTracker(threshold, pts_to_average)
+	reader = pd.read_csv(filename, delimiter=delimiter, usecols=usecols, chunksize=chunksize)
+	for chunk in reader:
+		tracker.update(chunk.iloc[:, control_pos].to_numpy(), chunk.iloc[:, response_pos].to_numpy())
+	tracker.finish()
+	control_avg, response_avg, control_std, response_std = tracker.get_steps(min_step_length)
+	processed = finalize_steps(control_avg, response_avg, control_std, response_std, pyramid, expt_type, area, reference, thermo_potential)
+	return processed
+
+class StepTracker():
+	"""
+	Incremental step detection for stepwise data
+
+	Detects steps in the same way as find_steps and computes the same steady-state values as avg_last_pts and std_last_pts, but accepts the data a piece at a time. Only the last numpts points of the step in progress are kept in memory, along with the summary values of each completed step.
+
+	Parameters
+	___________
+	threshold: int or float (default=5)
+		Minimum consecutive absolute difference which constitutes a step
+	numpts: int (default=300)
+		Steady-state average and sd are calculated using the last numpts values of each step
+	"""
+	def __init__(self, threshold=5, numpts=300):
+		self.threshold = threshold
+		self.numpts = numpts
+		self.last = None
+		self.count = 0
+		self.control_buf = np.empty(0)
+		self.response_buf = np.empty(0)
+		self.steps = []
+
+	def update(self, control, response):
+		"""
+		Adds new points to the tracker
+
+		Parameters
+		___________
+		control: numpy array
+			New values of the control variable
+		response: numpy array
+			New values of the response variable, the same length as control
+
+		Returns
+		________
+		completed: int
+			Number of steps completed by the new points
+		"""
+		control = np.asarray(control, dtype=float)
+		response = np.asarray(response, dtype=float)
+		if len(control) == 0:
+			return 0
+		if self.last is None:
+			split_pts = find_steps(control, self.threshold)
+		else:
+			split_pts = find_steps(np.concatenate(([self.last], control)), self.threshold) - 1
+		self.last = control[-1]
+		bounds = np.concatenate(([0], split_pts, [len(control)]))
+		for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+			if i > 0:
+				self.end_step()
+			self.extend(control[start:end], response[start:end])
+		return len(split_pts)
+
+	def extend(self, control, response):
+		self.count += len(control)
+		if len(control) >= self.numpts:
+			self.control_buf = control[-self.numpts:].copy()
+			self.response_buf = response[-self.numpts:].copy()
+		else:
+			self.control_buf = np.concatenate((self.control_buf, control))[-self.numpts:]
+			self.response_buf = np.concatenate((self.response_buf, response))[-self.numpts:]
+
+	def end_step(self):
+		if self.count == 0:
+			return
+		step = (self.count, avg_last_pts(self.control_buf, self.numpts), avg_last_pts(self.response_buf, self.numpts), std_last_pts(self.control_buf, self.numpts), std_last_pts(self.response_buf, self.numpts))
+		self.steps.append(step)
+		self.count = 0
+		self.control_buf = np.empty(0)
+		self.response_buf = np.empty(0)
+
+	def finish(self):
+		"""
+		Marks the step in progress as complete
+		"""
+		self.end_step()
+
+	def get_steps(self, min_length=0):
+		"""
+		Steady-state values of all completed steps
+
+		Parameters
+		___________
+		min_length: int (default=0)
+			Steps with min_length points or fewer are discarded
+
+		Returns
+		________
+		control_avg, response_avg, control_std, response_std: numpy array
+			Steady-state average and standard deviation of each completed step
+		"""
+		steps = np.asarray(self.steps, dtype=float).reshape(-1, 5)
+		steps = steps[steps[:,0] > min_length]
+		return steps[:,1], steps[:,2], steps[:,3], steps[:,4]
+
+class StepFollower():
+	"""
+	Incremental processing of a stepwise data file which is still being written
+
+	Combines a TailReader, which parses only the rows appended to the file since the last poll, with a StepTracker. The cost of each poll is therefore proportional to the amount of new data rather than to the length of the file. If the file is truncated or overwritten, processing starts over.
+
+	Parameters
+	___________
+	filename: str, path object, or path-like
+		Complete path to a csv or txt file
+	control_column, response_column, threshold, min_step_length, pts_to_average, pyramid, expt_type, area, reference, thermo_potential:
+		See process_steps
+	delimiter: str (default='\\t')
+		Delimiting character if the file is a txt file
+	"""
+	def __init__(self, filename, control_column=0, response_column=1, threshold=5, min_step_length=25, pts_to_average=300, pyramid=True, expt_type='cp', area=1, reference='she', thermo_potential=0, delimiter=dlm_default):
+		self.reader = utils.TailReader(filename, delimiter)
+		self.control_column = control_column
+		self.response_column = response_column
+		self.min_step_length = min_step_length
+		self.pts_to_average = pts_to_average
+		self.pyramid = pyramid
+		self.expt_type = expt_type
+		self.area = area
+		self.reference = reference
+		self.thermo_potential = thermo_potential
+		self.threshold = threshold
+		self.tracker = StepTracker(threshold, pts_to_average)
+		self.usecols = None
+
+	def poll(self, final=False):
+		"""
+		Processes the rows appended to the file since the last poll
+
+		Parameters
+		___________
+		final: bool (default=False)
+			Whether the file is complete, in which case a last line without a line break is processed as well
+
+		Returns
+		________
+		completed: int
+			Number of steps completed by the new rows
+		"""
+		if self.usecols is None:
+			header = self.reader.get_header()
+			if header is None:
+				return 0
+			if self.expt_type == 'ca':
+				control_var, response_var = 'potential', 'current'
+			else:
+				control_var, response_var = 'current', 'potential'
+			control_id = find_col_id(header, control_var, self.control_column)
+			response_id = find_col_id(header, response_var, self.response_column)
+			self.usecols = sorted({control_id, response_id})
+			self.control_pos = self.usecols.index(control_id)
+			self.response_pos = self.usecols.index(response_id)
+		chunk = self.reader.read(self.usecols, final)
+		if self.reader.truncated:
+			self.tracker = StepTracker(self.threshold, self.pts_to_average)
+			self.usecols = None
+			return self.poll(final)
+		if chunk is None:
+			return 0
+		return self.tracker.update(chunk.iloc[:, self.control_pos].to_numpy(), chunk.iloc[:, self.response_pos].to_numpy())
+
+	def finish(self):
+		"""
+		Processes any remaining data and marks the step in progress as complete
+
+		Returns
+		________
+		completed: int
+			Number of steps completed
+		"""
+		n = len(self.tracker.steps)
+		self.poll(final=True)
+		self.tracker.finish()
+		return len(self.tracker.steps) - n
+
+	def get_processed(self):
+		"""
+		Processed data of all completed steps, in the same form as the output of process_steps
+		"""
+		control_avg, response_avg, control_std, response_std = self.tracker.get_steps(self.min_step_length)
+		return finalize_steps(control_avg, response_avg, control_std, response_std, self.pyramid, self.expt_type, self.area, self.reference, self.thermo_potential)
+
 ### tafel analysis ###
-def tafel_slope(log_curr, eta, min_curr=None, max_curr=None):
-	min_idx = 0
-	max_idx = len(log_curr)
-	if min_curr and min_curr >= min(log_curr):
-		min_idx = np.where(log_curr <= min_curr)[0][-1]
-	if max_curr and max_curr <= max(log_curr):
-		max_idx = np.where(log_curr >= max_curr)[0][0]
-	log_curr_trim = log_curr[min_idx:max_idx+1]
-	eta_trim = eta[min_idx:max_idx+1]
+@profiling.stage()
+def tafel_process(data=None, auto=True, min_curr=None, max_curr=None, min_points=10, min_rsq=0.99, current_column=3, potential_column=2, **kwargs):
+	"""
+	Tafel analysis of LSV data
+
+	Fits the Tafel equation to every LSV Datum and stores the Tafel slope, exchange current density, and R-squared on each Datum. With auto=True, the linear region of each curve is found by tafel_auto, so no bounds need to be chosen by hand.
+
+	Parameters
+	__________
+	data: list of Datum
+		List of Datum objects containing processed LSV data. If unspecified, data will be loaded and processed using lsv_process.
+	auto: bool (default=True)
+		Whether to select the fitting range of each curve automatically (see tafel_slope)
+	min_curr: float (default=None)
+		Lower bound of log(current) used in the fit. Ignored if auto=True
+	max_curr: float (default=None)
+		Upper bound of log(current) used in the fit. Ignored if auto=True
+	min_points: int (default=10)
+		Minimum number of points in the automatically selected range
+	min_rsq: float (default=0.99)
+		Minimum R-squared of the automatically selected range
+	current_column : int or str (default=3)
+		Index or label of the column containing log(current) data. Used only if automatic column identification fails
+	potential_column : int or str (default=2)
+		Index or label of the column containing overpotential data. Used only if automatic column identification fails
+	**kwargs:
+		Remaining arguments are passed to lsv_process to load data
+
+	Returns
+	________
+	data: list of Datum
+		The same Datum objects, with Tafel parameters set
+	"""
+	if data is None:
+		data = lsv_process(**kwargs)
+	for d in data:
+		if d.get_expt_type() == 'lsv' and d.get_processed_data(copy=False) is not None:
+			processed = d.get_processed_data(copy=False)
+			col_index = d.get_processed_index()
+			log_curr = find_col(processed, 'tafelcurrent', current_column, col_index)
+			eta = find_col(processed, 'overpotential', potential_column, col_index)
+			a, b, r2, itrim, vtrim = tafel_slope(log_curr, eta, min_curr, max_curr, auto, min_points, min_rsq)
+			d.set_tafel_slope(a)
+			d.set_exchg_curr(b)
+			d.set_tafel_rsq(r2)
+	return data
+
+@profiling.stage()
+def tafel_slope(log_curr, eta, min_curr=None, max_curr=None, auto=False, min_points=10, min_rsq=0.99):
+	"""
+	Fits the Tafel equation to LSV data
+
+	Parameters
+	___________
+	log_curr: numpy array
+		Log of the current density
+	eta: numpy array
+		Overpotential
+	min_curr: float (default=None)
+		Lower bound of log_curr used in the fit. If unspecified, the smallest value is used. Ignored if auto=True
+	max_curr: float (default=None)
+		Upper bound of log_curr used in the fit. If unspecified, the largest value is used. Ignored if auto=True
+	auto: bool (default=False)
+		If True, the fitting range is selected automatically as the best window found by tafel_auto. If no window can be found, all data is used.
+	min_points: int (default=10)
+		Minimum number of points in the automatically selected window. Only used if auto=True
+	min_rsq: float (default=0.99)
+		Minimum R-squared of the automatically selected window. Only used if auto=True
+
+	Returns
+	________
+	a: float
+		Tafel slope
+	exchg_curr: float
+		Exchange current density
+	rsquare: float
+		R-squared of the fit
+	log_curr_trim: numpy array
+		Values of log_curr used in the fit
+	eta_trim: numpy array
+		Values of eta used in the fit
+	"""
+	if auto:
+		log_curr, eta = np.asarray(log_curr), np.asarray(eta)
+		candidates = tafel_auto(log_curr, eta, min_points, min_rsq, max_candidates=1)
+		if len(candidates) > 0:
+			start, end = candidates['start'].iloc[0], candidates['end'].iloc[0]
+		else:
+			start, end = 0, len(log_curr)
+		log_curr_trim = log_curr[start:end]
+		eta_trim = eta[start:end]
+		finite = np.isfinite(log_curr_trim) & np.isfinite(eta_trim)
+		log_curr_trim, eta_trim = log_curr_trim[finite], eta_trim[finite]
+	else:
+		min_idx = 0
+		max_idx = len(log_curr)
+		if min_curr and min_curr >= min(log_curr):
+			min_idx = np.where(log_curr <= min_curr)[0][-1]
+		if max_curr and max_curr <= max(log_curr):
+			max_idx = np.where(log_curr >= max_curr)[0][0]
+		log_curr_trim = log_curr[min_idx:max_idx+1]
+		eta_trim = eta[min_idx:max_idx+1]
+	from scipy import stats
 	a, b, r, p, err = stats.linregress(log_curr_trim, eta_trim)
 	rsquare = r**2
-	exchg_curr = 10 ** (b / -a)
+	exchg_curr = exchange_current(a, b)
 	return a, exchg_curr, rsquare, log_curr_trim, eta_trim
 
+def exchange_current(slope, intercept):
+	"""
+	Exchange current density of a Tafel fit, i.e. the current at which the fitted line crosses zero overpotential
+
+	Parameters
+	___________
+	slope: float or numpy array
+		Tafel slope
+	intercept: float or numpy array
+		Overpotential of the fitted line at log_curr = 0
+
+	Returns
+	________
+	exchg_curr: float or numpy array
+		Exchange current density. NaN where the line is too flat for the crossing to be represented as a float
+	"""
+	with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+		exchg_curr = np.power(10., np.divide(intercept, np.negative(slope)))
+	return np.where(np.isfinite(exchg_curr) & (exchg_curr > 0), exchg_curr, np.nan)[()]
+
+@profiling.stage()
+def tafel_auto(log_curr, eta, min_points=10, min_rsq=0.99, num_lengths=50, max_candidates=10):
+	"""
+	Finds the linear (Tafel) region of LSV data automatically
+
+	A linear regression of eta against log_curr is evaluated for every window of consecutive points. The sums required by each regression are taken from cumulative sums of the data, so all windows of a given length are scored in a single vectorized O(n) step, and the total cost is O(n*num_lengths). Windows with an R-squared of at least min_rsq are ranked by length and then by R-squared; if there are no such windows, all windows are ranked by R-squared. Windows overlapping a better-ranked window by more than half of their length are discarded so the candidates describe distinct regions of the curve.
+
+	Parameters
+	___________
+	log_curr: list or numpy array
+		Log of the current density. Non-finite values (eg the log of zero current) are skipped.
+	eta: list or numpy array
+		Overpotential
+	min_points: int (default=10)
+		Minimum number of points in a window
+	min_rsq: float (default=0.99)
+		Minimum R-squared for a window to be considered linear
+	num_lengths: int (default=50)
+		Number of window lengths evaluated, evenly spaced between min_points and the length of the data. If there are fewer possible lengths, all of them are evaluated.
+	max_candidates: int (default=10)
+		Maximum number of candidate windows returned
+
+	Returns
+	________
+	candidates: DataFrame
+		Ranked candidate windows, best first, with columns 'start' and 'end' (indices of the window in log_curr, end exclusive), 'min_curr' and 'max_curr' (range of log_curr in the window), 'slope', 'exchg_curr', 'rsq', and 'points' (number of points in the window)
+	"""
+	columns = ['start', 'end', 'min_curr', 'max_curr', 'slope', 'exchg_curr', 'rsq', 'points']
+	x_all = np.asarray(log_curr, dtype=float)
+	y_all = np.asarray(eta, dtype=float)
+	positions = np.flatnonzero(np.isfinite(x_all) & np.isfinite(y_all))
+	x, y = x_all[positions], y_all[positions]
+	n = len(x)
+	min_points = max(int(min_points), 3)
+	if n < min_points:
+		return pd.DataFrame(columns=columns)
+	# center the data so the cumulative sums do not lose precision
+	x_mean, y_mean = x.mean(), y.mean()
+	xc, yc = x - x_mean, y - y_mean
+	cumsum = lambda v: np.concatenate(([0.], np.cumsum(v)))
+	sx, sy, sxx, sxy, syy = cumsum(xc), cumsum(yc), cumsum(xc*xc), cumsum(xc*yc), cumsum(yc*yc)
+	if n - min_points + 1 <= num_lengths:
+		lengths = np.arange(min_points, n + 1)
+	else:
+		lengths = np.unique(np.linspace(min_points, n, num_lengths).astype(int))
+	all_starts, all_lengths, all_slopes, all_intercepts, all_rsq = [], [], [], [], []
+	for length in lengths:
+		starts = np.arange(n - length + 1)
+		ends = starts + length
+		wx, wy = sx[ends] - sx[starts], sy[ends] - sy[starts]
+		cxx = sxx[ends] - sxx[starts] - wx**2 / length
+		cxy = sxy[ends] - sxy[starts] - wx * wy / length
+		cyy = syy[ends] - syy[starts] - wy**2 / length
+		with np.errstate(divide='ignore', invalid='ignore'):
+			slope = cxy / cxx
+			rsq = cxy**2 / (cxx * cyy)
+			intercept = (wy / length + y_mean) - slope * (wx / length + x_mean)
+		all_starts.append(starts)
+		all_lengths.append(np.full(len(starts), length))
+		all_slopes.append(slope)
+		all_intercepts.append(intercept)
+		all_rsq.append(rsq)
+	starts = np.concatenate(all_starts)
+	lengths = np.concatenate(all_lengths)
+	slopes = np.concatenate(all_slopes)
+	intercepts = np.concatenate(all_intercepts)
+	rsq = np.concatenate(all_rsq)
+	exchg_currs = exchange_current(slopes, intercepts)
+	# windows which are nearly flat give no usable exchange current, so they are not candidates
+	valid = np.isfinite(rsq) & np.isfinite(slopes) & np.isfinite(exchg_currs)
+	linear = valid & (rsq >= min_rsq)
+	if np.any(linear):
+		order = np.flatnonzero(linear)
+		order = order[np.lexsort((-rsq[order], -lengths[order]))]
+	else:
+		order = np.flatnonzero(valid)
+		order = order[np.argsort(-rsq[order], kind='stable')]
+	selected = []
+	while len(order) > 0 and len(selected) < max_candidates:
+		best = order[0]
+		selected.append(best)
+		overlap = np.minimum(starts[order] + lengths[order], starts[best] + lengths[best]) - np.maximum(starts[order], starts[best])
+		order = order[overlap <= 0.5 * np.minimum(lengths[order], lengths[best])]
+	selected = np.asarray(selected, dtype=int)
+	sel_starts, sel_ends = starts[selected], starts[selected] + lengths[selected]
+	candidates = pd.DataFrame({
+		'start':positions[sel_starts] if len(selected) > 0 else np.empty(0, dtype=int),
+		'end':positions[sel_ends - 1] + 1 if len(selected) > 0 else np.empty(0, dtype=int),
+		'min_curr':[x[s:e].min() for s, e in zip(sel_starts, sel_ends)],
+		'max_curr':[x[s:e].max() for s, e in zip(sel_starts, sel_ends)],
+		'slope':slopes[selected],
+		'exchg_curr':exchg_currs[selected],
+		'rsq':rsq[selected],
+		'points':lengths[selected]}, columns=columns)
+	return candidates
+
 def tafel_eqn(log_curr, exchg_curr, slope):
 	eta = slope * (log_curr - np.log10(exchg_curr))
 	return eta
 
 ### hfr analysis ###
-def fit_eis_semicircle(real, imag):
-	try:
-		rguess = max(imag) / 2
-		hguess = np.mean(real)
-		popt, pcov = curve_fit(semicircle, real, imag, maxfev=50000)
-		r = popt[0]
-		h = popt[1]
-	except RuntimeError as e:
+@profiling.stage()
+def fit_eis_semicircle(real, imag, p0=None):
+	"""
+	Fits a semicircle to a single impedance spectrum
+
+	Nonlinear least-squares fit of semicircle to the spectrum, seeded with the algebraic circle fit from fit_circles (or with p0, if given). Only if the seeded fit fails or does not improve on its initial guess is the fit run again without an initial guess, and whichever of the two fits and the initial guess itself has the lowest sum of squared residuals is returned. Residuals are computed with the square root argument clipped at 0, so points outside the span of a circle count against it rather than producing NaN.
+
+	Parameters
+	___________
+	real: list or numpy array
+		Real component of the impedance
+	imag: list or numpy array
+		Imaginary component of the impedance
+	p0: array-like (default=None)
+		Initial guess for the radius, x-coordinate, and y-coordinate of the center of the circle (r, h, k). If unspecified, the result of fit_circles is used.
+
+	Returns
+	________
+	popt: numpy array
+		Optimal values of (r, h, k), or (0,0,0) if no fit succeeded and there is no usable initial guess.
+	hfr: float
+		High frequency resistance, h - r
+	lfr: float
+		Low frequency resistance. Not yet implemented, always 0.
+	"""
+	real = np.asarray(real, dtype=float)
+	imag = np.asarray(imag, dtype=float)
+	if p0 is None:
+		popt, _ = fit_circles(real, imag)
+		p0 = popt[0]
+	p0 = np.asarray(p0, dtype=float)
+	candidates = {}
+	errors = {}
+	if np.all(np.isfinite(p0)):
+		candidates['algebraic'] = p0
+		candidates['seeded'] = _fit_semicircle(real, imag, p0)
+	for name, popt in candidates.items():
+		if popt is not None:
+			errors[name] = _semicircle_sse(popt, real, imag)
+	if 'seeded' not in errors or not errors['seeded'] < errors['algebraic']:
+		# the seeded fit usually converges in a handful of iterations; the much slower unseeded fit is only needed when it is stuck
+		popt = _fit_semicircle(real, imag, None)
+		if popt is not None:
+			candidates['unseeded'] = popt
+			errors['unseeded'] = _semicircle_sse(popt, real, imag)
+	if not errors:
+		_log.warning('Unable to fit a semicircle to the impedance spectrum')
 		return (0,0,0), 0, 0
+	if list(errors) == ['algebraic']:
+		_log.warning('Nonlinear semicircle fit failed; using the algebraic circle fit')
+	best = min(errors, key=errors.get)
+	popt = candidates[best]
+	# semicircle depends only on r**2, so the sign of the fitted radius is arbitrary
+	popt = np.array([np.abs(popt[0]), popt[1], popt[2]])
+	r = popt[0]
+	h = popt[1]
 	# hfr = -1*np.sqrt(r**2 - k**2) + h
 	hfr=h-r
 	lfr = 0
 	return popt, hfr, lfr
 
+def _semicircle_clipped(x, r, h, k):
+	# semicircle, but equal to k outside [h-r, h+r] instead of NaN, so residuals of any circle are finite
+	return np.sqrt(np.clip(r**2 - (np.asarray(x)-h)**2, 0, None)) + k
+
+def _semicircle_sse(popt, real, imag):
+	return np.sum((_semicircle_clipped(real, *popt) - imag)**2)
+
+def _fit_semicircle(real, imag, p0):
+	# nonlinear fit with or without an initial guess; None if it fails to converge
+	from scipy.optimize import curve_fit
+	try:
+		popt, pcov = curve_fit(semicircle, real, imag, p0=p0, maxfev=50000)
+	except (RuntimeError, ValueError, TypeError):
+		return None
+	if not np.all(np.isfinite(popt)):
+		return None
+	return popt
+
+@profiling.stage()
+def fit_circles(real, imag, split_pts=None, refine=3):
+	"""
+	Fits circles to any number of impedance spectra at once
+
+	Algebraic (Kasa) least-squares circle fit. For each spectrum, x**2 + y**2 + D*x + E*y + F = 0 is fit by linear least squares; the 3x3 normal equations of all spectra are assembled with np.add.reduceat and solved in a single batched call to np.linalg.solve. The algebraic solution can optionally be polished with a few Gauss-Newton iterations on the geometric distance to the circle, which are batched in the same way.
+
+	Parameters
+	___________
+	real: list or numpy array
+		Real component of the impedance of all spectra, concatenated
+	imag: list or numpy array
+		Imaginary component of the impedance of all spectra, concatenated
+	split_pts: array-like (default=None)
+		Indices at which each new spectrum starts, excluding 0 (as used by np.split). If unspecified, real and imag are treated as a single spectrum.
+	refine: int (default=3)
+		Number of Gauss-Newton iterations used to polish the algebraic fit. If 0, the algebraic fit is returned as is.
+
+	Returns
+	________
+	popt: numpy array
+		Array of shape (number of spectra, 3) containing the radius, x-coordinate, and y-coordinate of the center of each circle (r, h, k), ie the parameters of semicircle. Rows of spectra which could not be fit (fewer than 3 points or collinear points) are nan.
+	hfr: numpy array
+		High frequency resistance of each spectrum, h - r
+	"""
+	x = np.asarray(real, dtype=float)
+	y = np.asarray(imag, dtype=float)
+	n = len(x)
+	if split_pts is None:
+		split_pts = []
+	split_pts = np.asarray(split_pts, dtype=int)
+	starts = np.concatenate(([0], split_pts))
+	counts = np.diff(np.concatenate((starts, [n])))
+	popt = np.full((len(starts), 3), np.nan)
+	valid = counts >= 3
+	if not np.any(valid):
+		return popt, popt[:,1] - popt[:,0]
+	# drop spectra too short to fit and any empty segments, which reduceat cannot handle
+	keep = np.repeat(valid, counts)
+	x, y = x[keep], y[keep]
+	counts = counts[valid]
+	offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+	seg = lambda vals: np.add.reduceat(vals, offsets)
+	# center the data of each spectrum to keep the normal equations well conditioned
+	xm = np.repeat(seg(x) / counts, counts)
+	ym = np.repeat(seg(y) / counts, counts)
+	u, v = x - xm, y - ym
+	z = u**2 + v**2
+	suu, svv, suv = seg(u*u), seg(v*v), seg(u*v)
+	su, sv = seg(u), seg(v)
+	A = np.stack((
+		np.stack((suu, suv, su), axis=-1),
+		np.stack((suv, svv, sv), axis=-1),
+		np.stack((su, sv, counts.astype(float)), axis=-1)), axis=1)
+	b = -np.stack((seg(u*z), seg(v*z), seg(z)), axis=-1)
+	sol, ok = batch_solve(A, b)
+	hc = -sol[:,0] / 2
+	kc = -sol[:,1] / 2
+	with np.errstate(invalid='ignore'):
+		rc = np.sqrt(hc**2 + kc**2 - sol[:,2])
+	ok &= np.isfinite(rc)
+	for _ in range(refine):
+		du = u - np.repeat(hc, counts)
+		dv = v - np.repeat(kc, counts)
+		dist = np.sqrt(du**2 + dv**2)
+		dist[dist == 0] = np.finfo(float).eps
+		# jacobian of the residual dist - r with respect to (h, k, r)
+		jh, jk = -du / dist, -dv / dist
+		res = dist - np.repeat(rc, counts)
+		A = np.stack((
+			np.stack((seg(jh*jh), seg(jh*jk), -seg(jh)), axis=-1),
+			np.stack((seg(jh*jk), seg(jk*jk), -seg(jk)), axis=-1),
+			np.stack((-seg(jh), -seg(jk), counts.astype(float)), axis=-1)), axis=1)
+		b = -np.stack((seg(jh*res), seg(jk*res), -seg(res)), axis=-1)
+		step, step_ok = batch_solve(A, b)
+		step_ok &= ok
+		hc = np.where(step_ok, hc + step[:,0], hc)
+		kc = np.where(step_ok, kc + step[:,1], kc)
+		rc = np.where(step_ok, rc + step[:,2], rc)
+	rc = np.abs(rc)
+	fitted = np.stack((rc, hc + xm[offsets], kc + ym[offsets]), axis=-1)
+	fitted[~ok] = np.nan
+	popt[valid] = fitted
+	hfr = popt[:,1] - popt[:,0]
+	return popt, hfr
+
+def batch_solve(A, b):
+	"""
+	Solves a stack of small linear systems
+
+	Systems which are singular are replaced with the identity before solving so a single bad system does not prevent the rest from being solved.
+
+	Parameters
+	___________
+	A: numpy array
+		Array of shape (n, m, m) containing the coefficient matrices
+	b: numpy array
+		Array of shape (n, m) containing the right-hand sides
+
+	Returns
+	________
+	sol: numpy array
+		Array of shape (n, m) containing the solutions. Solutions of singular systems are nan.
+	ok: numpy array
+		Boolean array of shape (n,) which is False for singular systems
+	"""
+	m = A.shape[-1]
+	ok = np.all(np.isfinite(A), axis=(1,2)) & np.all(np.isfinite(b), axis=1)
+	A = np.where(ok[:,None,None], A, np.eye(m))
+	with np.errstate(invalid='ignore', divide='ignore'):
+		cond = np.linalg.cond(A)
+	ok &= np.isfinite(cond) & (cond < 1 / np.finfo(float).eps)
+	A = np.where(ok[:,None,None], A, np.eye(m))
+	b = np.where(ok[:,None], b, 0)
+	sol = np.linalg.solve(A, b[...,None])[...,0]
+	sol[~ok] = np.nan
+	return sol, ok
+
+@profiling.stage()
 def fit_eis_linear(real, imag):
-	slopes = []
-	first_real, first_imag = real[0], imag[0]
-	for x, y in zip(real[1:], imag[1:]):
-		this_slope = np.abs((y-first_imag) / (x-first_real))
-		slopes.append(this_slope)
-	slopes = np.asarray(slopes)
-	idx = np.where(slopes == max(slopes))[0][0]
+	real, imag = np.asarray(real), np.asarray(imag)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		slopes = np.abs((imag[1:] - imag[0]) / (real[1:] - real[0]))
+	idx = np.argmax(slopes)
 	real_trim, imag_trim = real[:idx], imag[:idx]
+	from scipy import stats
 	try:
 		m, b, _, _, _ = stats.linregress(real_trim, imag_trim)
 		popt = (m,b)
@@ -672,10 +1714,13 @@ def overpotential_correct(arr, rxn=0):
 		corrected = corrected - rxn
 	return corrected
 
-def find_col(data, col_type, label=None):
+@profiling.stage()
+def find_col(data, col_type, label=None, col_index=None):
 	"""
 	Finds column containing the desired measurement
 
+	The column is located with find_col_id and returned without copying the DataFrame. Passing a precomputed col_index (see Datum.get_raw_index and Datum.get_processed_index) skips parsing the column labels altogether.
+
 	Parameters
 	___________
 	data: DataFrame
@@ -684,27 +1729,53 @@ def find_col(data, col_type, label=None):
 		Type of data being searched for
 	label: str or int (default=None)
 		Label or index of the desired column if the column label cannot be automatically parsed
+	col_index: dict (default=None)
+		Column index of data generated by utils.build_col_index. If unspecified, it is built from the column labels of data.
 
 	Returns
 	________
 	col: numpy array
 		Array of the desired measurement values
 	"""
+	col_id = find_col_id(data, col_type, label, col_index)
+	col = data.iloc[:, col_id].to_numpy()
+	return col
+
+def find_col_id(data, col_type, label=None, col_index=None):
+	"""
+	Finds the position of the column containing the desired measurement
+
+	Only the column labels are used, so this can be used with an empty DataFrame containing just the header of a file.
+
+	Parameters
+	___________
+	data: DataFrame
+		DataFrame whose column labels are searched
+	col_type: one of {'current', 'potential', 'time', 'current_err', 'potential_err', 'overpotential', 'tafelcurrent', 'realcurr', 'imagcurr'}
+		Type of data being searched for
+	label: str or int (default=None)
+		Label or index of the desired column if the column label cannot be automatically parsed
+	col_index: dict (default=None)
+		Column index of data generated by utils.build_col_index. If unspecified, it is built from the column labels of data.
+
+	Returns
+	________
+	col_id: int
+		Index of the desired column
+	"""
+	if col_index is None:
+		col_index = utils.build_col_index(data)
 	default_label = col_default_labels[col_type]
-	default_id = col_default_ids[col_type]
-	newdf = data.copy()
-	newdf.columns = utils.check_labels(newdf)
-	if default_label in newdf.columns:
-		col = newdf[default_label]
+	if default_label in col_index:
+		col_id = col_index[default_label]
 	elif label:
 		if utils.check_str(label):
-			col = newdf[label]
+			col_id = col_index[label]
 		else:
-			col = newdf.iloc[:,label]
+			col_id = label
 	else:
-		col = newdf.iloc[:, default_id]
-	col = np.asarray(col)
-	return col
+		col_id = col_default_ids[col_type]
+	return col_id
 
 ### auxilliary array manipulation functions ###
 def set_datum_params(data, area, ref, rxn):
@@ -716,36 +1787,77 @@ def set_datum_params(data, area, ref, rxn):
 		rxn = thermo_potentials[rxn]
 	data.set_thermo_potential(rxn)
 
-def split_at_zeros(xvals, yvals):
-	final_x, final_y = [], []
-	this_x, this_y = [], []
-	for x, y in zip(xvals, yvals):
-		if x!=0 or y!=0:
-			this_x.append(x)
-			this_y.append(y)
-		else:
-			if len(this_x) != 0:
-				final_x.append(this_x)
-				final_y.append(this_y)
-			this_x = []
-			this_y = []
-	if len(this_x) != 0:
-		final_x.append(this_x)
-		final_y.append(this_y)
+@profiling.stage()
+def split_at_zeros(xvals, yvals, return_bounds=False):
+	"""
+	Splits concatenated spectra at points where both values are zero
+
+	Points where both xvals and yvals are 0 separate consecutive spectra. The boundaries of the spectra are located with a single mask over the full arrays.
+
+	Parameters
+	___________
+	xvals: list or numpy array
+		Array of x values of all spectra
+	yvals: list or numpy array
+		Array of y values of all spectra
+	return_bounds: bool (default=False)
+		If True, the start and end indices of each spectrum are returned instead of the spectra themselves
+
+	Returns
+	________
+	final_x, final_y: lists of numpy arrays
+		x and y values of each spectrum. These are views into xvals and yvals if they are numpy arrays. Returned if return_bounds=False.
+	starts, ends: numpy arrays
+		Start (inclusive) and end (exclusive) index of each spectrum. Returned if return_bounds=True.
+	"""
+	xvals = np.asarray(xvals)
+	yvals = np.asarray(yvals)
+	nonzero = ((xvals != 0) | (yvals != 0)).astype(np.int8)
+	edges = np.diff(np.concatenate(([0], nonzero, [0])))
+	starts = np.flatnonzero(edges == 1)
+	ends = np.flatnonzero(edges == -1)
+	if return_bounds:
+		return starts, ends
+	final_x = [xvals[s:e] for s, e in zip(starts, ends)]
+	final_y = [yvals[s:e] for s, e in zip(starts, ends)]
 	return final_x, final_y
 
-def drop_neg(xvals, yvals):
+@profiling.stage()
+def drop_neg(xvals, yvals, bounds=None):
 	"""
-	Appli
+	Removes points where either value is negative
+
+	Parameters
+	___________
+	xvals: list of arrays or numpy array
+		x values of each spectrum, as returned by split_at_zeros. If bounds is specified, the full array of x values.
+	yvals: list of arrays or numpy array
+		y values of each spectrum, as returned by split_at_zeros. If bounds is specified, the full array of y values.
+	bounds: tuple of numpy arrays (default=None)
+		Start and end indices of each spectrum as returned by split_at_zeros(..., return_bounds=True). If specified, only the bounds of spectra containing at least one non-negative point are returned and no values are copied.
+
+	Returns
+	________
+	final_x, final_y: lists of numpy arrays
+		Non-negative points of each spectrum. Spectra with no non-negative points are dropped. Returned if bounds is unspecified.
+	starts, ends: numpy arrays
+		Start and end indices of the remaining spectra. Returned if bounds is specified.
 	"""
+	if bounds is not None:
+		starts, ends = bounds
+		xvals = np.asarray(xvals)
+		yvals = np.asarray(yvals)
+		nonneg = (xvals >= 0) & (yvals >= 0)
+		cumulative = np.concatenate(([0], np.cumsum(nonneg)))
+		keep = cumulative[ends] - cumulative[starts] > 0
+		return starts[keep], ends[keep]
 	final_x, final_y = [],[]
-	this_x, this_y = [],[]
 	for x, y in zip(xvals, yvals):
-		this_x = [i for i,j in zip(x,y) if i>=0 and j>=0]
-		this_y = [j for i,j in zip(x,y) if i>=0 and j>=0]
-		if len(this_x) != 0:
-			final_x.append(this_x)
-			final_y.append(this_y)
+		x, y = np.asarray(x), np.asarray(y)
+		mask = (x >= 0) & (y >= 0)
+		if np.any(mask):
+			final_x.append(x[mask])
+			final_y.append(y[mask])
 	return final_x, final_y
 
 def array_apply(arr, func, **kwargs):
@@ -836,6 +1948,60 @@ def std_agg(arr):
 	sd = np.sqrt(np.sum(arr**2))
 	return sd
 
+@profiling.stage()
+def step_stats(arr, split_pts, numpts=300, min_length=0):
+	"""
+	Steady-state statistics of every step in a single vectorized pass
+
+	Equivalent to calling split_and_filter followed by avg_last_pts and std_last_pts on each step, but without splitting the array or looping over the steps in Python. The last numpts points of every step are gathered with a single index array, and the sums needed for the mean and standard deviation of all steps are computed with np.add.reduceat. If arr is two-dimensional, every column is reduced using the same steps.
+
+	Parameters
+	___________
+	arr: list or numpy array
+		Array of values, or a two-dimensional array with one column per variable
+	split_pts: array-like
+		Indices at which the array steps up or down, as returned by find_steps
+	numpts: int (default=300)
+		Average and standard deviation are calculated using the last numpts values of each step. If 0, all values of each step are used.
+	min_length: int (default=0)
+		Steps with min_length points or fewer are discarded
+
+	Returns
+	________
+	avg: numpy array
+		Average of the last numpts values of each remaining step
+	sd: numpy array
+		Standard deviation (ddof=1) of the last numpts values of each remaining step. Steps containing a single point have a standard deviation of nan.
+	counts: numpy array
+		Total number of points in each remaining step
+	"""
+	arr = np.asarray(arr, dtype=float)
+	n = arr.shape[0]
+	split_pts = np.asarray(split_pts, dtype=int)
+	starts = np.concatenate(([0], split_pts))
+	ends = np.concatenate((split_pts, [n]))
+	counts = ends - starts
+	keep = counts > min_length
+	starts, ends, counts = starts[keep], ends[keep], counts[keep]
+	if len(counts) == 0:
+		empty = np.empty((0,) + arr.shape[1:])
+		return empty, empty.copy(), counts
+	if numpts:
+		win_starts = np.maximum(starts, ends - numpts)
+	else:
+		win_starts = starts
+	win_lengths = ends - win_starts
+	offsets = np.concatenate(([0], np.cumsum(win_lengths)[:-1]))
+	idx = np.repeat(win_starts - offsets, win_lengths) + np.arange(win_lengths.sum())
+	vals = arr[idx]
+	lengths = win_lengths.reshape((-1,) + (1,) * (arr.ndim - 1))
+	avg = np.add.reduceat(vals, offsets) / lengths
+	dev = vals - np.repeat(avg, win_lengths, axis=0)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		sd = np.sqrt(np.add.reduceat(dev**2, offsets) / (lengths - 1))
+	sd[win_lengths == 1] = np.nan
+	return avg, sd, counts
+
 def split_and_filter(arr, split_pts, min_length=0):
 	"""
 	Split continuous array at the specified points.
@@ -862,6 +2028,7 @@ def split_and_filter(arr, split_pts, min_length=0):
 	steps = np.asarray([s for s in steps if len(s) > min_length])
 	return steps
 
+@profiling.stage()
 def find_steps(arr, threshold=5):
 	"""
 	Find indices at which an array of roughly stepwise data changes values
@@ -0,0 +1,428 @@
+import numpy as np
+import pandas as pd
+
+from fuelcell import utils
+from fuelcell import profiling
+from fuelcell import datums
+from fuelcell.model import Datum
+
+class DatumSet():
+	"""
+	Columnar collection of many experiments
+
+	The data of all experiments is stored in a single ragged columnar layout: each column (ex. 'i', 'v', 't') is one contiguous array holding the values of every experiment back to back, and offsets[k]:offsets[k+1] is the range of rows belonging to experiment k. Experiments without a given column hold nan in its place. Per-experiment metadata (name, expt_type, area, refelec, thermo_potential, and any user-defined fields) is stored in a DataFrame with one row per experiment.
+
+	Operations such as area normalization, reference electrode correction, overpotential, log-current and step statistics run once over the whole set rather than once per experiment. Selections (see select) share the storage of the set they were taken from. Columns of a selection of consecutive experiments are returned as views; experiments are grouped by expt_type when the set is built, so selections by expt_type are always consecutive.
+
+	Use from_datums to build a set from a list of Datum objects and to_datums to convert back.
+
+	Parameters
+	___________
+	columns: dict
+		Dictionary mapping each column name to a one-dimensional array holding the values of all experiments
+	offsets: numpy array
+		Row offsets of the experiments, of length number of experiments + 1
+	meta: DataFrame
+		Metadata with one row per experiment. Must contain a 'name' column.
+	data: list of Datum (default=None)
+		Datum objects the experiments were built from, used by to_datums
+	index: numpy array (default=None)
+		Experiments included in this set. If unspecified, all experiments are included.
+	"""
+	def __init__(self, columns, offsets, meta, data=None, index=None):
+		self.columns = columns
+		self.offsets = np.asarray(offsets, dtype=np.int64)
+		self.meta = meta.reset_index(drop=True)
+		self.data = data
+		if index is None:
+			index = np.arange(len(self.meta))
+		self.index = np.asarray(index, dtype=np.int64)
+
+	@classmethod
+	def from_datums(cls, data, source='raw', sort=True):
+		"""
+		Builds a DatumSet from a list of Datum objects
+
+		Columns are located with the column index of each Datum (see utils.build_col_index), so raw data columns are stored under the standard headings ('i' for current, 'v' for potential, 't' for time, etc.). Non-numeric columns are skipped.
+
+		Parameters
+		___________
+		data: list of Datum
+			Experiments to include. Datum objects without data are skipped.
+		source: {'raw', 'processed'} (default='raw')
+			Whether to use the raw or the processed data of each Datum
+		sort: bool (default=True)
+			Whether to group the experiments by expt_type, which makes selections by expt_type return views
+
+		Returns
+		________
+		dataset: DatumSet
+			Set containing the data of all experiments
+		"""
+		frames = []
+		kept = []
+		for d in data:
+			df = d.get_raw_data(copy=False) if source == 'raw' else d.get_processed_data(copy=False)
+			if df is not None:
+				frames.append(df)
+				kept.append(d)
+		if sort:
+			order = sorted(range(len(kept)), key=lambda k: kept[k].get_expt_type() or '')
+			frames = [frames[k] for k in order]
+			kept = [kept[k] for k in order]
+		lengths = np.array([df.shape[0] for df in frames], dtype=np.int64)
+		offsets = np.concatenate(([0], np.cumsum(lengths)))
+		labels = []
+		positions = []
+		for d, df in zip(kept, frames):
+			col_index = d.get_raw_index() if source == 'raw' else d.get_processed_index()
+			pos = {label:i for label, i in col_index.items() if df.dtypes.iloc[i].kind in 'biuf'}
+			labels.extend(label for label in pos if label not in labels)
+			positions.append(pos)
+		columns = {}
+		for label in labels:
+			arr = np.full(offsets[-1], np.nan)
+			for k, (df, pos) in enumerate(zip(frames, positions)):
+				if label in pos:
+					arr[offsets[k]:offsets[k+1]] = df.iloc[:, pos[label]].to_numpy(dtype=float)
+			columns[label] = arr
+		meta = pd.DataFrame({
+			'name':[d.get_name() for d in kept],
+			'expt_type':[d.get_expt_type() for d in kept],
+			'area':[d.get_area() for d in kept],
+			'refelec':[d.get_refelec() for d in kept],
+			'thermo_potential':[d.get_thermo_potential() for d in kept],
+		})
+		return cls(columns, offsets, meta, kept)
+
+	### accessors ###
+	def __len__(self):
+		return len(self.index)
+
+	def __getitem__(self, key):
+		return DatumSet(self.columns, self.offsets, self.meta, self.data, self.index[key])
+
+	def get_names(self):
+		return list(self.meta['name'].to_numpy()[self.index])
+
+	def get_meta(self):
+		return self.meta.iloc[self.index]
+
+	def get_column_names(self):
+		return list(self.columns.keys())
+
+	def get_lengths(self):
+		return self.offsets[self.index+1] - self.offsets[self.index]
+
+	def get_offsets(self):
+		"""
+		Row offsets of the experiments of this set within the arrays returned by get_column
+		"""
+		return np.concatenate(([0], np.cumsum(self.get_lengths())))
+
+	def row_slice(self):
+		# slice of the shared arrays covering this set, or None if its experiments are not consecutive
+		if len(self.index) == 0:
+			return slice(0, 0)
+		if np.all(np.diff(self.index) == 1):
+			return slice(self.offsets[self.index[0]], self.offsets[self.index[-1]+1])
+		return None
+
+	def rows(self):
+		# indices of the rows of this set in the shared arrays
+		lengths = self.get_lengths()
+		starts = self.offsets[self.index]
+		local = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+		return np.repeat(starts - local, lengths) + np.arange(lengths.sum())
+
+	def get_column(self, name):
+		"""
+		Values of a column for all experiments of the set
+
+		Parameters
+		___________
+		name: str
+			Column name
+
+		Returns
+		________
+		values: numpy array
+			View of the shared storage if the experiments of the set are consecutive, otherwise a copy
+		"""
+		sl = self.row_slice()
+		if sl is not None:
+			return self.columns[name][sl]
+		return self.columns[name][self.rows()]
+
+	def set_column(self, name, values):
+		"""
+		Stores values of a column for all experiments of the set
+
+		The values are written into the shared storage, so they are visible from every set sharing it. New columns are created filled with nan.
+
+		Parameters
+		___________
+		name: str
+			Column name
+		values: scalar or array-like
+			New values, one per row of the set
+		"""
+		if name not in self.columns:
+			self.columns[name] = np.full(self.offsets[-1], np.nan)
+		sl = self.row_slice()
+		if sl is not None:
+			self.columns[name][sl] = values
+		else:
+			self.columns[name][self.rows()] = values
+
+	def get_experiment(self, i):
+		"""
+		Data of a single experiment
+
+		Parameters
+		___________
+		i: int
+			Position of the experiment within the set
+
+		Returns
+		________
+		data: dict
+			Dictionary mapping each column name to a view of the values of the experiment
+		"""
+		k = self.index[i]
+		sl = slice(self.offsets[k], self.offsets[k+1])
+		return {name:arr[sl] for name, arr in self.columns.items()}
+
+	def select(self, expt_type=None, name=None, **meta):
+		"""
+		Subset of the experiments, sharing the storage of this set
+
+		Parameters
+		___________
+		expt_type: str or list of str (default=None)
+			Only experiments of these types are selected
+		name: str or list of str (default=None)
+			Only experiments with these names are selected
+		**meta:
+			Only experiments whose metadata field equals the given value (or is one of the given values, if a list is given) are selected
+
+		Returns
+		________
+		dataset: DatumSet
+			Selected experiments. Their columns are views whenever the selected experiments are consecutive.
+		"""
+		filters = dict(meta)
+		if expt_type is not None:
+			filters['expt_type'] = expt_type
+		if name is not None:
+			filters['name'] = name
+		keep = np.ones(len(self.index), dtype=bool)
+		for field, value in filters.items():
+			values = self.meta[field].to_numpy()[self.index]
+			if utils.check_list(value):
+				keep &= np.isin(values, value)
+			else:
+				keep &= values == value
+		return DatumSet(self.columns, self.offsets, self.meta, self.data, self.index[keep])
+
+	def broadcast(self, values):
+		"""
+		Expands one value per experiment to one value per row
+		"""
+		values = np.asarray(values)
+		if values.ndim == 0:
+			return values
+		return np.repeat(values, self.get_lengths())
+
+	def set_meta(self, field, values):
+		self.meta.loc[self.index, field] = values
+
+	### vectorized operations ###
+	def normalize_area(self, area=None, column='i'):
+		"""
+		Converts current to current density
+
+		Parameters
+		___________
+		area: int, float, or array-like (default=None)
+			Geometric active area, either one value for all experiments or one value per experiment. If unspecified, the area stored in the metadata is used.
+		column: str (default='i')
+			Column to normalize
+		"""
+		if area is None:
+			area = self.get_meta()['area'].to_numpy(dtype=float)
+		self.set_column(column, self.get_column(column) / self.broadcast(area))
+		self.set_meta('area', area)
+
+	def electrode_correct(self, reference='she', column='v'):
+		"""
+		Corrects potential for the reference electrode
+
+		Parameters
+		___________
+		reference: {'she', 'sce'}, int, float, or array-like (default='she')
+			Reference electrode as accepted by datums.electrode_correct, either one value for all experiments or one value per experiment
+		column: str (default='v')
+			Column to correct
+		"""
+		if utils.check_list(reference) or isinstance(reference, np.ndarray):
+			shift = np.array([datums.electrode_correct(0.0, r) for r in reference], dtype=float)
+		else:
+			shift = float(datums.electrode_correct(0.0, reference))
+		self.set_column(column, self.get_column(column) + self.broadcast(shift))
+		self.set_meta('refelec', shift)
+
+	def overpotential_correct(self, thermo_potential=0, column='v', output='eta'):
+		"""
+		Calculates overpotential
+
+		Parameters
+		___________
+		thermo_potential: {'none', 'oer'}, int, float, or array-like (default=0)
+			Thermodynamic potential as accepted by datums.overpotential_correct, either one value for all experiments or one value per experiment
+		column: str (default='v')
+			Column containing potential
+		output: str (default='eta')
+			Column in which the overpotential is stored
+		"""
+		if utils.check_list(thermo_potential) or isinstance(thermo_potential, np.ndarray):
+			shift = np.array([datums.overpotential_correct(0.0, r) for r in thermo_potential], dtype=float)
+		else:
+			shift = float(datums.overpotential_correct(0.0, thermo_potential))
+		self.set_column(output, self.get_column(column) + self.broadcast(shift))
+		self.set_meta('thermo_potential', -shift)
+
+	def log_current(self, column='i', output='log(i)'):
+		"""
+		Calculates log-current in the same way as lsv_process
+
+		The minimum current of each experiment is subtracted before taking the logarithm, so the minimum of each experiment is found with a single np.minimum.reduceat over the whole set.
+
+		Parameters
+		___________
+		column: str (default='i')
+			Column containing current
+		output: str (default='log(i)')
+			Column in which the log-current is stored
+		"""
+		current = self.get_column(column)
+		lengths = self.get_lengths()
+		mins = np.full(len(lengths), np.nan)
+		nonempty = lengths > 0
+		if nonempty.any():
+			starts = self.get_offsets()[:-1][nonempty]
+			mins[nonempty] = np.minimum.reduceat(current, starts)
+		self.set_column(output, np.log10(current - self.broadcast(mins) + 0.000001))
+
+	@profiling.stage(name='datumset.step_stats')
+	def step_stats(self, control='i', response='v', threshold=5, min_step_length=25, pts_to_average=300):
+		"""
+		Steady-state statistics of every step of every experiment
+
+		Steps are found with a single call to datums.find_steps over the whole set, with additional splits at the boundaries between experiments, and reduced with a single call to datums.step_stats.
+
+		Parameters
+		___________
+		control: str (default='i')
+			Column containing the control variable
+		response: str (default='v')
+			Column containing the response variable
+		threshold, min_step_length, pts_to_average:
+			See datums.process_steps
+
+		Returns
+		________
+		steps: DataFrame
+			One row per step, with the columns experiment (position within the set), control_avg, response_avg, control_std, response_std, and points
+		"""
+		ctrl = self.get_column(control)
+		resp = self.get_column(response)
+		offsets = self.get_offsets()
+		split_pts = np.union1d(datums.find_steps(ctrl, threshold), offsets[1:-1]).astype(int)
+		avg, sd, counts = datums.step_stats(np.column_stack((ctrl, resp)), split_pts, pts_to_average, min_step_length)
+		starts = np.concatenate(([0], split_pts))
+		all_counts = np.diff(np.concatenate((starts, [len(ctrl)])))
+		starts = starts[all_counts > min_step_length]
+		experiment = np.searchsorted(offsets, starts, side='right') - 1
+		return pd.DataFrame({'experiment':experiment, 'control_avg':avg[:,0], 'response_avg':avg[:,1], 'control_std':sd[:,0], 'response_std':sd[:,1], 'points':counts})
+
+	@profiling.stage(name='datumset.process_steps')
+	def process_steps(self, expt_type='cp', threshold=5, min_step_length=25, pts_to_average=300, pyramid=True, area=5, reference='she', thermo_potential=0):
+		"""
+		Processes stepwise (CP or CA) experiments
+
+		Equivalent to calling datums.process_steps on each experiment. Step statistics are computed once for the whole set (see step_stats); only the combination of the ramp-up and ramp-down holds of each experiment, which involves a handful of values per experiment, is done separately.
+
+		Parameters
+		___________
+		expt_type: {'cp', 'ca'} (default='cp')
+			Type of the experiments
+		threshold, min_step_length, pts_to_average, pyramid, area, reference, thermo_potential:
+			See datums.process_steps
+
+		Returns
+		________
+		processed: DatumSet
+			Set with one row per steady-state step and the columns of the output of datums.process_steps
+		"""
+		if expt_type == 'ca':
+			control, response = 'v', 'i'
+		else:
+			control, response = 'i', 'v'
+		steps = self.step_stats(control, response, threshold, min_step_length, pts_to_average)
+		frames = []
+		for k in range(len(self)):
+			s = steps[steps['experiment'].to_numpy() == k]
+			frames.append(datums.finalize_steps(s['control_avg'].to_numpy(), s['response_avg'].to_numpy(), s['control_std'].to_numpy(), s['response_std'].to_numpy(), pyramid, expt_type, area, reference, thermo_potential))
+		lengths = np.array([len(f) for f in frames], dtype=np.int64)
+		offsets = np.concatenate(([0], np.cumsum(lengths)))
+		names = ['i', 'v', 'i_sd', 'v_sd', 'eta']
+		columns = {c:np.concatenate([f[c].to_numpy(dtype=float) for f in frames]) if frames else np.empty(0) for c in names}
+		meta = self.get_meta().reset_index(drop=True)
+		data = [self.data[k] for k in self.index] if self.data is not None else None
+		processed = DatumSet(columns, offsets, meta, data)
+		processed.set_meta('area', area)
+		processed.set_meta('refelec', float(datums.electrode_correct(0.0, reference)))
+		processed.set_meta('thermo_potential', -float(datums.overpotential_correct(0.0, thermo_potential)))
+		return processed
+
+	def to_datums(self, processed=True):
+		"""
+		Converts the set to Datum objects
+
+		Parameters
+		___________
+		processed: bool (default=True)
+			If True, the Datum objects the set was built from are updated, with the columns of the set stored as their processed data. If False, new Datum objects holding the columns as raw data are returned.
+
+		Returns
+		________
+		data: list of Datum
+			One Datum per experiment
+		"""
+		meta = self.get_meta()
+		result = []
+		for i, k in enumerate(self.index):
+			cols = {name:values.copy() for name, values in self.get_experiment(i).items() if not np.all(np.isnan(values))}
+			df = pd.DataFrame(cols)
+			row = meta.iloc[i]
+			if processed and self.data is not None:
+				d = self.data[k]
+				d.set_processed_data(df)
+				if 'i' in df:
+					d.set_current_data(df['i'])
+				if 'v' in df:
+					d.set_potential_data(df['v'])
+				if 'eta' in df:
+					d.set_overpotential_data(df['eta'])
+				if 'log(i)' in df:
+					d.set_logcurrent_data(df['log(i)'])
+			else:
+				d = Datum(row['name'], df)
+				if row['expt_type']:
+					d.set_expt_type(row['expt_type'])
+			d.set_area(row['area'])
+			d.set_refelec(row['refelec'])
+			d.set_thermo_potential(row['thermo_potential'])
+			result.append(d)
+		return result
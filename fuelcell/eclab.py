@@ -0,0 +1,245 @@
+import numpy as np
+import pandas as pd
+import logging
+
+from fuelcell import profiling
+
+_log = logging.getLogger(__name__)
+
+mpr_magic = b'BIO-LOGIC MODULAR FILE\x1a' + b' ' * 25 + b'\x00' * 4
+module_magic = b'MODULE'
+module_hdr = np.dtype([('shortname', 'S10'), ('longname', 'S25'), ('length', '<u4'), ('version', '<u4'), ('date', 'S8')])
+# newer files mark the header with 0xffffffff in place of the length and store the real length after it
+module_hdr_v2 = np.dtype([('shortname', 'S10'), ('longname', 'S25'), ('max_length', '<u4'), ('length', '<u4'), ('version', '<u4'), ('unknown', '<u4'), ('date', 'S8')])
+data_module_name = b'VMP data'
+
+# column ids of the data module, mapped to the label used in EC-Lab text exports and the binary type of the column
+column_types = {
+	4:('time/s', '<f8'),
+	5:('control/V/mA', '<f4'),
+	6:('Ewe/V', '<f4'),
+	7:('dq/mA.h', '<f8'),
+	8:('I/mA', '<f4'),
+	9:('Ece/V', '<f4'),
+	11:('<I>/mA', '<f8'),
+	13:('(Q-Qo)/mA.h', '<f8'),
+	16:('Analog IN 1/V', '<f4'),
+	19:('control/V', '<f4'),
+	20:('control/mA', '<f4'),
+	23:('dQ/mA.h', '<f8'),
+	24:('cycle number', '<f8'),
+	26:('Rapp/Ohm', '<f4'),
+	27:('Ewe-Ece/V', '<f4'),
+	32:('freq/Hz', '<f4'),
+	33:('|Ewe|/V', '<f4'),
+	34:('|I|/A', '<f4'),
+	35:('Phase(Z)/deg', '<f4'),
+	36:('|Z|/Ohm', '<f4'),
+	37:('Re(Z)/Ohm', '<f4'),
+	38:('-Im(Z)/Ohm', '<f4'),
+	39:('I Range', '<u2'),
+	69:('R/Ohm', '<f4'),
+	70:('P/W', '<f4'),
+	74:('|Energy|/W.h', '<f8'),
+	75:('Analog OUT/V', '<f4'),
+	76:('<I>/mA', '<f4'),
+	77:('<Ewe>/V', '<f4'),
+	78:('Cs-2/µF-2', '<f4'),
+	96:('|Ece|/V', '<f4'),
+	98:('Phase(Zce)/deg', '<f4'),
+	99:('|Zce|/Ohm', '<f4'),
+	100:('Re(Zce)/Ohm', '<f4'),
+	101:('-Im(Zce)/Ohm', '<f4'),
+	123:('Energy charge/W.h', '<f8'),
+	124:('Energy discharge/W.h', '<f8'),
+	125:('Capacitance charge/µF', '<f8'),
+	126:('Capacitance discharge/µF', '<f8'),
+	131:('Ns', '<u2'),
+	163:('|Estack|/V', '<f4'),
+	168:('Rcmp/Ohm', '<f4'),
+	169:('Cs/µF', '<f4'),
+	172:('Cp/µF', '<f4'),
+	173:('Cp-2/µF-2', '<f4'),
+	174:('<Ewe>/V', '<f4'),
+	241:('|E1|/V', '<f4'),
+	242:('|E2|/V', '<f4'),
+	271:('Phase(Z1) / deg', '<f4'),
+	272:('Phase(Z2) / deg', '<f4'),
+	301:('|Z1|/Ohm', '<f4'),
+	302:('|Z2|/Ohm', '<f4'),
+	326:('P/W', '<f4'),
+	331:('Re(Z1)/Ohm', '<f4'),
+	332:('Re(Z2)/Ohm', '<f4'),
+	361:('-Im(Z1)/Ohm', '<f4'),
+	362:('-Im(Z2)/Ohm', '<f4'),
+	391:('<E1>/V', '<f4'),
+	392:('<E2>/V', '<f4'),
+	422:('Phase(Zstack)/deg', '<f4'),
+	423:('|Zstack|/Ohm', '<f4'),
+	424:('Re(Zstack)/Ohm', '<f4'),
+	425:('-Im(Zstack)/Ohm', '<f4'),
+	426:('<Estack>/V', '<f4'),
+	430:('Phase(Zwe-ce)/deg', '<f4'),
+	431:('|Zwe-ce|/Ohm', '<f4'),
+	432:('Re(Zwe-ce)/Ohm', '<f4'),
+	433:('-Im(Zwe-ce)/Ohm', '<f4'),
+	434:('(Q-Qo)/C', '<f4'),
+	435:('dQ/C', '<f4'),
+	441:('<Ecv>/V', '<f4'),
+	462:('Temperature/°C', '<f4'),
+	467:('Q charge/discharge/mA.h', '<f8'),
+	468:('half cycle', '<u4'),
+	469:('z cycle', '<u4'),
+	471:('<Ece>/V', '<f4'),
+	473:('THD Ewe/%', '<f4'),
+	474:('THD I/%', '<f4'),
+	476:('NSD Ewe/%', '<f4'),
+	477:('NSD I/%', '<f4'),
+	479:('NSR Ewe/%', '<f4'),
+	480:('NSR I/%', '<f4'),
+}
+# column ids stored as bits of a single shared flags byte, mapped to (label, bit mask)
+flag_types = {
+	1:('mode', 0x03),
+	2:('ox/red', 0x04),
+	3:('error', 0x08),
+	21:('control changes', 0x10),
+	31:('Ns changes', 0x20),
+	65:('counter inc.', 0x80),
+}
+
+def read_modules(buf):
+	"""
+	Reads the module headers of an EC-Lab binary file
+
+	Module contents are not copied; each module is described by the offset and length of its contents in buf.
+
+	Parameters
+	___________
+	buf: bytes-like or numpy array of uint8
+		Contents of the file
+
+	Returns
+	________
+	modules: list of dict
+		Header fields of each module (shortname, longname, length, version, date) along with the offset of its contents in buf
+	"""
+	buf = memoryview(buf).cast('B')
+	if bytes(buf[:len(mpr_magic)]) != mpr_magic:
+		raise ValueError('Not an EC-Lab binary (.mpr) file')
+	pos = len(mpr_magic)
+	modules = []
+	while pos < len(buf):
+		if bytes(buf[pos:pos+len(module_magic)]) != module_magic:
+			raise ValueError(f'Expected module header at byte {pos}')
+		pos += len(module_magic)
+		if bytes(buf[pos+35:pos+39]) == b'\xff\xff\xff\xff':
+			dtype = module_hdr_v2
+		else:
+			dtype = module_hdr
+		if pos + dtype.itemsize > len(buf):
+			raise ValueError('Unexpected end of file in module header')
+		hdr = np.frombuffer(buf, dtype=dtype, count=1, offset=pos)[0]
+		pos += dtype.itemsize
+		module = {name:hdr[name] for name in module_hdr.names}
+		module['shortname'] = module['shortname'].strip()
+		module['longname'] = module['longname'].strip()
+		module['length'] = int(module['length'])
+		module['version'] = int(module['version'])
+		module['offset'] = pos
+		modules.append(module)
+		pos += module['length']
+	return modules
+
+def column_dtype(col_ids):
+	"""
+	Builds the record type of the data module from its column ids
+
+	Flag columns share a single byte, located at the position of the first flag column. Repeated labels are numbered to keep column names unique.
+
+	Parameters
+	___________
+	col_ids: array-like of int
+		Column ids listed in the data module
+
+	Returns
+	________
+	dtype: numpy dtype
+		Structured type of one data point
+	flags: dict
+		Dictionary mapping the label of each flag column to its bit mask in the 'flags' field
+	"""
+	fields = []
+	flags = {}
+	counts = {}
+	for col_id in col_ids:
+		col_id = int(col_id)
+		if col_id in flag_types:
+			if 'flags' not in counts:
+				fields.append(('flags', 'u1'))
+				counts['flags'] = 1
+			name, mask = flag_types[col_id]
+			flags[name] = mask
+		elif col_id in column_types:
+			name, kind = column_types[col_id]
+			counts[name] = counts.get(name, 0) + 1
+			if counts[name] > 1:
+				name = f'{name} {counts[name]}'
+			fields.append((name, kind))
+		else:
+			raise ValueError(f'Unknown EC-Lab column id {col_id}')
+	return np.dtype(fields), flags
+
+@profiling.stage()
+def read_mpr(filename):
+	"""
+	Loads the data stored in an EC-Lab binary (.mpr) file
+
+	The file is memory mapped and the data module is decoded in place as a structured array with np.frombuffer, so no text parsing takes place. Each column is then copied once into a contiguous float64 column of the returned DataFrame. Columns are labeled as in EC-Lab text exports (ex. 'Ewe/V', '<I>/mA', 'Re(Z)/Ohm'), so the returned data can be processed in the same way as loaded text files. Flag columns (mode, ox/red, error, etc.) are unpacked from the shared flags byte.
+
+	Parameters
+	___________
+	filename: str, path object, or path-like
+		Complete path to the .mpr file
+
+	Returns
+	________
+	data: DataFrame
+		Data stored in the file, with one column per EC-Lab column
+	"""
+	mm = np.memmap(filename, dtype=np.uint8, mode='r')
+	try:
+		modules = read_modules(mm)
+		data_modules = [m for m in modules if m['shortname'] == data_module_name]
+		if not data_modules:
+			raise ValueError('No data module found')
+		module = data_modules[0]
+		start = module['offset']
+		num_points = int(np.frombuffer(mm, dtype='<u4', count=1, offset=start)[0])
+		num_cols = int(mm[start+4])
+		if module['version'] == 0:
+			col_ids = np.frombuffer(mm, dtype='u1', count=num_cols, offset=start+5)
+			data_start = start + 100
+		elif module['version'] in (2, 3):
+			col_ids = np.frombuffer(mm, dtype='<u2', count=num_cols, offset=start+5)
+			data_start = start + (406 if module['version'] == 3 else 405)
+		else:
+			raise ValueError(f'Unsupported data module version {module["version"]}')
+		dtype, flags = column_dtype(col_ids)
+		available = (start + module['length'] - data_start) // dtype.itemsize
+		if available < num_points:
+			_log.warning(f'{filename}: expected {num_points} points but found {available}')
+			num_points = available
+		records = np.frombuffer(mm, dtype=dtype, count=num_points, offset=data_start)
+		columns = {}
+		for name in dtype.names:
+			if name == 'flags':
+				for flag, mask in flags.items():
+					shift = (mask & -mask).bit_length() - 1
+					columns[flag] = ((records['flags'] & mask) >> shift).astype(np.float64)
+			else:
+				columns[name] = records[name].astype(np.float64)
+		data = pd.DataFrame(columns)
+	finally:
+		del mm
+	return data
@@ -4,14 +4,77 @@ import os
 import re
 import fuelcell as fc
 
+def read_only(data):
+	"""
+	Returns a read-only version of data which shares its memory wherever possible
+
+	Datum accessors return views of the stored values rather than copies, so the stored values are protected against accidental in-place modification instead. The object passed in is never modified and remains writeable. Operations which produce new arrays or DataFrames are unaffected; use .copy() to obtain a modifiable copy.
+
+	Parameters
+	___________
+	data: DataFrame, Series, array-like, or None
+		Data to protect
+
+	Returns
+	________
+	data: DataFrame or numpy array
+		DataFrames are returned as a new DataFrame with the same index and columns. If all columns share one dtype it is backed by a read-only view of the values of data. Otherwise it shares the values of data without protecting them (see is_frozen), and Datum accessors return copies of it. Anything else is returned as a read-only numpy array, which is a view of data whenever possible.
+	"""
+	if data is None:
+		return None
+	if isinstance(data, pd.DataFrame):
+		if not is_frozen(data):
+			# pandas cannot combine read-only arrays of different dtypes without reordering the columns
+			return data.copy(deep=False)
+		values = data.to_numpy().view()
+		values.flags.writeable = False
+		return pd.DataFrame(values, index=data.index, columns=data.columns, copy=False)
+	arr = np.asarray(data).view()
+	arr.flags.writeable = False
+	return arr
+
+def is_frozen(data):
+	"""
+	Whether read_only can protect the values of a DataFrame
+
+	Only DataFrames whose columns share one dtype can be backed by a single read-only array. Datum accessors return copies of any other stored DataFrame, so writing to them cannot change the stored values.
+
+	Parameters
+	___________
+	data: DataFrame
+		DataFrame returned by read_only
+
+	Returns
+	________
+	frozen: bool
+		True if the values of data are read-only
+	"""
+	return data.dtypes.nunique() <= 1
+
 class Datum():
+	# named data arrays (current_data, potential_data, etc.) are normally views of the columns of processed_data, so each value is stored once
+	__slots__ = (
+		'name', 'raw_data', 'label', 'processed_data', 'raw_index', 'processed_index', 'expt_type', 'source',
+		'current_data', 'potential_data', 'overpotential_data', 'logcurrent_data', 'realcurrent_data', 'imagcurrent_data', 'error_data',
+		'area', 'refelec', 'thermo_potential',
+		'tafel_slope', 'exchg_curr', 'tafel_rsq',
+		'semicircle_params', 'linearfit_params', 'hfr', 'hfr_linear', 'lfr', 'eis_current', 'circuit', 'circuit_params', 'circuit_chisq',
+		'line', 'errcaps', 'errbars',
+		'__weakref__',
+	)
+
 	def __init__(self, name, data):
 		# data
 		self.name = name
-		self.raw_data = data
+		self.raw_data = read_only(data)
 		self.label = name
 		self.processed_data = None
+		self.raw_index = None
+		self.processed_index = None
+		if data is not None:
+			self.raw_index = fc.utils.build_col_index(data)
 		self.expt_type = None
+		self.source = None
 		
 		# processed values
 		self.current_data = None
@@ -39,6 +102,9 @@ class Datum():
 		self.hfr_linear = None
 		self.lfr = None
 		self.eis_current = None
+		self.circuit = None
+		self.circuit_params = None
+		self.circuit_chisq = None
 
 		# visualization
 		self.line = None
@@ -49,22 +115,33 @@ class Datum():
 	def get_name(self):
 		return self.name
 
-	def get_raw_data(self):
+	def get_raw_data(self, copy=False):
 		if self.raw_data is not None:
-			return self.raw_data.copy()
+			# unless copy is set this shares the read-only values, but adding or replacing columns does not reach the stored frame
+			return self.raw_data.copy(deep=copy or not is_frozen(self.raw_data))
 		return None
+
+	def get_raw_index(self):
+		return self.raw_index
 	
 	def get_label(self):
 		return self.label
 
-	def get_processed_data(self):
+	def get_processed_data(self, copy=False):
 		if self.processed_data is not None:
-			return self.processed_data.copy()
+			# unless copy is set this shares the read-only values, but adding or replacing columns does not reach the stored frame
+			return self.processed_data.copy(deep=copy or not is_frozen(self.processed_data))
 		return None
 
+	def get_processed_index(self):
+		return self.processed_index
+
 	def get_expt_type(self):
 		return self.expt_type
 
+	def get_source(self):
+		return self.source
+
 	def get_current_data(self):
 		return self.current_data
 
@@ -126,6 +203,17 @@ class Datum():
 	def get_eis_current(self):
 		return self.eis_current
 
+	def get_circuit(self):
+		return self.circuit
+
+	def get_circuit_params(self):
+		if self.circuit_params is not None:
+			return dict(self.circuit_params)
+		return None
+
+	def get_circuit_chisq(self):
+		return self.circuit_chisq
+
 	def get_line(self):
 		return self.line
 
@@ -140,31 +228,38 @@ class Datum():
 		self.label = new_label
 
 	def set_processed_data(self, new_data):
-		self.processed_data = new_data
+		self.processed_data = read_only(new_data)
+		if new_data is not None:
+			self.processed_index = fc.utils.build_col_index(new_data)
+		else:
+			self.processed_index = None
 
 	def set_expt_type(self, new_type):
 		self.expt_type = new_type.lower()
 
+	def set_source(self, new_source):
+		self.source = new_source
+
 	def set_current_data(self, new_vals):
-		self.current_data = np.asarray(new_vals)
+		self.current_data = read_only(new_vals)
 
 	def set_potential_data(self, new_vals):
-		self.potential_data = np.asarray(new_vals)
+		self.potential_data = read_only(new_vals)
 
 	def set_overpotential_data(self, new_vals):
-		self.overpotential_data = np.asarray(new_vals)
+		self.overpotential_data = read_only(new_vals)
 
 	def set_logcurrent_data(self, new_vals):
-		self.logcurrent_data = np.asarray(new_vals)
+		self.logcurrent_data = read_only(new_vals)
 
 	def set_realcurrent_data(self, new_vals):
-		self.realcurrent_data = np.asarray(new_vals)
+		self.realcurrent_data = read_only(new_vals)
 
 	def set_imagcurrent_data(self, new_vals):
-		self.imagcurrent_data = np.asarray(new_vals)
+		self.imagcurrent_data = read_only(new_vals)
 
 	def set_error_data(self, new_vals):
-		self.error_data = np.asarray(new_vals)
+		self.error_data = read_only(new_vals)
 	
 	def set_area(self, new_val):
 		self.area = new_val
@@ -202,6 +297,15 @@ class Datum():
 	def set_eis_current(self, new_val):
 		self.eis_current = new_val
 
+	def set_circuit(self, new_val):
+		self.circuit = new_val
+
+	def set_circuit_params(self, new_params):
+		self.circuit_params = new_params
+
+	def set_circuit_chisq(self, new_val):
+		self.circuit_chisq = new_val
+
 	def set_line(self, new_val):
 		self.line = new_val
 
@@ -0,0 +1,234 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# instrumentation is off unless a profiler or callback is registered; instrumented functions then only pay for one global lookup
+_active = False
+_trace_memory = False
+_profilers = []
+_callbacks = []
+_local = threading.local()
+
+class Profiler():
+	"""
+	Collects the stage events recorded while it is active
+
+	Created and activated by profile. Each event is a dict with the keys name, start (s, relative to the start of the profiler), duration (s), self (s, excluding nested stages), thread, depth, rows, allocated (bytes), and peak (bytes). allocated and peak are None unless memory tracing was requested.
+	"""
+	def __init__(self, trace_memory=False):
+		self.trace_memory = trace_memory
+		self.events = []
+		self.t0 = time.perf_counter()
+		self.t1 = None
+
+	def add_event(self, event):
+		self.events.append(event)
+
+	def summary(self):
+		"""
+		Aggregates the recorded events by stage
+
+		Returns
+		________
+		stages: dict
+			Dictionary mapping each stage name to a dict with the keys calls, total_s, self_s, mean_s, max_s, rows, allocated_bytes, and peak_bytes
+		"""
+		stages = {}
+		for e in self.events:
+			s = stages.setdefault(e['name'], {'calls':0, 'total_s':0.0, 'self_s':0.0, 'mean_s':0.0, 'max_s':0.0, 'rows':0, 'allocated_bytes':None, 'peak_bytes':None})
+			s['calls'] += 1
+			s['total_s'] += e['duration']
+			s['self_s'] += e['self']
+			s['max_s'] = max(s['max_s'], e['duration'])
+			if e['rows'] is not None:
+				s['rows'] += e['rows']
+			if e['allocated'] is not None:
+				s['allocated_bytes'] = (s['allocated_bytes'] or 0) + e['allocated']
+				s['peak_bytes'] = max(s['peak_bytes'] or 0, e['peak'])
+		for s in stages.values():
+			s['mean_s'] = s['total_s'] / s['calls']
+		return stages
+
+	def report(self):
+		"""
+		Structured report of the profiled run
+
+		Returns
+		________
+		report: dict
+			Dictionary with the total wall time of the profiled block (wall_s), the per-stage summary (stages, see summary), and the individual events (events)
+		"""
+		end = self.t1 if self.t1 is not None else time.perf_counter()
+		return {'wall_s':end - self.t0, 'trace_memory':self.trace_memory, 'stages':self.summary(), 'events':list(self.events)}
+
+	def to_json(self, filename):
+		"""
+		Writes the report (see report) to a JSON file
+		"""
+		with open(filename, 'w') as f:
+			json.dump(self.report(), f, indent=2)
+
+	def to_chrome_trace(self, filename):
+		"""
+		Writes the events in the Chrome trace event format
+
+		The resulting file can be opened in chrome://tracing or Perfetto to view the nested stages on a timeline.
+		"""
+		pid = os.getpid()
+		trace = []
+		for e in self.events:
+			args = {k:e[k] for k in ('rows', 'allocated', 'peak') if e[k] is not None}
+			trace.append({'name':e['name'], 'cat':e['name'].split('.')[0], 'ph':'X', 'ts':e['start'] * 1e6, 'dur':e['duration'] * 1e6, 'pid':pid, 'tid':e['thread'], 'args':args})
+		with open(filename, 'w') as f:
+			json.dump({'traceEvents':trace, 'displayTimeUnit':'ms'}, f)
+
+	def print_summary(self, sort='total_s'):
+		"""
+		Prints the per-stage summary as a table, sorted by the given column
+		"""
+		stages = sorted(self.summary().items(), key=lambda kv: kv[1][sort], reverse=True)
+		print(f"{'stage':<32s} {'calls':>7s} {'total ms':>10s} {'self ms':>10s} {'rows':>11s} {'alloc MiB':>10s}")
+		for name, s in stages:
+			alloc = '' if s['allocated_bytes'] is None else f"{s['allocated_bytes'] / 2**20:10.2f}"
+			print(f"{name:<32s} {s['calls']:>7d} {s['total_s']*1e3:>10.2f} {s['self_s']*1e3:>10.2f} {s['rows']:>11d} {alloc:>10s}")
+
+def update_state():
+	global _active, _trace_memory
+	_active = bool(_profilers or _callbacks)
+	_trace_memory = any(p.trace_memory for p in _profilers)
+
+@contextmanager
+def profile(trace_memory=False):
+	"""
+	Records the instrumented pipeline stages executed inside the with block
+
+	Parameters
+	___________
+	trace_memory: bool (default=False)
+		Whether to record the bytes allocated by each stage using tracemalloc. Tracing memory slows down allocation-heavy code considerably, so it is off by default.
+
+	Returns
+	________
+	profiler: Profiler
+		Profiler holding the recorded events. Use report, to_json, to_chrome_trace, or print_summary to inspect the results.
+
+	Example
+	________
+	>>> with fc.profiling.profile() as prof:
+	...     fc.cp_process(folder='data')
+	>>> prof.to_chrome_trace('trace.json')
+	"""
+	profiler = Profiler(trace_memory)
+	started_tracing = trace_memory and not tracemalloc.is_tracing()
+	if started_tracing:
+		tracemalloc.start()
+	_profilers.append(profiler)
+	update_state()
+	try:
+		yield profiler
+	finally:
+		profiler.t1 = time.perf_counter()
+		_profilers.remove(profiler)
+		update_state()
+		if started_tracing:
+			tracemalloc.stop()
+
+def add_callback(callback):
+	"""
+	Registers a function to be called with every stage event
+
+	The callback receives the event dict described in Profiler, with start given as an absolute time.perf_counter value. It is called from the thread which ran the stage.
+	"""
+	_callbacks.append(callback)
+	update_state()
+
+def remove_callback(callback):
+	"""
+	Unregisters a callback added with add_callback
+	"""
+	if callback in _callbacks:
+		_callbacks.remove(callback)
+	update_state()
+
+def count_rows(obj):
+	# rows of an array, DataFrame, Datum, or list of Datum objects; None if obj is none of these
+	shape = getattr(obj, 'shape', None)
+	if shape:
+		return int(shape[0])
+	if hasattr(obj, 'get_raw_data'):
+		return count_rows(obj.get_raw_data(copy=False))
+	if isinstance(obj, list) and obj and hasattr(obj[0], 'get_raw_data'):
+		return sum(d.get_raw_data(copy=False).shape[0] for d in obj if d.get_raw_data(copy=False) is not None)
+	return None
+
+def infer_rows(args, kwargs, result):
+	for obj in list(args) + list(kwargs.values()) + [result]:
+		rows = count_rows(obj)
+		if rows is not None:
+			return rows
+	return None
+
+def stage(name=None, rows=None):
+	"""
+	Decorator marking a function as an instrumented pipeline stage
+
+	When no profiler or callback is active, the wrapped function is called directly. Otherwise each call records its wall time, the number of rows processed, and, if requested, the memory it allocated.
+
+	Parameters
+	___________
+	name: str (default=None)
+		Name of the stage. Defaults to module.function, ex. 'datums.process_steps'
+	rows: callable (default=None)
+		Function rows(args, kwargs, result) returning the number of rows processed by a call. By default the length of the first array, DataFrame, or list of Datum objects among the arguments and the return value is used.
+	"""
+	def decorator(fn):
+		label = name or fn.__module__.split('.')[-1] + '.' + fn.__name__
+		count = rows or infer_rows
+		@functools.wraps(fn)
+		def wrapper(*args, **kwargs):
+			if not _active:
+				return fn(*args, **kwargs)
+			return run_stage(label, count, fn, args, kwargs)
+		return wrapper
+	return decorator
+
+def run_stage(label, count, fn, args, kwargs):
+	stack = getattr(_local, 'stack', None)
+	if stack is None:
+		stack = _local.stack = []
+	trace = _trace_memory and tracemalloc.is_tracing()
+	frame = {'child':0.0, 'peak':0}
+	if trace:
+		current, peak = tracemalloc.get_traced_memory()
+		if stack:
+			stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+		tracemalloc.reset_peak()
+		frame['mem0'] = current
+	stack.append(frame)
+	t0 = time.perf_counter()
+	try:
+		result = fn(*args, **kwargs)
+	finally:
+		t1 = time.perf_counter()
+		stack.pop()
+	duration = t1 - t0
+	allocated = peak = None
+	if trace:
+		current, traced_peak = tracemalloc.get_traced_memory()
+		frame['peak'] = max(frame['peak'], traced_peak)
+		allocated = current - frame['mem0']
+		peak = frame['peak'] - frame['mem0']
+		if stack:
+			stack[-1]['peak'] = max(stack[-1]['peak'], frame['peak'])
+	if stack:
+		stack[-1]['child'] += duration
+	event = {'name':label, 'start':t0, 'duration':duration, 'self':duration - frame['child'], 'thread':threading.get_ident(), 'depth':len(stack), 'rows':count(args, kwargs, result), 'allocated':allocated, 'peak':peak}
+	for profiler in list(_profilers):
+		profiler.add_event(dict(event, start=t0 - profiler.t0))
+	for callback in list(_callbacks):
+		callback(event)
+	return result
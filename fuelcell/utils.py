@@ -3,29 +3,44 @@ import pandas as pd
 import os
 import re
 import logging
+import hashlib
+import io
+import json
+import weakref
+from concurrent.futures import ProcessPoolExecutor
 
 from fuelcell.model import Datum
+from fuelcell import profiling
+from fuelcell import eclab
 
 _log = logging.getLogger(__name__)
-_log_fmt = "%(levelname)s: %(message)s"
-logging.basicConfig(level=logging.DEBUG, format=_log_fmt)
 
-valid_types = ['csv', 'xls', 'xlsx', 'txt']
+valid_types = ['csv', 'xls', 'xlsx', 'txt', 'mpr']
 export_types = ['csv', 'xls', 'xlsx']
 excel_types = ['xls', 'xlsx']
 csv_types = ['csv', 'txt']
+binary_types = ['mpr']
+batch_types = ['parquet', 'h5', 'hdf5']
+batch_version = 1
+# Datum attributes stored alongside the processed data in batch files
+batch_params = ['expt_type', 'label', 'area', 'refelec', 'thermo_potential', 'tafel_slope', 'exchg_curr', 'tafel_rsq', 'semicircle_params', 'linearfit_params', 'hfr', 'hfr_linear', 'lfr', 'eis_current', 'circuit', 'circuit_params', 'circuit_chisq']
 dlm_default = '\t'
 default_savetype = 'csv'
+cache_dir_default = os.environ.get('FUELCELL_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'fuelcell'))
+cache_size_default = 1024 * 2**20
+cache_version = 1
+# Datum objects returned by read_files(reuse=True), keyed by (path, delimiter). Entries disappear once the caller drops the Datum
+datum_registry = weakref.WeakValueDictionary()
 
 label_dict = {'v':'v', 'ma':'i', 'a':'i', 's':'t', 'mv':'v', 'v vs. sce':'v', 'mv vs. sce':'v',
-				'v vs. she':'v', 'mv vs. she':'v'}
+				'v vs. she':'v', 'mv vs. she':'v', 'hz':'f'}
 default_names = ['tintin', 'snowy', 'haddock', 'calculus', 'castafiore', 'thomson', 'thompson']
 
 def check_type(filetype):
 	"""
 	Check if the filetype is currently supported for import
 
-	fuelcell currently supports import of csv, xls, xlsx, and txt files
+	fuelcell currently supports import of csv, xls, xlsx, and txt files, and EC-Lab binary (mpr) files
 
 	Parameters
 	___________
@@ -229,7 +244,7 @@ def check_labels(data):
 	newcols = [];
 	for c in cols:
 		try:
-			units = c.split('/')[1]
+			units = c.split('/', 1)[1]
 			if units == 'ohm':
 				if 're' in c:
 					newcols.append('real')
@@ -245,6 +260,27 @@ def check_labels(data):
 			newcols.append(c)
 	return newcols
 
+def build_col_index(data):
+	"""
+	Builds an index of the columns in a data set
+
+	Column labels are parsed once with check_labels, and the position of the first column carrying each standard heading ('i' for current, 'v' for potential, etc.) is recorded. Columns whose labels cannot be identified are indexed by their original label.
+
+	Parameters
+	___________
+	data: DataFrame
+		DataFrame whose columns are indexed
+
+	Returns
+	________
+	col_index: dict
+		Dict mapping each column label (after parsing) to its position in data
+	"""
+	col_index = {}
+	for i, c in enumerate(check_labels(data)):
+		col_index.setdefault(c, i)
+	return col_index
+
 def get_files(path=None, pattern='', filetype='', files=None):
 	"""
 	Find all files matching the desired criteria
@@ -275,11 +311,16 @@ def get_files(path=None, pattern='', filetype='', files=None):
 		files = [f for f in files if re.match(r'.*\.'+filetype, f)]
 	return files
 
-def read_file(filename, dlm=dlm_default):
+@profiling.stage()
+def read_file(filename, dlm=dlm_default, cache=True, digest=None):
 	"""
 	Loads the specified file as a Datum object
 
-	The specified file must be of one of the types supported for import. fuelcell currently supports csv, xls, xlsx, and txt files. If the file has a valid filetype but cannot be imported for some reason, a warning is displayed.
+	The specified file must be of one of the types supported for import. fuelcell currently supports csv, xls, xlsx, and txt files, and EC-Lab binary (mpr) files. If the file has a valid filetype but cannot be imported for some reason, a warning is displayed.
+
+	Parsed text and excel files are stored in an on-disk cache keyed by the file contents and the reader options, so reading an unchanged file again skips parsing entirely. See cache_read and cache_write for details. Binary files are decoded directly by eclab.read_mpr and are not cached.
+
+	The path, size, modification time, and content hash of the file are stored on the returned Datum (see Datum.get_source).
 
 	Parameters
 	___________
@@ -287,6 +328,10 @@ def read_file(filename, dlm=dlm_default):
 		Name of a file in the current directory, or a complete path to the desired file.
 	dlm: str (default='\\t')
 		Delimiting character if the file is a text file. Defaults to '\\t' (tab-delimiting).
+	cache: bool (default=True)
+		Whether to use the on-disk cache of parsed files. Set cache=False to always parse the original file.
+	digest: str (default=None)
+		Content hash of the file (see file_hash), if already known from the folder index. If unspecified and cache=True, the file is hashed.
 
 	Returns
 	________
@@ -301,26 +346,457 @@ def read_file(filename, dlm=dlm_default):
 		name = os.path.basename(filename)
 		name, filetype = name.split('.')
 		filetype = check_type(filetype)
-		if filetype in excel_types:
-			data = pd.read_excel(filename)
-		elif filetype in csv_types:
-			if filetype == 'csv':
-				data = pd.read_csv(filename)
-			elif filetype == 'txt':
-				data = pd.read_csv(filename, delimiter=dlm)
-		return Datum(name, data)
+		st = os.stat(filename)
+		key = None
+		if cache and filetype not in binary_types:
+			digest = digest or file_hash(filename)
+			key = cache_key(filename, filetype, dlm, digest)
+			data = cache_read(key)
+		if data is None:
+			if filetype in excel_types:
+				data = pd.read_excel(filename)
+			elif filetype in csv_types:
+				if filetype == 'csv':
+					data = pd.read_csv(filename)
+				elif filetype == 'txt':
+					data = pd.read_csv(filename, delimiter=dlm)
+			elif filetype == 'mpr':
+				data = eclab.read_mpr(filename)
+			if key:
+				cache_write(key, data)
+		datum = Datum(name, data)
+		datum.set_source({'path':os.path.realpath(filename), 'size':st.st_size, 'mtime_ns':st.st_mtime_ns, 'hash':digest})
+		return datum
 	except:
 		if not os.path.isdir(filename):
-			if filename.split('.')[0] in valid_types:
+			if filename.split('.')[-1].lower() in valid_types:
 				_log.warning(f'Unable to read {os.path.basename(filename)}')
 	return None
 
+@profiling.stage()
+def read_files(filenames, dlm=dlm_default, processes=1, cache=True, reuse=False):
+	"""
+	Loads several files as Datum objects
+
+	Files are read with read_file, either one at a time or in parallel using a pool of worker processes. The returned list is always in the same order as filenames, regardless of the order in which the workers finish. Files which cannot be read are reported with a warning and returned as None rather than aborting the remaining files.
+
+	If cache=True, the size, modification time, and content hash of every file read are recorded in a persistent index of its folder (see index_read). Files whose size and modification time match the index are not hashed again, so reloading an unchanged folder only costs a stat of each file plus a read of the cached data. If reuse=True, Datum objects returned by earlier calls are returned again, as long as the file is unchanged and the Datum is still referenced somewhere, so unchanged files are not read at all.
+
+	Parameters
+	___________
+	filenames: list of str, path object, or path-like
+		Complete paths to the files to be read
+	dlm: str (default='\\t')
+		Delimiting character if the file is a text file. Defaults to '\\t' (tab-delimiting).
+	processes: int (default=1)
+		Number of worker processes used to read the files. If 1, files are read sequentially in the current process. If None or 0, one worker per CPU core is used.
+	cache: bool (default=True)
+		Whether to use the on-disk cache of parsed files.
+	reuse: bool (default=False)
+		Whether to return the Datum objects from earlier calls for files which have not changed since. Note that these are the same objects, including any processing already applied to them.
+
+	Returns
+	________
+	data: list of Datum or None
+		One entry per file, in the same order as filenames. Entries are None for files which could not be read.
+	"""
+	filenames = list(filenames)
+	data = [None] * len(filenames)
+	digests = [None] * len(filenames)
+	indexes = {}
+	to_read = []
+	for i, f in enumerate(filenames):
+		if not (cache or reuse):
+			to_read.append(i)
+			continue
+		path = os.path.realpath(f)
+		try:
+			st = os.stat(path)
+		except OSError:
+			to_read.append(i)
+			continue
+		if reuse:
+			d = datum_registry.get((path, dlm))
+			if d is not None and source_matches(d.get_source(), st):
+				data[i] = d
+				continue
+		if cache:
+			folder, name = os.path.split(path)
+			if folder not in indexes:
+				indexes[folder] = index_read(folder)
+			entry = indexes[folder].get(name)
+			if source_matches(entry, st):
+				digests[i] = entry['hash']
+		to_read.append(i)
+	if processes == 1 or len(to_read) < 2:
+		for i in to_read:
+			data[i] = read_file(filenames[i], dlm, cache, digests[i])
+	else:
+		if not processes:
+			processes = os.cpu_count()
+		processes = min(processes, len(to_read))
+		with ProcessPoolExecutor(max_workers=processes) as pool:
+			futures = [pool.submit(read_file, filenames[i], dlm, cache, digests[i]) for i in to_read]
+			for i, fut in zip(to_read, futures):
+				try:
+					data[i] = fut.result()
+				except Exception as e:
+					_log.warning(f'Unable to read {os.path.basename(filenames[i])}: {e}')
+	changed = set()
+	for i in to_read:
+		d = data[i]
+		if d is None or d.get_source() is None:
+			continue
+		source = d.get_source()
+		if reuse:
+			datum_registry[(source['path'], dlm)] = d
+		if cache and source['hash'] and digests[i] != source['hash']:
+			folder, name = os.path.split(source['path'])
+			if folder not in indexes:
+				indexes[folder] = index_read(folder)
+			indexes[folder][name] = {'size':source['size'], 'mtime_ns':source['mtime_ns'], 'hash':source['hash']}
+			changed.add(folder)
+	for folder in changed:
+		index_write(folder, indexes[folder])
+	return data
+
+def source_matches(source, st):
+	# whether a recorded file state still describes the file with the given os.stat result
+	return source is not None and source['size'] == st.st_size and source['mtime_ns'] == st.st_mtime_ns
+
+class TailReader():
+	"""
+	Reads the rows appended to a text data file since the last read
+
+	Used to follow files which are still being written, such as the txt export of a potentiostat during a long hold. Each read only parses the bytes appended since the previous read, and an incomplete last line is held back until the rest of it is written. If the file shrinks (ex. it was overwritten by a new experiment), reading starts over from the beginning and truncated is set to True.
+
+	Parameters
+	___________
+	filename: str, path object, or path-like
+		Complete path to a csv or txt file
+	dlm: str (default='\\t')
+		Delimiting character if the file is a txt file. csv files always use ','.
+	"""
+	def __init__(self, filename, dlm=dlm_default):
+		self.filename = filename
+		filetype = check_type(os.path.basename(filename).split('.')[-1])
+		if filetype not in csv_types:
+			raise ValueError(f'Only {", ".join(csv_types)} files can be followed')
+		self.dlm = ',' if filetype == 'csv' else dlm
+		self.reset()
+
+	def reset(self):
+		self.offset = 0
+		self.remainder = b''
+		self.header = None
+		self.truncated = False
+
+	def get_header(self):
+		"""
+		Empty DataFrame with the column labels of the file, or None if the header line has not been written yet
+		"""
+		if self.header is None:
+			try:
+				with open(self.filename, 'rb') as f:
+					line = f.readline()
+			except OSError:
+				return None
+			if not line.endswith(b'\n'):
+				return None
+			self.header = pd.read_csv(io.BytesIO(line), delimiter=self.dlm, nrows=0)
+			self.offset = len(line)
+		return self.header
+
+	def read(self, usecols=None, final=False):
+		"""
+		Parses the complete rows appended since the last read
+
+		Parameters
+		___________
+		usecols: list of int (default=None)
+			Indices of the columns to parse. If unspecified, all columns are parsed.
+		final: bool (default=False)
+			Whether the file is complete. If True, a last line without a line break is parsed as well.
+
+		Returns
+		________
+		data: DataFrame or None
+			New rows, or None if no complete rows were appended
+		"""
+		self.truncated = False
+		try:
+			size = os.stat(self.filename).st_size
+		except OSError:
+			return None
+		if size < self.offset:
+			self.reset()
+			self.truncated = True
+			return None
+		if self.get_header() is None:
+			return None
+		new = b''
+		if size > self.offset:
+			with open(self.filename, 'rb') as f:
+				f.seek(self.offset)
+				new = f.read(size - self.offset)
+			self.offset += len(new)
+		buf = self.remainder + new
+		cut = len(buf) if final else buf.rfind(b'\n') + 1
+		self.remainder = buf[cut:]
+		if cut == 0 or not buf[:cut].strip():
+			return None
+		# rows may have fewer fields than the header (ex. a trailing delimiter after the last label), so columns are matched by position
+		names = list(self.header.columns)
+		data = pd.read_csv(io.BytesIO(buf[:cut]), delimiter=self.dlm, header=None, usecols=usecols)
+		data.columns = [names[i] if i < len(names) else i for i in data.columns]
+		return data
+
+### on-disk cache of parsed files ###
+def file_hash(filename, blocksize=2**20):
+	"""
+	Hash the contents of a file
+
+	Parameters
+	___________
+	filename: str, path object, or path-like
+		File to be hashed
+	blocksize: int (default=2**20)
+		Number of bytes read at a time
+
+	Returns
+	________
+	digest: str
+		Hexadecimal BLAKE2b digest of the file contents
+	"""
+	h = hashlib.blake2b(digest_size=20)
+	with open(filename, 'rb') as f:
+		for block in iter(lambda: f.read(blocksize), b''):
+			h.update(block)
+	return h.hexdigest()
+
+def cache_key(filename, filetype, dlm=dlm_default, digest=None):
+	"""
+	Build the cache key for a data file
+
+	The key depends only on the contents of the file and on the options used to parse it, so renaming or moving a file does not invalidate its cache entry, while editing it does.
+
+	Parameters
+	___________
+	filename: str, path object, or path-like
+		Complete path to the data file
+	filetype: str
+		Filetype used to select the reader
+	dlm: str (default='\\t')
+		Delimiting character used for text files
+	digest: str (default=None)
+		Content hash of the file, if already known. If unspecified, the file is hashed using file_hash.
+
+	Returns
+	________
+	key: str
+		Cache key
+	"""
+	options = f'{cache_version}|{filetype}|{dlm!r}'
+	options = hashlib.blake2b(options.encode(), digest_size=6).hexdigest()
+	key = (digest or file_hash(filename)) + '_' + options
+	return key
+
+@profiling.stage()
+def cache_read(key, cache_dir=None):
+	"""
+	Load a parsed DataFrame from the cache
+
+	Entries are stored as uncompressed numpy .npz archives with one array per column, so loading an entry is a straight binary read with no text parsing. Reading an entry marks it as recently used for LRU eviction.
+
+	Parameters
+	___________
+	key: str
+		Cache key generated by cache_key
+	cache_dir: str, path object, or path-like (default=None)
+		Cache directory. Defaults to cache_dir_default, which can be set using the FUELCELL_CACHE_DIR environment variable.
+
+	Returns
+	________
+	data: DataFrame or None
+		Cached data, or None if the key is not in the cache
+	"""
+	cache_dir = cache_dir or cache_dir_default
+	path = os.path.join(cache_dir, key + '.npz')
+	try:
+		with np.load(path, allow_pickle=False) as entry:
+			columns = list(entry['columns'])
+			data = pd.DataFrame({c:entry[f'col_{i}'] for i, c in enumerate(columns)}, columns=columns)
+		os.utime(path)
+	except (OSError, KeyError, ValueError):
+		return None
+	return data
+
+@profiling.stage()
+def cache_write(key, data, cache_dir=None, max_size=cache_size_default):
+	"""
+	Store a parsed DataFrame in the cache
+
+	Data sets with non-numeric columns are not cached. After writing, the least recently used entries are evicted until the cache fits within max_size.
+
+	Parameters
+	___________
+	key: str
+		Cache key generated by cache_key
+	data: DataFrame
+		Data to store
+	cache_dir: str, path object, or path-like (default=None)
+		Cache directory. Defaults to cache_dir_default.
+	max_size: int (default=cache_size_default)
+		Maximum total size of the cache in bytes
+	"""
+	cache_dir = cache_dir or cache_dir_default
+	if not all(check_str(c) for c in data.columns):
+		return
+	if any(dt == object for dt in data.dtypes):
+		return
+	arrays = {f'col_{i}':np.asarray(data.iloc[:,i]) for i in range(data.shape[1])}
+	arrays['columns'] = np.asarray(data.columns, dtype=str)
+	path = os.path.join(cache_dir, key + '.npz')
+	tmp_path = path + f'.{os.getpid()}.tmp'
+	try:
+		os.makedirs(cache_dir, exist_ok=True)
+		with open(tmp_path, 'wb') as f:
+			np.savez(f, **arrays)
+		os.replace(tmp_path, path)
+		evict_cache(cache_dir, max_size)
+	except OSError as e:
+		_log.debug(f'Unable to write cache entry {key}: {e}')
+		if os.path.exists(tmp_path):
+			os.remove(tmp_path)
+
+def evict_cache(cache_dir=None, max_size=cache_size_default):
+	"""
+	Remove least recently used entries until the cache fits within max_size bytes
+
+	Parameters
+	___________
+	cache_dir: str, path object, or path-like (default=None)
+		Cache directory. Defaults to cache_dir_default.
+	max_size: int (default=cache_size_default)
+		Maximum total size of the cache in bytes
+	"""
+	cache_dir = cache_dir or cache_dir_default
+	if not os.path.isdir(cache_dir):
+		return
+	entries = []
+	with os.scandir(cache_dir) as it:
+		for e in it:
+			if e.name.endswith('.npz'):
+				try:
+					st = e.stat()
+				except OSError:
+					continue
+				entries.append((st.st_mtime, st.st_size, e.path))
+	total = sum(e[1] for e in entries)
+	for mtime, size, path in sorted(entries):
+		if total <= max_size:
+			break
+		try:
+			os.remove(path)
+			total -= size
+		except OSError:
+			pass
+
+def index_path(folder, cache_dir=None):
+	"""
+	Location of the persistent index of a data folder
+
+	Parameters
+	___________
+	folder: str, path object, or path-like
+		Data folder
+	cache_dir: str, path object, or path-like (default=None)
+		Cache directory. Defaults to cache_dir_default.
+
+	Returns
+	________
+	path: str
+		Path of the index file, inside the index subdirectory of the cache directory
+	"""
+	cache_dir = cache_dir or cache_dir_default
+	name = hashlib.blake2b(os.path.realpath(folder).encode(), digest_size=10).hexdigest()
+	return os.path.join(cache_dir, 'index', name + '.json')
+
+def index_read(folder, cache_dir=None):
+	"""
+	Load the persistent index of a data folder
+
+	The index records the size, modification time (in ns), and content hash of each file read from the folder. It is used by read_files to avoid hashing files which have not changed.
+
+	Parameters
+	___________
+	folder: str, path object, or path-like
+		Data folder
+	cache_dir: str, path object, or path-like (default=None)
+		Cache directory. Defaults to cache_dir_default.
+
+	Returns
+	________
+	entries: dict
+		Dictionary mapping each file name to a dict with the keys size, mtime_ns, and hash. Empty if the folder has no index yet.
+	"""
+	try:
+		with open(index_path(folder, cache_dir)) as f:
+			index = json.load(f)
+		if index.get('version') == cache_version and index.get('folder') == os.path.realpath(folder):
+			return index['files']
+	except (OSError, ValueError, KeyError, AttributeError):
+		pass
+	return {}
+
+def index_write(folder, entries, cache_dir=None):
+	"""
+	Store the persistent index of a data folder
+
+	Entries for files which no longer exist are dropped. The index is written to a temporary file and moved into place, so concurrent readers never see a partial index.
+
+	Parameters
+	___________
+	folder: str, path object, or path-like
+		Data folder
+	entries: dict
+		Dictionary mapping each file name to a dict with the keys size, mtime_ns, and hash
+	cache_dir: str, path object, or path-like (default=None)
+		Cache directory. Defaults to cache_dir_default.
+	"""
+	folder = os.path.realpath(folder)
+	path = index_path(folder, cache_dir)
+	tmp_path = path + f'.{os.getpid()}.tmp'
+	try:
+		present = set(os.listdir(folder))
+		entries = {name:e for name, e in entries.items() if name in present}
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		with open(tmp_path, 'w') as f:
+			json.dump({'version':cache_version, 'folder':folder, 'files':entries}, f)
+		os.replace(tmp_path, path)
+	except OSError as e:
+		_log.debug(f'Unable to write folder index for {folder}: {e}')
+		if os.path.exists(tmp_path):
+			os.remove(tmp_path)
+
+def clear_cache(cache_dir=None):
+	"""
+	Remove all entries from the cache of parsed files
+
+	Parameters
+	___________
+	cache_dir: str, path object, or path-like (default=None)
+		Cache directory. Defaults to cache_dir_default.
+	"""
+	evict_cache(cache_dir, max_size=0)
+
 def get_testdir():
 	fcdir = os.path.dirname(os.path.realpath(__file__))
 	datapath = os.path.join(fcdir, 'testdata')
 	return datapath
 
-def save_data(data, filename=None, folder=None):
+@profiling.stage()
+def save_data(data, filename=None, folder=None, overwrite=False):
 	"""
 	Save data to a local file
 
@@ -334,6 +810,13 @@ def save_data(data, filename=None, folder=None):
 		Filename to save the data as. Either a full filename or complete path to an individual file. If the file already exists, the specified name is modified to avoid overwriting data. If unspecified, an arbitrary name is used.
 	folder: str, path obbject, or path-like (default=None)
 		Folder in which data will be saved. If unspecified and folder cannot be determined from filename, or the specified folder is invalid and cannot be created, defaults to 'processed'
+	overwrite: bool (default=False)
+		Whether to replace an existing file of the same name instead of modifying the name
+
+	Returns
+	________
+	full_path: str
+		Path of the saved file
 	"""
 	if filename:
 		path, name = os.path.split(filename)
@@ -358,13 +841,195 @@ def save_data(data, filename=None, folder=None):
 		else:
 			os.mkdir('processed')
 			savedir = os.path.realpath('processed')
-	full_path = os.path.join(savedir, name)
-	if os.path.exists(full_path):
-		while os.path.exists(full_path):
-			name = name.replace('.', str(np.random.randint(1000))+'.')
-			full_path = os.path.join(savedir, name)
-		_log.warning('Saving data as ' + name + ' to avoid overwriting existing file')
+	if overwrite:
+		full_path = os.path.join(savedir, name)
+	else:
+		full_path = unique_path(savedir, name)
 	if filetype in excel_types:
 		data.to_excel(full_path, index=False)
 	else:
-		data.to_csv(full_path, index=False)
\ No newline at end of file
+		data.to_csv(full_path, index=False)
+	return full_path
+
+def unique_path(savedir, name):
+	"""
+	Path at which a file can be saved without overwriting an existing file
+
+	If name is already taken, a numeric suffix is appended to it (ex. 'cp_00_1.csv'). The directory is listed once rather than checking candidate names one at a time.
+
+	Parameters
+	___________
+	savedir: str, path object, or path-like
+		Folder in which the file will be saved
+	name: str
+		Desired filename
+
+	Returns
+	________
+	path: str
+		Full path of the file
+	"""
+	existing = set(os.listdir(savedir))
+	if name in existing:
+		stem, ext = os.path.splitext(name)
+		k = 1
+		while f'{stem}_{k}{ext}' in existing:
+			k += 1
+		_log.warning(f'Saving data as {stem}_{k}{ext} to avoid overwriting existing file')
+		name = f'{stem}_{k}{ext}'
+	return os.path.join(savedir, name)
+
+def check_batch_type(filetype):
+	filetype = filetype.lower().replace('.', '')
+	if filetype not in batch_types:
+		raise ValueError('Supported batch filetypes ' + ', '.join(batch_types))
+	return filetype
+
+def to_json(value):
+	# convert numpy values in Datum attributes to types json can store
+	if isinstance(value, np.ndarray):
+		return value.tolist()
+	if isinstance(value, np.generic):
+		return value.item()
+	if isinstance(value, tuple):
+		return [to_json(v) for v in value]
+	if isinstance(value, dict):
+		return {k:to_json(v) for k, v in value.items()}
+	return value
+
+def batch_entry(d, processed):
+	entry = {'name':d.get_name(), 'rows':processed.shape[0], 'columns':[str(c) for c in processed.columns]}
+	for param in batch_params:
+		# read the attributes directly, as some getters unpack or copy them
+		entry[param] = to_json(getattr(d, param))
+	return entry
+
+def restore_datum(entry, processed):
+	# the raw data is not saved in batch files
+	d = Datum(entry['name'], None)
+	d.set_processed_data(processed)
+	for param in batch_params:
+		value = entry.get(param)
+		if value is not None:
+			getattr(d, 'set_' + param)(value)
+	# set the same arrays as the processing functions in datums do for each type of experiment
+	expt_type = entry.get('expt_type')
+	if expt_type in ['cp', 'ca', 'cv', 'lsv']:
+		d.set_current_data(processed['i'])
+		d.set_potential_data(processed['v'])
+		if expt_type == 'lsv':
+			d.set_overpotential_data(processed['v'])
+			d.set_logcurrent_data(processed['log(i)'])
+		else:
+			d.set_overpotential_data(processed['eta'])
+		if expt_type == 'ca':
+			d.set_error_data(processed['i_sd'])
+		elif expt_type == 'cp':
+			d.set_error_data(processed['v_sd'])
+	return d
+
+@profiling.stage()
+def save_batch(data, filename, folder=None):
+	"""
+	Save the processed data of many Datum objects to a single file
+
+	Writing one file per Datum with save_data is slow when there are many of them, especially on network drives. save_batch writes a whole batch to one columnar file instead, along with the parameters of each Datum (expt_type, area, reference electrode, thermodynamic potential, fit results, etc.), so that load_batch can restore the processed Datum objects exactly. Raw data is not saved.
+
+	Two formats are supported, chosen by the extension of filename:
+	- parquet: the processed data of all Datum objects is concatenated into a single table with one column per variable; columns a Datum does not have are filled with nan. The name, row count, columns, and parameters of each Datum are stored as JSON in the file metadata. Requires pyarrow.
+	- h5 or hdf5: each Datum is stored in its own group (datum_00000, datum_00001, etc.) with its parameters as JSON in the attributes of the group. Requires PyTables. Every group carries some overhead, so parquet is considerably faster for batches of many small Datum objects.
+
+	Data is stored as float64.
+
+	Parameters
+	___________
+	data: list of Datum
+		Datum objects to save. Datum objects without processed data are skipped.
+	filename: str, path object, or path-like
+		Filename to save the data as, ending in .parquet, .h5, or .hdf5. If the file already exists, a numeric suffix is added to the name to avoid overwriting it.
+	folder: str, path object, or path-like (default=None)
+		Folder in which data will be saved. If unspecified, the folder is determined from filename, or defaults to 'processed'
+
+	Returns
+	________
+	path: str
+		Full path of the saved file
+	"""
+	path, name = os.path.split(str(filename))
+	filetype = check_batch_type(name.split('.')[-1])
+	savedir = check_savedir(path or folder or 'processed')
+	full_path = unique_path(savedir, name)
+	frames = [(d, d.get_processed_data()) for d in data if d.get_processed_data() is not None]
+	entries = [batch_entry(d, df) for d, df in frames]
+	if filetype == 'parquet':
+		try:
+			import pyarrow as pa
+			import pyarrow.parquet as pq
+		except ImportError:
+			raise ImportError('Saving parquet files requires pyarrow. Install it with pip install fuelcell[parquet]') from None
+		total = sum(df.shape[0] for d, df in frames)
+		columns = {}
+		for d, df in frames:
+			for c in df.columns:
+				columns.setdefault(str(c), None)
+		for c in columns:
+			arr = np.full(total, np.nan)
+			start = 0
+			for d, df in frames:
+				if c in df.columns:
+					arr[start:start+df.shape[0]] = df[c].to_numpy(dtype=float)
+				start += df.shape[0]
+			columns[c] = arr
+		table = pa.table(columns)
+		meta = {'version':batch_version, 'datums':entries}
+		table = table.replace_schema_metadata({b'fuelcell':json.dumps(meta).encode()})
+		pq.write_table(table, full_path)
+	else:
+		with pd.HDFStore(full_path, mode='w') as store:
+			for k, ((d, df), entry) in enumerate(zip(frames, entries)):
+				key = f'datum_{k:05d}'
+				store.put(key, df.reset_index(drop=True).astype(float), format='fixed')
+				store.get_storer(key).attrs.fuelcell = json.dumps(dict(entry, version=batch_version))
+	return full_path
+
+@profiling.stage()
+def load_batch(filename):
+	"""
+	Load Datum objects saved with save_batch
+
+	Parquet files are read as a single table, which is then sliced into the processed data of each Datum. Datum objects whose columns cover the whole table hold views of it rather than copies.
+
+	Parameters
+	___________
+	filename: str, path object, or path-like
+		Complete path to a .parquet, .h5, or .hdf5 file written by save_batch
+
+	Returns
+	________
+	data: list of Datum
+		Datum objects with their processed data and parameters restored
+	"""
+	filetype = check_batch_type(str(filename).split('.')[-1])
+	data = []
+	if filetype == 'parquet':
+		try:
+			import pyarrow.parquet as pq
+		except ImportError:
+			raise ImportError('Loading parquet files requires pyarrow. Install it with pip install fuelcell[parquet]') from None
+		table = pq.read_table(filename)
+		meta = json.loads(table.schema.metadata[b'fuelcell'])
+		df = table.to_pandas()
+		start = 0
+		for entry in meta['datums']:
+			processed = df.iloc[start:start+entry['rows']]
+			if entry['columns'] != list(df.columns):
+				processed = processed[entry['columns']]
+			processed.index = pd.RangeIndex(entry['rows'])
+			data.append(restore_datum(entry, processed))
+			start += entry['rows']
+	else:
+		with pd.HDFStore(filename, mode='r') as store:
+			for key in sorted(store.keys()):
+				entry = json.loads(store.get_storer(key).attrs.fuelcell)
+				data.append(restore_datum(entry, store.get(key)))
+	return data
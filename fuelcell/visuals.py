@@ -1,20 +1,23 @@
+import os
+import copy
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import logging
+from concurrent.futures import ProcessPoolExecutor
 
 from fuelcell import utils
 from fuelcell import datums
+from fuelcell import profiling
 
 _log = logging.getLogger(__name__)
-_log_fmt = "%(levelname)s: %(message)s"
-logging.basicConfig(level=logging.INFO, format=_log_fmt)
-logging.basicConfig(format=_log_fmt)
-# _log.setLevel(logging.INFO)
-# _log.setFormatter(_log_fmt)
 logging.getLogger('matplotlib.font_manager').disabled = True
 
 ### plotting functions ###
+@profiling.stage()
 def plot_cv(data=None, use_all=False, fig=None, ax=None, labels=None, line=True, scatter=False, errs=False, current_column=1, potential_column=0, err_column=3, xunits='V', yunits=r'$mA/cm^2$', export_name=None, export_type='png', fig_kw={}, err_kw={}, **plot_kw):
 	"""
 	Plot cyclic voltammetry data
@@ -66,12 +69,12 @@ def plot_cv(data=None, use_all=False, fig=None, ax=None, labels=None, line=True,
 	for d in data:
 		if (not use_all) and d.get_expt_type() != 'cv':
 			continue
-		this_data = d.get_processed_data()
-		this_data.columns = utils.check_labels(this_data)
+		this_data = d.get_processed_data(copy=False)
+		col_index = d.get_processed_index()
 		this_label = d.get_label()
-		x = datums.find_col(this_data, 'potential', potential_column)
-		y = datums.find_col(this_data, 'current', current_column)
-		yerr = check_errs(errs, this_data, 'current_err', err_column)
+		x = datums.find_col(this_data, 'potential', potential_column, col_index)
+		y = datums.find_col(this_data, 'current', current_column, col_index)
+		yerr = check_errs(errs, this_data, 'current_err', err_column, col_index)
 		lines, caps, bars = plotter(ax, x, y, yerr, this_label, line, scatter, errs, err_kw, **plot_kw)
 		d.set_line(lines)
 		d.set_errcaps(caps)
@@ -81,9 +84,10 @@ def plot_cv(data=None, use_all=False, fig=None, ax=None, labels=None, line=True,
 	ax.set_xlabel(build_axlabel('Potential', xunits))
 	ax.set_ylabel(build_axlabel('Current Density', yunits))
 	if export_name:
-		fig_saver(export_name, export_type)
+		fig_saver(export_name, export_type, ax.figure)
 	return fig, ax
 
+@profiling.stage()
 def polcurve(data=None, use_all=False, fig=None, ax=None, labels=None, line=True, scatter=True, errs=False, current_column=0, potential_column=1, err_column=3, xunits=r'$mA/cm^2$', yunits='V', export_name=None, export_type='png', fig_kw={}, err_kw={}, **plot_kw):
 	"""
 	Plot polarization curves using chronopotentiometry or chronoamperometry data
@@ -135,12 +139,12 @@ def polcurve(data=None, use_all=False, fig=None, ax=None, labels=None, line=True
 	for d in data:
 		if (not use_all) and d.get_expt_type() not in ['cp', 'ca']:
 			continue
-		this_data = d.get_processed_data()
-		this_data.columns = utils.check_labels(this_data)
+		this_data = d.get_processed_data(copy=False)
+		col_index = d.get_processed_index()
 		this_label = d.get_label()
-		x = datums.find_col(this_data, 'current', current_column)
-		y = datums.find_col(this_data, 'potential', potential_column)
-		yerr = check_errs(errs, this_data, 'potential_err', err_column)
+		x = datums.find_col(this_data, 'current', current_column, col_index)
+		y = datums.find_col(this_data, 'potential', potential_column, col_index)
+		yerr = check_errs(errs, this_data, 'potential_err', err_column, col_index)
 		lines, caps, bars = plotter(ax, x, y, yerr, this_label, line, scatter, errs, err_kw, **plot_kw)
 		d.set_line(lines)
 		d.set_errcaps(caps)
@@ -150,10 +154,11 @@ def polcurve(data=None, use_all=False, fig=None, ax=None, labels=None, line=True
 	ax.set_xlabel(build_axlabel('Current Density', xunits))
 	ax.set_ylabel(build_axlabel('Potential', yunits))
 	if export_name:
-		fig_saver(export_name, export_type)
+		fig_saver(export_name, export_type, ax.figure)
 	return fig, ax
 
-def plot_cp_raw(data=None, use_all=False, fig=None, ax=None, labels=None, line=False, scatter=True, errs=False, current_column=2, potential_column=1, time_column=0, err_column=(4,5), xunits='s', yunits=('V', 'mA'), export_name=None, export_type='png', fig_kw={}, err_kw={}, **plot_kw):
+@profiling.stage()
+def plot_cp_raw(data=None, use_all=False, fig=None, ax=None, labels=None, line=False, scatter=True, errs=False, current_column=2, potential_column=1, time_column=0, err_column=(4,5), xunits='s', yunits=('V', 'mA'), max_points=4000, ds_method='minmax', export_name=None, export_type='png', fig_kw={}, err_kw={}, **plot_kw):
 	"""
 	Plot raw chronopotentiometry data
 
@@ -183,6 +188,10 @@ def plot_cp_raw(data=None, use_all=False, fig=None, ax=None, labels=None, line=F
 		Units of the x-axis
 	yunits: tuple or list of str (default=('ma','V'))
 		Units of the y-axis
+	max_points: int (default=4000)
+		Maximum number of points drawn for each trace; longer traces are downsampled for display (see downsample) and downsampled again from the full data when the plot is zoomed. The default keeps the minimum and maximum of every pixel column of a typical figure. Set to None to draw every point
+	ds_method: str (default='minmax')
+		Downsampling method, either 'minmax' or 'lttb'
 	export_name: str, path object, or file-like (default=None)
 		If specified, the figure will be saved as an image. Can either be a complete file path to save the image in a specific directory or a file name to save the image in the current directory
 	export_type: str (default='png')
@@ -211,16 +220,16 @@ def plot_cp_raw(data=None, use_all=False, fig=None, ax=None, labels=None, line=F
 	for d in data:
 		if (not use_all) and d.get_expt_type() != 'cp':
 			continue
-		this_data = d.get_raw_data()
-		this_data.columns = utils.check_labels(this_data)
+		this_data = d.get_raw_data(copy=False)
+		col_index = d.get_raw_index()
 		this_label = d.get_label()
-		x = datums.find_col(this_data, 'time', time_column)
-		y1 = datums.find_col(this_data, 'potential', potential_column)
-		y2 = datums.find_col(this_data, 'current', current_column)
-		yerr1 = check_errs(errs, this_data, 'potential_err', err_column[0])
-		yerr2 = check_errs(errs, this_data, 'current_err', err_column[1])
-		plotter(ax, x, y1, yerr1, this_label, line, scatter, errs, err_kw, c=color1, **plot_kw)
-		plotter(ax2, x, y2, yerr2, this_label, line, scatter, errs, err_kw, c=color2, **plot_kw)
+		x = datums.find_col(this_data, 'time', time_column, col_index)
+		y1 = datums.find_col(this_data, 'potential', potential_column, col_index)
+		y2 = datums.find_col(this_data, 'current', current_column, col_index)
+		yerr1 = check_errs(errs, this_data, 'potential_err', err_column[0], col_index)
+		yerr2 = check_errs(errs, this_data, 'current_err', err_column[1], col_index)
+		plotter(ax, x, y1, yerr1, this_label, line, scatter, errs, err_kw, max_points, ds_method, c=color1, **plot_kw)
+		plotter(ax2, x, y2, yerr2, this_label, line, scatter, errs, err_kw, max_points, ds_method, c=color2, **plot_kw)
 	if len(data) > 1:
 		ax.legend(loc='best', edgecolor='k')
 	# color = 'tab:red'
@@ -230,10 +239,11 @@ def plot_cp_raw(data=None, use_all=False, fig=None, ax=None, labels=None, line=F
 	ax.tick_params(axis='y', labelcolor=color1)
 	ax2.tick_params(axis='y', labelcolor=color2)
 	if export_name:
-		fig_saver(export_name, export_type)
+		fig_saver(export_name, export_type, ax.figure)
 	return fig, (ax, ax2)
 
-def plot_tafel(data=None, use_all=False, fig=None, ax=None, labels=None, line=False, scatter=True, errs=False, current_column=3, potential_column=2, err_column=3, xunits='', yunits='V', plot_slope=True, imin=None, imax=None, export_name=None, export_type='png', fig_kw={}, **plot_kw):
+@profiling.stage()
+def plot_tafel(data=None, use_all=False, fig=None, ax=None, labels=None, line=False, scatter=True, errs=False, current_column=3, potential_column=2, err_column=3, xunits='', yunits='V', plot_slope=True, imin=None, imax=None, auto=False, export_name=None, export_type='png', fig_kw={}, **plot_kw):
 	if data is None:
 		return None
 	if fig is None and ax is None:
@@ -241,36 +251,88 @@ def plot_tafel(data=None, use_all=False, fig=None, ax=None, labels=None, line=Fa
 	for d in data:
 		if (not use_all) and d.get_expt_type() != 'lsv':
 			continue
-		this_data = d.get_processed_data()
-		this_data.columns = utils.check_labels(this_data)
+		this_data = d.get_processed_data(copy=False)
+		col_index = d.get_processed_index()
 		this_label = d.get_label()	
 		# x = np.array(df['log(i)'])
 		# y = np.array(df['eta'])
 		# print('here')
-		x = datums.find_col(this_data, 'tafelcurrent', current_column)
-		y = datums.find_col(this_data, 'overpotential', potential_column)
-		plotter(ax, x, y, None, this_label, line, scatter, errs, None, **plot_kw)
+		x = datums.find_col(this_data, 'tafelcurrent', current_column, col_index)
+		y = datums.find_col(this_data, 'overpotential', potential_column, col_index)
+		lines, caps, bars = plotter(ax, x, y, None, this_label, line, scatter, errs, None, **plot_kw)
+		d.set_line(lines)
+		d.set_errcaps(caps)
+		d.set_errbars(bars)
 		if plot_slope:
-			if imin is None:
-				imin = min(x)
-			if imax is None:
-				imax = max(x)
-			ax.axvline(x=imin, c='red', lw=0.5)
-			ax.axvline(x=imax, c='red', lw=0.5)
-			a, b, r2, itrim, vtrim = datums.tafel_slope(x, y, imin, imax)
-			d.set_tafel_slope(a)
-			d.set_exchg_curr(b)
-			d.set_tafel_rsq(r2)
-			vfit = datums.tafel_eqn(itrim, b, a)
-			ax.scatter(itrim, vfit, s=1, c='orange', zorder=200)
+			plot_tafel_fit(d, ax, imin, imax, auto, current_column=current_column, potential_column=potential_column)
 	if len(data) > 1:
 		ax.legend(loc='best', edgecolor='k')
 	ax.set_xlabel('log(current)')
 	ax.set_ylabel(build_axlabel('Overpotential', yunits))
 	if export_name:
-		fig_saver(export_name, export_type)
+		fig_saver(export_name, export_type, ax.figure)
 	return fig, ax
 
+@profiling.stage()
+def plot_tafel_fit(d, ax, imin=None, imax=None, auto=False, artists=None, current_column=3, potential_column=2):
+	"""
+	Plot the Tafel fit of LSV data
+
+	Fits the Tafel equation to the processed data of d, stores the fit parameters on d, and marks the fitting bounds and the fitted line on ax. If the artists returned by an earlier call are passed, they are updated in place instead of being drawn again, so the fitting range can be adjusted interactively without replotting the data.
+
+	Parameters
+	___________
+	d: Datum
+		Datum object containing processed LSV data
+	ax: Axes
+		Axes object on which the data of d is plotted
+	imin: float (default=None)
+		Lower bound of log(current) used in the fit. If unspecified, the smallest value is used. Ignored if auto=True
+	imax: float (default=None)
+		Upper bound of log(current) used in the fit. If unspecified, the largest value is used. Ignored if auto=True
+	auto: bool (default=False)
+		Whether to select the fitting range automatically (see datums.tafel_slope)
+	artists: tuple (default=None)
+		Artists returned by a previous call on the same axes. If unspecified, new artists are created
+	current_column: int or str (default=3)
+		Index or label of the column containing log(current) data. Used only if automatic column identification fails
+	potential_column: int or str (default=2)
+		Index or label of the column containing overpotential data. Used only if automatic column identification fails
+
+	Returns
+	________
+	artists: tuple
+		Lines marking the lower and upper bounds of the fit, and the collection of points on the fitted line
+	"""
+	this_data = d.get_processed_data(copy=False)
+	col_index = d.get_processed_index()
+	x = datums.find_col(this_data, 'tafelcurrent', current_column, col_index)
+	y = datums.find_col(this_data, 'overpotential', potential_column, col_index)
+	if auto:
+		a, b, r2, itrim, vtrim = datums.tafel_slope(x, y, auto=True)
+		imin, imax = min(itrim), max(itrim)
+	else:
+		if imin is None:
+			imin = min(x)
+		if imax is None:
+			imax = max(x)
+		a, b, r2, itrim, vtrim = datums.tafel_slope(x, y, imin, imax)
+	d.set_tafel_slope(a)
+	d.set_exchg_curr(b)
+	d.set_tafel_rsq(r2)
+	vfit = datums.tafel_eqn(itrim, b, a)
+	if artists is None:
+		lower = ax.axvline(x=imin, c='red', lw=0.5)
+		upper = ax.axvline(x=imax, c='red', lw=0.5)
+		fit = ax.scatter(itrim, vfit, s=1, c='orange', zorder=200)
+	else:
+		lower, upper, fit = artists
+		lower.set_xdata([imin, imin])
+		upper.set_xdata([imax, imax])
+		fit.set_offsets(np.column_stack([itrim, vfit]))
+	return lower, upper, fit
+
+@profiling.stage()
 def plot_lsv(data=None, use_all=False, fig=None, ax=None, labels=None, line=False, scatter=True, errs=False, current_column=1, potential_column=2, err_column=3, xunits='V', yunits=r'$mA/cm^2$', export_name=None, export_type='png', fig_kw={}, **plot_kw):
 	"""
 	Plot linear sweep voltammetry data
@@ -322,11 +384,11 @@ def plot_lsv(data=None, use_all=False, fig=None, ax=None, labels=None, line=Fals
 	for d in data:
 		if (not use_all) and d.get_expt_type() != 'lsv':
 			continue
-		this_data = d.get_processed_data()
-		this_data.columns = utils.check_labels(this_data)
+		this_data = d.get_processed_data(copy=False)
+		col_index = d.get_processed_index()
 		this_label = d.get_label()	
-		x = datums.find_col(this_data, 'overpotential', potential_column)
-		y = datums.find_col(this_data, 'current', current_column)
+		x = datums.find_col(this_data, 'overpotential', potential_column, col_index)
+		y = datums.find_col(this_data, 'current', current_column, col_index)
 		lines, caps, bars = plotter(ax, x, y, None, this_label, line, scatter, errs, None, **plot_kw)
 		d.set_line(lines)
 		d.set_errcaps(caps)
@@ -339,9 +401,10 @@ def plot_lsv(data=None, use_all=False, fig=None, ax=None, labels=None, line=Fals
 	# ymax = max(y) + 0.01 * max(y)
 	# ax.set_ylim((ymin, ymax))
 	if export_name:
-		fig_saver(export_name, export_type)
+		fig_saver(export_name, export_type, ax.figure)
 	return fig, ax
 
+@profiling.stage()
 def plot_eis(data=None, use_all=False, fig=None, ax=None, labels=None, line=False, scatter=True, errs=False, current_column=0, potential_column=1, err_column=3, xunits=r'$R_{Re} [\Omega]$', yunits=r'$R_{Im} [\Omega]$', export_name=None, export_type='png', fig_kw={}, **plot_kw):
 	"""
 	Plot electrochemical impedance spectroscopy data
@@ -393,7 +456,7 @@ def plot_eis(data=None, use_all=False, fig=None, ax=None, labels=None, line=Fals
 	for d in data:
 		if (not use_all) and d.get_expt_type() != 'eis':
 			continue
-		this_data = d.get_processed_data()
+		this_data = d.get_processed_data(copy=False)
 		this_label = d.get_label()
 		x = this_data['real']
 		y = this_data['imag']
@@ -406,9 +469,10 @@ def plot_eis(data=None, use_all=False, fig=None, ax=None, labels=None, line=Fals
 	ax.set_xlabel(xunits)
 	ax.set_ylabel(yunits)
 	if export_name:
-		fig_saver(export_name, export_type)
+		fig_saver(export_name, export_type, ax.figure)
 	return fig, ax
 
+@profiling.stage()
 def plot_hfr(data=None, fig=None, ax=None):
 	if data is None:
 		return None
@@ -416,8 +480,8 @@ def plot_hfr(data=None, fig=None, ax=None):
 		data = data[0]
 	if fig is None and ax is None:
 		fig, ax = plt.subplots()
-	x = data.get_processed_data()['real']
-	y = data.get_processed_data()['imag']
+	x = data.get_processed_data(copy=False)['real']
+	y = data.get_processed_data(copy=False)['imag']
 	r, h, k = data.get_semicircle_params()
 	m, b = data.get_linearfit_params()
 	hfr = data.get_hfr()
@@ -440,7 +504,8 @@ def plot_hfr(data=None, fig=None, ax=None):
 	return fig, ax
 
 ### base plotting function ###
-def plotter(ax, x, y, e, l, line, scatter, errs, err_kw, **plot_kw):
+@profiling.stage()
+def plotter(ax, x, y, e, l, line, scatter, errs, err_kw, max_points=None, ds_method='minmax', **plot_kw):
 	"""
 	Plot data
 
@@ -466,9 +531,22 @@ def plotter(ax, x, y, e, l, line, scatter, errs, err_kw, **plot_kw):
 		Whether to include an error bar at each data point
 	err_kw: dict
 		Dict with keywords passed to the plt.errorbars function used to draw errorbars
+	max_points: int (default=None)
+		If specified, data sets longer than max_points are downsampled before plotting (see downsample). When x is sorted and no error bars are drawn, the line is downsampled again from the full data whenever the x limits of the axes change, so zooming in reveals the full detail
+	ds_method: str (default='minmax')
+		Downsampling method, either 'minmax' or 'lttb'. Ignored if max_points is not specified
 	**plot_kw:
 		all remaining keyword arguments are passed to the plt.plot or plt.scatter function used to draw the graphs
 	"""
+	full = None
+	if max_points is not None and len(x) > max_points:
+		x = np.asarray(x, dtype=float)
+		y = np.asarray(y, dtype=float)
+		full = (x, y)
+		idx = downsample(x, y, max_points, ds_method)
+		x, y = x[idx], y[idx]
+		if e is not None:
+			e = np.asarray(e)[idx]
 	actual_line = None
 	actual_caps = None
 	actual_bars = None
@@ -499,8 +577,183 @@ def plotter(ax, x, y, e, l, line, scatter, errs, err_kw, **plot_kw):
 			plot_kw['ls'] = ''
 			actual_line = ax.plot(x, y, label=l, **plot_kw)
 		actual_line = actual_line[0]
+		if full is not None and np.all(np.diff(full[0]) >= 0):
+			_decimated_line(ax, actual_line, full[0], full[1], max_points, ds_method)
 	return actual_line, actual_caps, actual_bars
  
+### in-place updates of plotted data ###
+def update_artists(d, x=None, y=None, e=None, **style):
+	"""
+	Update the plotted line of a Datum in place
+
+	Auxilliary function to change the data or style of a line drawn by one of the plotting functions without clearing and redrawing the figure. The line and error bar artists stored on the Datum (see Datum.get_line, Datum.get_errcaps, and Datum.get_errbars) are modified directly, so only these artists need to be drawn again afterwards.
+
+	Parameters
+	___________
+	d: Datum
+		Datum object which has been plotted
+	x: array-like (default=None)
+		New x values. If unspecified, the current x values are kept
+	y: array-like (default=None)
+		New y values. If unspecified, the current y values are kept
+	e: array-like (default=None)
+		New error values used to draw error bars. Ignored if the line was drawn without error bars
+	**style:
+		Properties of the line to change (e.g. color, ls, lw, marker, ms). A new color is also applied to the error bars
+
+	Returns
+	________
+	artists: list
+		All artists belonging to the line. Empty if d has not been plotted
+	"""
+	line = d.get_line()
+	if line is None:
+		return []
+	caps = list(d.get_errcaps() or [])
+	bars = list(d.get_errbars() or [])
+	if x is not None or y is not None or e is not None:
+		x = np.asarray(line.get_xdata() if x is None else x, dtype=float)
+		y = np.asarray(line.get_ydata() if y is None else y, dtype=float)
+		line.set_data(x, y)
+		if e is not None:
+			e = np.asarray(e, dtype=float)
+			for cap, sign in zip(caps, (-1, 1)):
+				cap.set_data(x, y + sign * e)
+			for bar in bars:
+				bar.set_segments(np.stack([np.column_stack([x, y - e]), np.column_stack([x, y + e])], axis=1))
+	color = style.pop('color', style.pop('c', None))
+	if color is not None:
+		for artist in [line] + caps + bars:
+			artist.set_color(color)
+	if style:
+		line.set(**style)
+	return [line] + caps + bars
+
+def sync_legend(ax):
+	"""
+	Update the legend of a plot in place
+
+	Auxilliary function to copy the current labels and styles of the plotted lines to the entries of the existing legend of ax (e.g. after update_artists), instead of replacing it with a new legend. Only entries of plain lines can be updated in place; entries of lines with error bars are drawn from several artists, so a legend containing them has to be created again.
+
+	Parameters
+	___________
+	ax: Axes
+		Axes object containing the legend
+
+	Returns
+	________
+	legend: Legend
+		The updated legend, or None if ax has no legend or the legend cannot be updated in place
+	"""
+	legend = ax.get_legend()
+	if legend is None:
+		return None
+	handles, labels = ax.get_legend_handles_labels()
+	entries = getattr(legend, 'legend_handles', None) or legend.legendHandles
+	if len(entries) != len(handles) or not all(isinstance(a, Line2D) for a in handles + entries):
+		return None
+	for handle, entry, text, label in zip(handles, entries, legend.get_texts(), labels):
+		text.set_text(label)
+		# update_from also copies the position and visibility settings, which belong to the legend entry
+		transform, markevery, animated = entry.get_transform(), entry.get_markevery(), entry.get_animated()
+		entry.update_from(handle)
+		entry.set_transform(transform)
+		entry.set_markevery(markevery)
+		entry.set_animated(animated)
+		entry.set_markersize(handle.get_markersize() * legend.markerscale)
+		entry.set_clip_box(None)
+		entry.set_clip_path(None)
+	return legend
+
+### downsampling of long data sets for plotting ###
+def downsample(x, y, max_points, method='minmax'):
+	"""
+	Select a visually lossless subset of points to plot
+
+	Auxilliary function to reduce a long data set (e.g. a multi-day CP or CA log) to at most max_points points before drawing it. With method='minmax', the data is split into max_points/2 buckets of consecutive points and the minimum and maximum of y in each bucket are kept, so every spike and step remains visible at the resolution of the plot. With method='lttb', the Largest-Triangle-Three-Buckets algorithm keeps the point of each bucket which forms the largest triangle with its neighbouring buckets, which preserves the shape of smooth curves with fewer points.
+
+	Parameters
+	___________
+	x: array-like
+		x values. Buckets are formed from consecutive points, so x should be sorted (e.g. time)
+	y: array-like
+		y values
+	max_points: int
+		Maximum number of points to keep. The first and last points are always kept
+	method: str (default='minmax')
+		Downsampling method, either 'minmax' or 'lttb'
+
+	Returns
+	________
+	idx: numpy array
+		Sorted indices of the points to plot. If the data set already has max_points points or fewer, all indices are returned
+	"""
+	x = np.asarray(x, dtype=float)
+	y = np.asarray(y, dtype=float)
+	count = y.shape[0]
+	max_points = int(max_points)
+	if count <= max_points or max_points < 4:
+		return np.arange(count)
+	method = method.lower()
+	if method == 'lttb':
+		return _lttb(x, y, max_points)
+	elif method != 'minmax':
+		_log.warning('Unrecognized downsampling method %r; using minmax', method)
+	# equal-sized buckets of the interior points; the final partial bucket is handled separately
+	n_buckets = (max_points - 2) // 2
+	interior = y[1:-1]
+	size = -(-interior.shape[0] // n_buckets)
+	full = interior.shape[0] // size
+	blocks = interior[:full*size].reshape(full, size)
+	offsets = np.arange(full) * size + 1
+	idx = [[0], np.argmin(blocks, axis=1) + offsets, np.argmax(blocks, axis=1) + offsets]
+	if full*size < interior.shape[0]:
+		tail = interior[full*size:]
+		idx.append([np.argmin(tail) + full*size + 1, np.argmax(tail) + full*size + 1])
+	idx.append([count - 1])
+	return np.unique(np.concatenate(idx))
+
+def _lttb(x, y, max_points):
+	# Largest-Triangle-Three-Buckets; each bucket depends on the point chosen in the previous one, so only the work within a bucket is vectorized
+	count = y.shape[0]
+	edges = np.linspace(1, count - 1, max_points - 1).astype(int)
+	idx = np.empty(max_points, dtype=int)
+	idx[0] = 0
+	idx[-1] = count - 1
+	a = 0
+	for k in range(max_points - 2):
+		lo, hi = edges[k], edges[k+1]
+		nxt = slice(hi, edges[k+2]) if k + 2 < edges.shape[0] else slice(count - 1, count)
+		cx, cy = x[nxt].mean(), y[nxt].mean()
+		ax, ay = x[a], y[a]
+		area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+		a = lo + np.argmax(area)
+		idx[k+1] = a
+	return idx
+
+def _decimated_line(ax, line, x, y, max_points, method):
+	# keep the full-resolution data on the axes callbacks and redraw only the points visible in the current x limits
+	x = np.asarray(x, dtype=float)
+	y = np.asarray(y, dtype=float)
+	shown = [(0, x.shape[0])]
+	def redraw(changed):
+		if line.axes is None:
+			return
+		xmin, xmax = sorted(changed.get_xlim())
+		lo = max(np.searchsorted(x, xmin, side='left') - 1, 0)
+		hi = min(np.searchsorted(x, xmax, side='right') + 1, x.shape[0])
+		if hi - lo < 2:
+			lo, hi = 0, x.shape[0]
+		if (lo, hi) == shown[0]:
+			return
+		shown[0] = (lo, hi)
+		idx = downsample(x[lo:hi], y[lo:hi], max_points, method) + lo
+		line.set_data(x[idx], y[idx])
+	# limits are only reported to the axes being zoomed, so listen on every axes sharing this x axis (e.g. twinx)
+	for sibling in ax.get_shared_x_axes().get_siblings(ax):
+		sibling.callbacks.connect('xlim_changed', redraw)
+	return redraw
+
 ### generate an axis label from the specified name and units ###
 def build_axlabel(base, units):
 	"""
@@ -527,7 +780,7 @@ def build_axlabel(base, units):
 	return label
 
 ### validation of error values ###
-def check_errs(errs, df, err_name, err_col):
+def check_errs(errs, df, err_name, err_col, col_index=None):
 	"""
 	Check if data set contains error data and return valid error data
 
@@ -543,6 +796,8 @@ def check_errs(errs, df, err_name, err_col):
 		String of the form '[datatype]_std' (ex: 'current_std'). Used to parse column labels of df
 	err_col: int or str
 		Index or label of the column containing data to draw error bars. Used only if automatic column identification fails. Ignored if errs=False
+	col_index: dict (default=None)
+		Precomputed column index of df (see utils.build_col_index)
 
 	Returns
 	________
@@ -552,7 +807,7 @@ def check_errs(errs, df, err_name, err_col):
 	count = df.shape[0]
 	if errs:
 		try:
-			err = datums.find_col(df, err_name, err_col)
+			err = datums.find_col(df, err_name, err_col, col_index)
 		except:
 			err = np.zeros(count)
 			_log.warning('Unable to use the specified error values')
@@ -561,7 +816,8 @@ def check_errs(errs, df, err_name, err_col):
 	return err
 
 ### auxilliary function to export figures ###
-def fig_saver(export_name, export_type='png'):
+@profiling.stage()
+def fig_saver(export_name, export_type='png', fig=None):
 	"""
 	Save the current figure
 
@@ -571,9 +827,204 @@ def fig_saver(export_name, export_type='png'):
 		File name to save the image as. Can either be a complete file path to save the image in a specific directory or a file name to save the image in the current directory
 	export_type: str (default='png')
 		File type to save the image as. Only used if export_name does not include the file type
+	fig: Figure (default=None)
+		Figure to save. If unspecified, the current pyplot figure is saved
 	"""
 	if '.' not in export_name:
 		export_type = export_type.replace('.','')
 		export_name = export_name + '.' + export_type
-	plt.savefig(export_name, bbox_inches='tight')
+	if fig is None:
+		plt.savefig(export_name, bbox_inches='tight')
+	else:
+		fig.savefig(export_name, bbox_inches='tight')
 
+
+### batch rendering of figures ###
+render_types = ['png', 'svg', 'pdf']
+# plots drawn for each experiment type by report_tasks
+report_plots = {'cp':['polcurve'], 'ca':['polcurve'], 'cv':['plot_cv'], 'lsv':['plot_lsv', 'plot_tafel'], 'eis':['plot_eis', 'plot_hfr']}
+
+def report_tasks(data, plots=None):
+	"""
+	List the figures of a campaign report
+
+	Auxilliary function to build the tasks for render_batch or render_report: one figure of each applicable type for every Datum, in the order of data.
+
+	Parameters
+	___________
+	data: list of Datum
+		Datum objects containing processed data
+	plots: dict (default=None)
+		Names of the plotting functions used for each experiment type, e.g. {'lsv':['plot_tafel']}. If unspecified, report_plots is used: polarization curves for CP and CA data, CV plots, LSV and Tafel plots, and Nyquist and HFR plots for EIS data
+
+	Returns
+	________
+	tasks: list of dict
+		One task per figure, with keys 'plot', 'data', and 'name'
+	"""
+	if plots is None:
+		plots = report_plots
+	tasks = []
+	for d in data:
+		for plot in plots.get(d.get_expt_type(), []):
+			tasks.append({'plot':plot, 'data':[d], 'name':d.get_name() + '_' + plot.replace('plot_', '')})
+	return tasks
+
+def build_figure(task):
+	"""
+	Draw one figure without pyplot
+
+	Auxilliary function to draw the figure described by a task on a new Figure with an Agg canvas. The figure is not registered with pyplot, so it is released as soon as it is no longer referenced and can be drawn in any thread or process.
+
+	Parameters
+	___________
+	task: dict
+		'plot': name of the plotting function in this module (e.g. 'polcurve' or 'plot_tafel'); 'data': list of Datum objects passed to it; 'fig_kw' (optional): dict with keywords passed to Figure. All remaining keys except 'name' are passed to the plotting function
+
+	Returns
+	________
+	fig: Figure
+		Figure object containing all plot elements
+	"""
+	task = dict(task)
+	func = globals()[task.pop('plot')]
+	data = task.pop('data')
+	task.pop('name', None)
+	fig = Figure(**task.pop('fig_kw', {}))
+	FigureCanvasAgg(fig)
+	ax = fig.subplots()
+	func(data=data, fig=fig, ax=ax, **task)
+	return fig
+
+def render_figure(task, folder=None, export_types=('png',), dpi='figure'):
+	"""
+	Draw one figure and save it in each of the requested formats
+
+	Parameters
+	___________
+	task: dict
+		Description of the figure (see build_figure). task['name'] is used as the file name
+	folder: str, path object, or path-like (default=None)
+		Directory in which to save the images. If unspecified, the current directory is used
+	export_types: list of str (default=('png',))
+		File types to save the image as, any of render_types
+	dpi: float or 'figure' (default='figure')
+		Resolution of raster images
+
+	Returns
+	________
+	paths: list of str
+		Paths of the saved images
+	"""
+	fig = build_figure(task)
+	paths = []
+	for export_type in export_types:
+		path = os.path.join(folder or '', task['name'] + '.' + export_type.replace('.', ''))
+		fig.savefig(path, dpi=dpi, bbox_inches='tight')
+		paths.append(path)
+	return paths
+
+def _detach(task):
+	# plotting stores artists and fit results on the Datum objects it is given, so render shallow copies (which share the data) to leave the caller's Datum objects untouched; this also keeps artists of figures in this process from being pickled along with the Datum objects
+	data = []
+	for d in task['data']:
+		d = copy.copy(d)
+		d.set_line(None)
+		d.set_errcaps(None)
+		d.set_errbars(None)
+		data.append(d)
+	return dict(task, data=data)
+
+def _run_tasks(func, tasks, processes, *args):
+	# results are returned in the order of tasks; failed tasks are reported with a warning and returned as None
+	tasks = list(tasks)
+	if processes == 1 or len(tasks) < 2:
+		for task in tasks:
+			try:
+				result = func(_detach(task), *args)
+			except Exception as e:
+				_log.warning(f'Unable to render {task.get("name", task["plot"])}: {e}')
+				result = None
+			yield result
+		return
+	if not processes:
+		processes = os.cpu_count()
+	processes = min(processes, len(tasks))
+	with ProcessPoolExecutor(max_workers=processes) as pool:
+		futures = [pool.submit(func, _detach(task), *args) for task in tasks]
+		for task, fut in zip(tasks, futures):
+			try:
+				result = fut.result()
+			except Exception as e:
+				_log.warning(f'Unable to render {task.get("name", task["plot"])}: {e}')
+				result = None
+			yield result
+
+@profiling.stage()
+def render_batch(tasks, folder=None, export_types=('png',), dpi='figure', processes=None):
+	"""
+	Draw and save many figures in parallel
+
+	Each figure is drawn with build_figure and saved by render_figure in a pool of worker processes, one figure per task, so throughput scales with the number of CPU cores. Figures are created with the object-oriented Agg API rather than pyplot, so no global figure state is shared between tasks and each figure is released once it is saved. Plotted artists and values computed while plotting (e.g. Tafel fit parameters) are set on copies of the Datum objects, not on the Datum objects passed in, also when rendering in this process.
+
+	Parameters
+	___________
+	tasks: list of dict
+		Descriptions of the figures (see build_figure and report_tasks). Every task needs a 'name', which is used as the file name
+	folder: str, path object, or path-like (default=None)
+		Directory in which to save the images. It is created if it does not exist. If unspecified, the current directory is used
+	export_types: list of str (default=('png',))
+		File types to save every figure as, any of render_types
+	dpi: float or 'figure' (default='figure')
+		Resolution of raster images
+	processes: int (default=None)
+		Number of worker processes. If 1, figures are drawn sequentially in the current process. If None or 0, one worker per CPU core is used
+
+	Returns
+	________
+	paths: list of list of str or None
+		Paths of the saved images of each task, in the same order as tasks. Entries are None for figures which could not be drawn
+	"""
+	export_types = [t.replace('.', '').lower() for t in export_types]
+	for t in export_types:
+		if t not in render_types:
+			raise ValueError(f'Unsupported export type {t!r}; expected one of {render_types}')
+	if folder:
+		os.makedirs(folder, exist_ok=True)
+	return list(_run_tasks(render_figure, tasks, processes, folder, export_types, dpi))
+
+@profiling.stage()
+def render_report(tasks, filename, processes=None):
+	"""
+	Draw many figures into a single multi-page PDF report
+
+	Figures are drawn in parallel as in render_batch and written to filename one page per task, in the order of tasks. Only the drawing is done in the worker processes; the pages are written sequentially as they arrive because they all go into one file.
+
+	Parameters
+	___________
+	tasks: list of dict
+		Descriptions of the figures (see build_figure and report_tasks)
+	filename: str, path object, or path-like
+		Path of the PDF file. If it does not end in '.pdf', the extension is added
+	processes: int (default=None)
+		Number of worker processes. If 1, figures are drawn sequentially in the current process. If None or 0, one worker per CPU core is used
+
+	Returns
+	________
+	filename: str
+		Path of the saved report
+	pages: int
+		Number of pages written. Figures which could not be drawn are reported with a warning and skipped
+	"""
+	# the PDF backend takes longer to import than the rest of this module, so it is only imported when a report is written
+	from matplotlib.backends.backend_pdf import PdfPages
+	filename = str(filename)
+	if not filename.lower().endswith('.pdf'):
+		filename = filename + '.pdf'
+	pages = 0
+	with PdfPages(filename) as pdf:
+		for fig in _run_tasks(build_figure, tasks, processes):
+			if fig is not None:
+				pdf.savefig(fig, bbox_inches='tight')
+				pages += 1
+	return filename, pages
@@ -1,8 +1,10 @@
 import sys
 import os
+import inspect
 from pathlib import Path
 import logging
 import warnings
+from collections import OrderedDict
 warnings.filterwarnings("ignore", "(?s).*MATPLOTLIBDATA.*", category=UserWarning)
 logging.getLogger('matplotlib.font_manager').disabled = True
 
@@ -25,6 +27,7 @@ from PyQt5.QtWidgets import *
 from PyQt5.QtGui import QDesktopServices, QFont, QPalette, QColor
 from PyQt5.QtCore import Qt
 from PyQt5.QtCore import qVersion
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
 from matplotlib.backends.backend_qt5agg import (FigureCanvas, NavigationToolbar2QT as NavigationToolbar)
 # from matplotlib.backends.qt_compat import is_pyqt5
 # if qVersion() == 5:
@@ -37,12 +40,252 @@ from matplotlib.backends.backend_qt5agg import (FigureCanvas, NavigationToolbar2
 import matplotlib
 from matplotlib.figure import Figure
 from matplotlib.lines import Line2D
+from matplotlib.legend import Legend
 import matplotlib
 
-class DataHandler():
+class Cancelled(Exception):
+	pass
+
+class WorkerSignals(QObject):
+	progress = pyqtSignal(int, int, str)
+	partial = pyqtSignal(object)
+	result = pyqtSignal(object)
+	error = pyqtSignal(object)
+	cancelled = pyqtSignal()
+	finished = pyqtSignal()
+
+class Worker(QRunnable):
+	"""
+	Runs a function on a QThreadPool thread
+
+	The function is called with the keyword arguments progress, partial, and cancelled in addition to its own arguments. progress(i, n, message) and partial(result) emit the corresponding signals, which Qt delivers on the main thread. cancelled() returns True once cancel has been called; the function should check it between units of work and raise Cancelled.
+	"""
+	def __init__(self, fn, *args, **kwargs):
+		super().__init__()
+		self.fn = fn
+		self.args = args
+		self.kwargs = kwargs
+		self.signals = WorkerSignals()
+		self._cancelled = False
+
+	def cancel(self):
+		self._cancelled = True
+
+	def is_cancelled(self):
+		return self._cancelled
+
+	@pyqtSlot()
+	def run(self):
+		try:
+			result = self.fn(*self.args, progress=self.signals.progress.emit, partial=self.signals.partial.emit, cancelled=self.is_cancelled, **self.kwargs)
+		except Cancelled:
+			self.signals.cancelled.emit()
+		except Exception as e:
+			self.signals.error.emit(e)
+		else:
+			self.signals.result.emit(result)
+		finally:
+			self.signals.finished.emit()
+
+def check_cancelled(cancelled):
+	if cancelled is not None and cancelled():
+		raise Cancelled()
+
+def report_progress(progress, i, n, message):
+	if progress is not None:
+		progress(i, n, message)
+
+class SessionStore():
+	"""
+	Session-wide store of loaded and processed data shared by all tabs
+
+	Loaded Datum objects are keyed by the path and content hash of their file, so each file is parsed once per session and only read again once it changes on disk. Processing results are keyed by the Datum they were computed from, the experiment type, and the processing parameters other than area, reference electrode, and thermodynamic potential; only the latest result for each key is kept, and only the max_results most recently used results are kept in total. Processing runs on working copies which share the raw data of the stored Datum objects, so results for different parameters or experiment types do not overwrite each other.
+	"""
+	processes = {'cp':fc.cp_process, 'ca':fc.ca_process, 'cv':fc.cv_process, 'lsv':fc.lsv_process, 'eis':fc.eis_process}
+	# parameters which fc.reprocess can apply to an existing result, and the experiment types it supports
+	affine_params = ['area', 'reference', 'thermo_potential']
+	affine_types = ['cp', 'ca', 'cv', 'lsv']
+	max_results = 256
+
 	def __init__(self):
+		self.datums = {}
+		self.paths = {}
+		self.results = OrderedDict()
+
+	def datum_key(self, d):
+		source = d.get_source()
+		if source is None:
+			return None
+		return (source['path'], source['hash'] or (source['size'], source['mtime_ns']))
+
+	def load(self, files=None, folder=None, expt_type='', progress=None, cancelled=None):
+		# load files one at a time so progress can be reported and the work can be cancelled between files
+		dirpath = os.path.realpath(folder) if folder else os.getcwd()
+		pattern = r'.*' + expt_type + r'.*' if expt_type else ''
+		if files is not None and type(files) != list:
+			files = [files]
+		names = fc.utils.get_files(dirpath, pattern, '', list(files) if files else None)
+		data = []
+		for i, name in enumerate(names):
+			check_cancelled(cancelled)
+			path = os.path.realpath(os.path.join(dirpath, name))
+			key = self.paths.get(path)
+			if key is not None and fc.utils.source_matches(self.datums[key].get_source(), os.stat(path)):
+				data.append(self.datums[key])
+			else:
+				if key is not None:
+					self.discard(key)
+				for d in fc.load_data(filename=name, folder=dirpath, expt_type=expt_type, reuse=True):
+					key = self.datum_key(d)
+					if key is not None:
+						self.datums[key] = d
+						self.paths[path] = key
+					data.append(d)
+			report_progress(progress, i+1, len(names), 'Loaded ' + os.path.basename(name))
+		return data
+
+	def discard(self, key):
+		# forget an outdated version of a file along with everything computed from it
+		self.datums.pop(key, None)
+		self.results = OrderedDict((k, v) for k, v in self.results.items() if k[0] != key)
+
+	def working_copy(self, d, expt_type):
+		copy = Datum(d.get_name(), d.get_raw_data())
+		if expt_type is not None:
+			copy.set_expt_type(expt_type)
+		copy.set_source(d.get_source())
+		return copy
+
+	def affine_copy(self, d):
+		copy = self.working_copy(d, d.get_expt_type())
+		copy.set_processed_data(d.get_processed_data())
+		copy.set_area(d.get_area())
+		copy.set_refelec(d.get_refelec())
+		copy.set_thermo_potential(d.get_thermo_potential())
+		return copy
+
+	def process(self, data, expt_type, **params):
+		"""
+		Processes each Datum with the processing function of expt_type, reusing earlier results computed with the same parameters
+
+		If only the area, reference electrode, or thermodynamic potential differ from an earlier result, that result is updated with fc.reprocess instead of processing the raw data again. Runs with export_data set always process the raw data so that the files are written, and are not cached.
+		"""
+		func = self.processes[expt_type]
+		params_key = repr(sorted(params.items()))
+		structure_key = self.structure_key(params)
+		defaults = inspect.signature(func).parameters
+		affine = {k:params.get(k, defaults[k].default) for k in self.affine_params if k in defaults}
+		processed = []
+		for d in data:
+			dkey = self.datum_key(d)
+			if dkey is None or params.get('export_data'):
+				processed.extend(func([self.working_copy(d, expt_type)], **params))
+				continue
+			key = (dkey, expt_type, structure_key)
+			cached = self.results.get(key)
+			if cached is not None and cached[0] == params_key:
+				result = cached[1]
+			elif cached is not None and expt_type in self.affine_types:
+				result = fc.reprocess([self.affine_copy(r) for r in cached[1]], **affine)
+			else:
+				result = func([self.working_copy(d, expt_type)], **params)
+			self.results[key] = (params_key, result)
+			self.results.move_to_end(key)
+			while len(self.results) > self.max_results:
+				self.results.popitem(last=False)
+			processed.extend(result)
+		return processed
+
+	def structure_key(self, params):
+		return repr(sorted((k, v) for k, v in params.items() if k not in self.affine_params))
+
+	def can_reprocess(self, data, expt_type, **params):
+		# whether process would only update cached results with fc.reprocess, without processing any raw data
+		if expt_type not in self.affine_types or params.get('export_data'):
+			return False
+		structure_key = self.structure_key(params)
+		return all((self.datum_key(d), expt_type, structure_key) in self.results for d in data)
+
+	def clear(self):
+		self.datums = {}
+		self.paths = {}
+		self.results = OrderedDict()
+
+class BlitManager():
+	"""
+	Redraws selected artists of a figure canvas over a cached background
+
+	Artists passed to set_artists are animated, so full draws of the canvas leave them out; after every full draw the rendered background is cached and the artists are drawn on top of it. update then draws only these artists over the cached background and blits the result, so editing them costs the same no matter how much data the rest of the figure contains. Changing the set of artists takes one full draw to cache a new background.
+	"""
+	def __init__(self, canvas):
+		self.canvas = canvas
+		self.background = None
+		self.artists = []
+		# original loc of each pinned legend
+		self.legend_locs = {}
+		self.canvas.mpl_connect('draw_event', self.on_draw)
+
+	def on_draw(self, event):
+		if self.canvas.is_saving() or event.canvas is not self.canvas:
+			# saved images already include the animated artists, and are drawn at a different resolution than the screen
+			self.background = None
+			return
+		self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+		self.draw_artists()
+
+	def draw_artists(self):
+		# skip artists which were removed or cleared from the figure since they were selected
+		fig = self.canvas.figure
+		for artist in self.artists:
+			if artist.axes in fig.axes:
+				fig.draw_artist(artist)
+
+	def set_artists(self, artists):
+		artists = [a for a in artists if a is not None]
+		if artists == self.artists:
+			return
+		for artist in self.artists:
+			artist.set_animated(False)
+			if artist not in artists and artist in self.legend_locs:
+				self.unpin_legend(artist)
+		for artist in artists:
+			artist.set_animated(True)
+			if isinstance(artist, Legend) and artist not in self.legend_locs:
+				self.pin_legend(artist)
+		self.artists = artists
+		self.background = None
+		self.canvas.draw_idle()
+
+	def pin_legend(self, legend):
+		# a legend placed with loc='best' searches all plotted data for its position on every draw; fix it where it currently is until unpin_legend
+		bbox = legend.get_window_extent()
+		self.legend_locs[legend] = legend._loc
+		self.set_legend_loc(legend, tuple(legend.axes.transAxes.inverted().transform(bbox.p0)))
+
+	def unpin_legend(self, legend):
+		self.set_legend_loc(legend, self.legend_locs.pop(legend))
+
+	def set_legend_loc(self, legend, loc):
+		# Legend.set_loc is public from matplotlib 3.8; older versions only have the setter of the _loc property, and no version has a public getter
+		if hasattr(legend, 'set_loc'):
+			legend.set_loc(loc)
+		else:
+			legend._loc = loc
+
+	def update(self):
+		if self.background is None:
+			self.canvas.draw_idle()
+			return
+		self.canvas.restore_region(self.background)
+		self.draw_artists()
+		self.canvas.blit(self.canvas.figure.bbox)
+
+class DataHandler():
+	def __init__(self, store):
+		self.store = store
 		self.folder = FuelcellUI.homedir
 		self.files = None
+		self.raw_data = []
 		self.data = []
 		self.expt_type = 'cp'
 		self.colone = 1
@@ -56,25 +299,58 @@ class DataHandler():
 		self.saveloc = ''
 
 	### actions ###
-	def load_raw_data(self):
-		all_data = fc.load_data(filename=self.files, folder=self.folder, expt_type=self.expt_type)
-		current_names = [d.get_name() for d in self.data]
-		new_data = [d for d in all_data if d.get_name() not in current_names]
-		self.data.extend(new_data)
+	def load_raw_data(self, progress=None, cancelled=None):
+		# unchanged files come back from the session store as the Datum objects already in self.raw_data; modified files are re-read and replace them
+		all_data = self.store.load(self.files, self.folder, self.expt_type, progress, cancelled)
+		current = {d.get_name():i for i, d in enumerate(self.raw_data)}
+		for d in all_data:
+			i = current.get(d.get_name())
+			if i is None:
+				self.raw_data.append(d)
+			elif self.raw_data[i] is not d:
+				self.raw_data[i] = d
+
+	def process_data(self, progress=None, partial=None, cancelled=None):
+		self.load_raw_data(progress, cancelled)
+		processed = []
+		for i, d in enumerate(self.raw_data):
+			check_cancelled(cancelled)
+			new_data = self.process_datums([d])
+			processed.extend(new_data)
+			report_progress(progress, i+1, len(self.raw_data), 'Processed ' + d.get_name())
+			if partial is not None:
+				partial(new_data)
+		self.data = processed
+		return self.data
+
+	def reprocess_data(self):
+		# if only area, reference electrode, or thermodynamic potential changed, the session store updates the cached results instead of processing the raw data again; returns None if that is not possible
+		params = self.process_params()
+		if params is None or not self.store.can_reprocess(self.raw_data, self.expt_type, **params):
+			return None
+		self.data = self.store.process(self.raw_data, self.expt_type, **params)
+		return self.data
 
-	def process_data(self):
-		self.load_raw_data()
+	def process_datums(self, data):
+		params = self.process_params()
+		if params is None:
+			return data
+		return self.store.process(data, self.expt_type, **params)
+
+	def process_params(self):
+		params = {'area':self.area, 'export_data':self.export_data, 'save_dir':self.saveloc}
 		if self.expt_type == 'cv':
-			fc.cv_process(data=self.data, potential_column=self.colone, current_column=self.coltwo, area=self.area, reference=self.refelec, export_data=self.export_data, save_dir=self.saveloc)
+			params.update(potential_column=self.colone, current_column=self.coltwo, reference=self.refelec)
 		elif self.expt_type == 'lsv':
-			fc.lsv_process(data=self.data, potential_column=self.colone, current_column=self.coltwo, area=self.area, reference=self.refelec, thermo_potential=self.rxn, export_data=self.export_data, save_dir=self.saveloc)
-		elif self.expt_type == 'cp':
-			fc.cp_process(data=self.data, potential_column=self.colone, current_column=self.coltwo, area=self.area, reference=self.refelec, thermo_potential=self.rxn, export_data=self.export_data, save_dir=self.saveloc, pts_to_avg=self.pts_to_avg, pyramic=self.pyr)
-		elif self.expt_type == 'ca':
-			fc.ca_process(data=self.data, potential_column=self.colone, current_column=self.coltwo, area=self.area, reference=self.refelec, thermo_potential=self.rxn, export_data=self.export_data, save_dir=self.saveloc, pts_to_avg=self.pts_to_avg, pyramic=self.pyr)
+			params.update(potential_column=self.colone, current_column=self.coltwo, reference=self.refelec, thermo_potential=self.rxn)
+		elif self.expt_type in ['cp', 'ca']:
+			params.update(potential_column=self.colone, current_column=self.coltwo, reference=self.refelec, thermo_potential=self.rxn, pts_to_average=self.pts_to_avg, pyramid=self.pyr)
 		elif self.expt_type == 'eis':
-			new_data = fc.eis_process(self.data, real_column=self.colone, imag_column=self.coltwo, export_data=self.export_data, save_dir=self.saveloc)
-			self.data = new_data
+			params.update(real_column=self.colone, imag_column=self.coltwo)
+			del params['area']
+		else:
+			return None
+		return params
 
 	### accessors ###
 	def get_folder(self):
@@ -112,7 +388,7 @@ class DataHandler():
 		self.area = new_area	
 
 	def set_refelec(self, new_val):
-		self.refelec = newval
+		self.refelec = new_val
 
 	def set_rxn(self, new_val):
 		self.rxn = new_val
@@ -130,7 +406,8 @@ class DataHandler():
 		self.saveloc = new_path
 
 class VisualHandler():
-	def __init__(self):
+	def __init__(self, store):
+		self.store = store
 		self.data = []
 		self.plot_data = []
 		self.eis_data = []
@@ -150,36 +427,33 @@ class VisualHandler():
 		self.expt_codes = {0:['ca', 'cp'], 1:['cv'], 2:['lsv'], 3:['eis']}
 	
 	### actions ###
-	def load_data(self):
-		new_data = fc.datums.load_data(filename=self.datafiles, folder=self.datafolder)
+	def load_data(self, progress=None, partial=None, cancelled=None):
+		# plot working copies, so the Datum objects shared through the session store are left unprocessed
+		new_data = [self.store.working_copy(d, d.get_expt_type()) for d in self.store.load(self.datafiles, self.datafolder, progress=progress, cancelled=cancelled)]
 		for this_data in new_data:
-			if this_data.get_processed_data() is None:
-				this_data.set_processed_data(this_data.get_raw_data())
+			this_data.set_processed_data(this_data.get_raw_data())
 		self.data.extend(new_data)
+		return new_data
+
+	def load_eis(self, progress=None, partial=None, cancelled=None):
+		new_data = self.store.load(self.datafiles, self.datafolder, progress=progress, cancelled=cancelled)
+		check_cancelled(cancelled)
+		report_progress(progress, 0, 1, 'Fitting impedance spectra')
+		self.eis_data = self.store.process(new_data, 'eis')
+		report_progress(progress, 1, 1, 'Fitted impedance spectra')
+		return self.eis_data
 
-	def load_eis(self):
-		new_data = fc.datums.load_data(filename=self.datafiles, folder=self.datafolder)
-		for this_data in new_data:
-			this_data.set_expt_type('eis')
-			if this_data.get_processed_data() is None:
-				this_data.set_processed_data(this_data.get_raw_data())
-		self.eis_data = fc.datums.eis_process(new_data)
-
-	def load_tafel(self):
-		new_data = fc.datums.load_data(filename=self.datafiles, folder=self.datafolder)
-		for this_data in new_data:
-			this_data.set_expt_type('lsv')
-			if this_data.get_processed_data() is None:
-				this_data.set_processed_data(this_data.get_raw_data())
-		self.tafel_data = fc.datums.lsv_process(new_data)
+	def load_tafel(self, progress=None, partial=None, cancelled=None):
+		new_data = self.store.load(self.datafiles, self.datafolder, progress=progress, cancelled=cancelled)
+		check_cancelled(cancelled)
+		self.tafel_data = self.store.process(new_data, 'lsv')
+		return self.tafel_data
 	
-	def load_bayes(self):
-		new_data = fc.datums.load_data(filename=self.datafiles, folder=self.datafolder)
-		for this_data in new_data:
-			this_data.set_expt_type('lsv')
-			if this_data.get_processed_data() is None:
-				this_data.set_processed_data(this_data.get_raw_data())
-		self.bayes_data = fc.datums.lsv_process(new_data)
+	def load_bayes(self, progress=None, partial=None, cancelled=None):
+		new_data = self.store.load(self.datafiles, self.datafolder, progress=progress, cancelled=cancelled)
+		check_cancelled(cancelled)
+		self.bayes_data = self.store.process(new_data, 'lsv')
+		return self.bayes_data
 
 	def draw_plot(self, ax):
 		self.plot_data = [d for d in self.data if d.get_expt_type() in self.expt_codes[self.vis_code]]
@@ -353,30 +627,79 @@ class UploadHandler():
 		self.basedir = new_dir
 
 class TableModel(QtCore.QAbstractTableModel):
-	def __init__(self, data):
+	"""
+	Virtualized table model backed by NumPy column arrays
+
+	Rows are exposed to the view in batches of batch_size through canFetchMore/fetchMore, so the view only lays out the rows it has scrolled to. Cells are formatted one block of block_rows rows at a time when the view first asks for them, and the formatted blocks are kept in a least-recently-used cache holding at most cache_blocks blocks.
+	"""
+	def __init__(self, data, batch_size=1000, block_rows=256, cache_blocks=512):
 		super().__init__()
-		self._data = data
+		self._columns = [np.ascontiguousarray(data.iloc[:,j].to_numpy()) for j in range(data.shape[1])]
+		self._labels = [str(c) for c in data.columns]
+		self._index = data.index.to_numpy()
+		self._nrows = data.shape[0]
+		self._loaded = min(self._nrows, batch_size)
+		self.batch_size = batch_size
+		self.block_rows = block_rows
+		self.cache_blocks = cache_blocks
+		self._cache = OrderedDict()
+
+	def format_block(self, block, col):
+		start = block * self.block_rows
+		values = self._columns[col][start:start+self.block_rows]
+		if values.dtype.kind == 'f':
+			return np.char.mod('%.4f', values).tolist()
+		return [('%.4f' % v) if isinstance(v, float) else str(v) for v in values]
+
+	def get_block(self, block, col):
+		key = (block, col)
+		try:
+			self._cache.move_to_end(key)
+			return self._cache[key]
+		except KeyError:
+			strings = self.format_block(block, col)
+			self._cache[key] = strings
+			if len(self._cache) > self.cache_blocks:
+				self._cache.popitem(last=False)
+			return strings
 
 	def data(self, index, role):
 		if role == Qt.DisplayRole:
-			value = self._data.iloc[index.row(), index.column()]
-			if isinstance(value, float):
-				value = "%.4f" % value
-			return str(value)
+			block, offset = divmod(index.row(), self.block_rows)
+			return self.get_block(block, index.column())[offset]
 
 	def rowCount(self, index):
-		return self._data.shape[0]
+		if index.isValid():
+			return 0
+		return self._loaded
 
 	def columnCount(self, index):
-		return self._data.shape[1]
+		if index.isValid():
+			return 0
+		return len(self._columns)
+
+	def canFetchMore(self, index):
+		if index.isValid():
+			return False
+		return self._loaded < self._nrows
+
+	def fetchMore(self, index):
+		if index.isValid():
+			return
+		num = min(self.batch_size, self._nrows - self._loaded)
+		if num <= 0:
+			return
+		self.beginInsertRows(QtCore.QModelIndex(), self._loaded, self._loaded + num - 1)
+		self._loaded += num
+		self.endInsertRows()
 		
 	def headerData(self, section, orientation, role):
 		# section is the index of the column/row.
 		if role == Qt.DisplayRole:
 			if orientation == Qt.Horizontal:
-				return str(self._data.columns[section])
+				return self._labels[section]
 			if orientation == Qt.Vertical:
-				return str(self._data.index[section])
+				return str(self._index[section])
 
 class FuelcellWindow(QMainWindow):
 	def __init__(self):
@@ -453,8 +776,9 @@ class FuelcellUI(QTabWidget):
 		# self.tintin = ['blistering barnacles', 'thundering typhoon', 'my jewels!', 'woah!']
 		self.window = main_window
 		self.window.setCentralWidget(self)
-		self.datahandler = DataHandler()
-		self.vishandler = VisualHandler()
+		self.store = SessionStore()
+		self.datahandler = DataHandler(self.store)
+		self.vishandler = VisualHandler(self.store)
 		self.uploader = UploadHandler()
 
 		self.data_tab = self.makeTab(self.datums_layout(), 'Data Processing')
@@ -473,6 +797,23 @@ class FuelcellUI(QTabWidget):
 		self.line_dict_eis = {}
 		self.line_dict_tafel = {}
 
+		# style and fit edits redraw only the affected artists
+		self.blit_vis = BlitManager(self.figcanvas_vis)
+		self.blit_tafel = BlitManager(self.figcanvas_tafel)
+		self.tafel_artists = None
+
+		# background workers
+		self.threadpool = QThreadPool.globalInstance()
+		self.workers = []
+		self.progressbar = QProgressBar()
+		self.progressbar.setMaximumWidth(200)
+		self.progressbar.setVisible(False)
+		self.cancel_btn = QPushButton('Cancel')
+		self.cancel_btn.setVisible(False)
+		self.cancel_btn.clicked.connect(self.cancel_action)
+		self.window.statusbar.addPermanentWidget(self.progressbar)
+		self.window.statusbar.addPermanentWidget(self.cancel_btn)
+
 	def makeTab(self, layout, name):
 		tab = QWidget()
 		tab.setLayout(layout)
@@ -482,6 +823,49 @@ class FuelcellUI(QTabWidget):
 	def update_status(self, message):
 		self.window.statusbar.showMessage(message, 10000)
 
+	### background workers ###
+	def start_worker(self, fn, on_result, on_partial=None, on_error=None, buttons=[]):
+		worker = Worker(fn)
+		worker.signals.progress.connect(self.progress_action)
+		worker.signals.result.connect(on_result)
+		if on_partial is not None:
+			worker.signals.partial.connect(on_partial)
+		if on_error is None:
+			on_error = self.error_action
+		worker.signals.error.connect(on_error)
+		worker.signals.cancelled.connect(lambda: self.update_status('Cancelled'))
+		worker.signals.finished.connect(lambda: self.worker_finished(worker, buttons))
+		for btn in buttons:
+			btn.setEnabled(False)
+		self.workers.append(worker)
+		self.progressbar.setRange(0, 0)
+		self.progressbar.setVisible(True)
+		self.cancel_btn.setVisible(True)
+		self.threadpool.start(worker)
+		return worker
+
+	def worker_finished(self, worker, buttons):
+		if worker in self.workers:
+			self.workers.remove(worker)
+		for btn in buttons:
+			btn.setEnabled(True)
+		if not self.workers:
+			self.progressbar.setVisible(False)
+			self.cancel_btn.setVisible(False)
+
+	def progress_action(self, i, n, message):
+		self.progressbar.setRange(0, n)
+		self.progressbar.setValue(i)
+		self.update_status(f'{message} ({i}/{n})')
+
+	def error_action(self, e):
+		self.update_status('ERROR: ' + str(e))
+
+	def cancel_action(self):
+		for worker in self.workers:
+			worker.cancel()
+		self.update_status('Cancelling...')
+
 	def close(self):
 		sys.exit()
 
@@ -808,6 +1192,7 @@ class FuelcellUI(QTabWidget):
 		try:
 			area = float(area)
 			self.datahandler.set_area(area)
+			self.reprocess_action()
 		except ValueError as e:
 			self.update_status('MEA area must be a number')
 
@@ -831,6 +1216,7 @@ class FuelcellUI(QTabWidget):
 			val = 0
 			self.update_status('Reference electrode potential must be a number')
 		self.datahandler.set_refelec(val)
+		self.reprocess_action()
 
 	def rxn_menu_action(self):
 		rxn = self.rxn_menu.currentText()
@@ -852,6 +1238,7 @@ class FuelcellUI(QTabWidget):
 			val = 0
 			self.update_status('Thermodynamic potential must be a number')
 		self.datahandler.set_rxn(val)
+		self.reprocess_action()
 
 	def pyr_action(self):
 		state = self.pyr_chkbx.isChecked()
@@ -884,8 +1271,40 @@ class FuelcellUI(QTabWidget):
 		# self.folder_txtbx_upload.setText(folder)
 
 	def process_action(self):
+		self.datatable_selector.clear()
+		self.data_dict = {}
+		self.start_worker(self.datahandler.process_data, self.process_finished, self.process_partial, self.process_error, [self.process_btn])
+
+	def reprocess_action(self):
+		# apply area, reference electrode, and thermodynamic potential changes to already processed data right away; anything which needs the raw data processed again runs in a worker like the process button
+		if not self.datahandler.get_data() or self.workers or self.datahandler.export_data:
+			return
+		try:
+			data = self.datahandler.reprocess_data()
+		except Exception as e:
+			self.update_status('ERROR: ' + str(e))
+			return
+		if data is None:
+			self.process_action()
+		else:
+			self.process_finished(data)
+
+	def process_partial(self, new_data):
+		# make processed files browsable while the rest are still being processed
+		for d in new_data:
+			if d.get_processed_data() is not None and d.get_name() not in self.data_dict:
+				self.data_dict[d.get_name()] = d.get_processed_data()
+				self.datatable_selector.addItem(d.get_name())
+				self.datatable_selector.setEnabled(True)
+
+	def process_error(self, e):
+		if isinstance(e, AttributeError):
+			self.update_status('All selected files must match the selected experiment type')
+		else:
+			self.update_status('ERROR: ' + str(e))
+
+	def process_finished(self, data):
 		try:
-			self.datahandler.process_data()
 			data = self.datahandler.get_data()
 			self.vishandler.set_data(data)
 			self.datatable_selector.clear()
@@ -1323,8 +1742,10 @@ class FuelcellUI(QTabWidget):
 			self.update_status('ERROR: ' + str(e))
 
 	def loaddata_action_vis(self):
+		self.start_worker(self.vishandler.load_data, self.loaddata_finished_vis, buttons=[self.loaddata_btn_vis])
+
+	def loaddata_finished_vis(self, data):
 		try:
-			self.vishandler.load_data()
 			self.draw_plot_vis()
 		except Exception as e:
 			self.update_status('ERROR: ' + str(e))
@@ -1420,7 +1841,7 @@ class FuelcellUI(QTabWidget):
 			if self.drawerror_chkbx_vis.isChecked() and i%3 != 0:
 				continue
 			l.set_linestyle(ls)
-		self.figcanvas_vis.draw()
+		self.figcanvas_vis.draw_idle()
 
 	def drawscatter_action_vis(self):
 		state = self.drawscatter_chkbx_vis.isChecked()
@@ -1435,7 +1856,7 @@ class FuelcellUI(QTabWidget):
 			if self.drawerror_chkbx_vis.isChecked() and i%3 !=0:
 				continue
 			l.set_marker(ms)
-		self.figcanvas_vis.draw()
+		self.figcanvas_vis.draw_idle()
 
 	def drawerror_action_vis(self):
 		state = self.drawerror_chkbx_vis.isChecked()
@@ -1445,23 +1866,23 @@ class FuelcellUI(QTabWidget):
 	def shwowleg_action_vis(self):
 		state = self.showleg_chkbx_vis.isChecked()
 		ax = self.get_ax_vis()
+		if ax.get_legend() is not None:
+			ax.get_legend().remove()
 		if state:
 			ax.legend(loc='best', edgecolor='#000000')
-		else:
-			ax.legend().remove()
-		self.figcanvas_vis.draw()
+		self.figcanvas_vis.draw_idle()
 	
 	def xlabel_action_vis(self):
 		new_label = self.xlabel_txtbx_vis.text()
 		ax = self.get_ax_vis()
 		ax.set_xlabel(new_label)
-		self.figcanvas_vis.draw()
+		self.figcanvas_vis.draw_idle()
 
 	def ylabel_action_vis(self):
 		new_label = self.ylabel_txtbx_vis.text()
 		ax = self.get_ax_vis()
 		ax.set_ylabel(new_label)
-		self.figcanvas_vis.draw()
+		self.figcanvas_vis.draw_idle()
 
 	def xlim_action_vis(self):
 		xmin_text = self.xmin_txtbx_vis.text()
@@ -1477,7 +1898,7 @@ class FuelcellUI(QTabWidget):
 			ax.set_xbound(upper=xmax)
 		except ValueError:
 			self.update_status('xmax must be a number')
-		self.figcanvas_vis.draw()
+		self.figcanvas_vis.draw_idle()
 
 	def ylim_action_vis(self):
 		ymin_text = self.ymin_txtbx_vis.text()
@@ -1493,10 +1914,11 @@ class FuelcellUI(QTabWidget):
 			ax.set_ybound(upper=ymax)
 		except ValueError:
 			self.update_status('ymax must be a number')
-		self.figcanvas_vis.draw()
+		self.figcanvas_vis.draw_idle()
 
 	def clear_action_vis(self):
 		self.vishandler.set_data([], replace=True)
+		self.blit_vis.set_artists([])
 		fig = self.figcanvas_vis.figure
 		fig.clf()
 		self.lineselector_menu_vis.clear()
@@ -1511,7 +1933,7 @@ class FuelcellUI(QTabWidget):
 			height = float(height)
 			fig.set_figwidth(width)
 			fig.set_figheight(height)
-			self.figcanvas_vis.draw()
+			self.figcanvas_vis.draw_idle()
 		except ValueError:
 			self.update_status('Figure width and height must be numbers')
 
@@ -1529,6 +1951,7 @@ class FuelcellUI(QTabWidget):
 			self.linewidth_txtbx_vis.setValue(linewidth)
 			self.markerstyle_menu_vis.setCurrentText(Line2D.markers[markerstyle])
 			self.markersize_txtbx_vis.setValue(int(markersize))
+			self.restyle_vis(data)
 		except KeyError:
 			pass
 
@@ -1542,8 +1965,7 @@ class FuelcellUI(QTabWidget):
 				line = data.get_line()
 				line.set_label(new_label)
 				data.set_label(new_label)
-				self.shwowleg_action_vis()
-				self.figcanvas_vis.draw()
+				self.restyle_vis(data)
 				self.line_dict_vis = {d.get_label():d for d in self.vishandler.get_plot_data()}
 				self.lineselector_menu_vis.clear()
 				for n in self.line_dict_vis.keys():
@@ -1560,9 +1982,8 @@ class FuelcellUI(QTabWidget):
 			old_color = line.get_color()
 			qd = QColorDialog()
 			new_color = qd.getColor(initial=QColor(old_color)).name(QColor.HexRgb)
-			line.set_color(new_color)
-			self.shwowleg_action_vis()
-			self.figcanvas_vis.draw()
+			fc.visuals.update_artists(data, color=new_color)
+			self.restyle_vis(data)
 		except KeyError:
 			pass
 
@@ -1571,10 +1992,8 @@ class FuelcellUI(QTabWidget):
 			label = self.lineselector_menu_vis.currentText()
 			ls = self.linestyle_menu_vis.currentText()
 			data = self.line_dict_vis[label]
-			line = data.get_line()
-			line.set_linestyle(ls)
-			self.shwowleg_action_vis()
-			self.figcanvas_vis.draw()
+			fc.visuals.update_artists(data, ls=ls)
+			self.restyle_vis(data)
 		except KeyError:
 			pass
 
@@ -1583,10 +2002,8 @@ class FuelcellUI(QTabWidget):
 			label = self.lineselector_menu_vis.currentText()
 			lw = self.linewidth_txtbx_vis.value()
 			data = self.line_dict_vis[label]
-			line = data.get_line()
-			line.set_linewidth(lw)
-			self.shwowleg_action_vis()
-			self.figcanvas_vis.draw()
+			fc.visuals.update_artists(data, lw=lw)
+			self.restyle_vis(data)
 		except KeyError:
 			pass
 
@@ -1595,10 +2012,8 @@ class FuelcellUI(QTabWidget):
 			label = self.lineselector_menu_vis.currentText()
 			m = self.markerstyle_menu_vis.currentText()
 			data = self.line_dict_vis[label]
-			line = data.get_line()
-			line.set_marker(FuelcellUI.markerstyles_rev[m])
-			self.shwowleg_action_vis()
-			self.figcanvas_vis.draw()
+			fc.visuals.update_artists(data, marker=FuelcellUI.markerstyles_rev[m])
+			self.restyle_vis(data)
 		except KeyError:
 			pass
 
@@ -1607,13 +2022,21 @@ class FuelcellUI(QTabWidget):
 			label = self.lineselector_menu_vis.currentText()
 			ms = self.markersize_txtbx_vis.value()
 			data = self.line_dict_vis[label]
-			line = data.get_line()
-			line.set_markersize(int(ms))
-			self.shwowleg_action_vis()
-			self.figcanvas_vis.draw()
+			fc.visuals.update_artists(data, ms=int(ms))
+			self.restyle_vis(data)
 		except KeyError:
 			pass
 
+	def restyle_vis(self, data):
+		# update the legend in place where possible and blit the edited line instead of drawing the whole figure
+		ax = self.get_ax_vis()
+		legend = fc.visuals.sync_legend(ax)
+		if legend is None and self.showleg_chkbx_vis.isChecked():
+			self.shwowleg_action_vis()
+			legend = ax.get_legend()
+		self.blit_vis.set_artists(fc.visuals.update_artists(data) + [legend])
+		self.blit_vis.update()
+
 	def choose_saveloc_vis(self):
 		fd = QFileDialog()
 		fd.setViewMode(QFileDialog.Detail)
@@ -1639,6 +2062,7 @@ class FuelcellUI(QTabWidget):
 			self.update_status('ERROR: ' + str(e))
 
 	def draw_plot_vis(self):
+		self.blit_vis.set_artists([])
 		fig = self.figcanvas_vis.figure
 		fig.clf()
 		ax = fig.subplots()
@@ -1655,7 +2079,7 @@ class FuelcellUI(QTabWidget):
 			self.lineselector_menu_vis.addItem(n)
 		self.shwowleg_action_vis()
 		ax.tick_params(axis='both', direction='in')
-		self.figcanvas_vis.draw()
+		self.figcanvas_vis.draw_idle()
 
 	def get_ax_vis(self):
 		fig = self.figcanvas_vis.figure
@@ -1824,6 +2248,9 @@ class FuelcellUI(QTabWidget):
 		self.ylabel_lbl_tafel = QLabel('y-axis label')
 		self.ylabel_txtbx_tafel = QLineEdit('Overpotential [V]')
 		# current limits
+		self.auto_chkbx_tafel = QCheckBox('Automatic bounds')
+		self.auto_chkbx_tafel.setCheckState(Qt.Unchecked)
+		self.auto_chkbx_tafel.setLayoutDirection(Qt.RightToLeft)
 		self.mincurr_lbl_tafel = QLabel('Lower bound')
 		self.mincurr_txtbx_tafel = QLineEdit()
 		self.maxcurr_lbl_tafel = QLabel('Upper bound')
@@ -1847,9 +2274,12 @@ class FuelcellUI(QTabWidget):
 		self.ymax_txtbx_tafel.textChanged.connect(self.ylim_action_tafel)
 		self.mincurr_txtbx_tafel.textChanged.connect(self.mincurr_action_tafel)
 		self.maxcurr_txtbx_tafel.textChanged.connect(self.maxcurr_action_tafel)
+		self.auto_chkbx_tafel.stateChanged.connect(self.auto_action_tafel)
 		# build layout
 		layout = QGridLayout()
 		row = 0
+		layout.addWidget(self.auto_chkbx_tafel, row, 0, 1, -1, Qt.AlignLeft)
+		row += 1
 		layout.addWidget(self.mincurr_lbl_tafel, row, 0, 1, 2, Qt.AlignLeft)
 		layout.addWidget(self.mincurr_txtbx_tafel, row, 2, 1, 2, Qt.AlignLeft)
 		row += 1
@@ -1987,11 +2417,7 @@ class FuelcellUI(QTabWidget):
 			self.update_status('ERROR: ' + str(e))
 
 	def loaddata_action_tafel(self):
-		try:
-			self.vishandler.load_tafel()
-			self.draw_plot_tafel()
-		except Exception as e:
-			self.update_status('ERROR: ' + str(e))
+		self.start_worker(self.vishandler.load_tafel, lambda data: self.draw_plot_tafel(), buttons=[self.loaddata_btn_tafel])
 
 	def xcol_action_tafel(self):
 		col = self.xcol_txtbx_tafel.text()
@@ -2021,15 +2447,7 @@ class FuelcellUI(QTabWidget):
 			new_max = None
 			self.update_status('bounds must be numbers')
 		try:
-			fig = self.figcanvas_tafel.figure
-			fig.clf()
-			ax = self.figcanvas_tafel.figure.subplots()
-			this_data = self.tafel_dict[self.lineselector_menu_tafel.currentText()]
-			fc.visuals.plot_tafel(data=[this_data], ax=ax, imin=new_min, imax=new_max)
-			self.tafel_slope_val.setText(str(this_data.get_tafel_slope()))
-			self.tafel_exchg_val.setText(str(this_data.get_exchg_curr()))
-			self.tafel_rsq_val.setText(str(this_data.get_tafel_rsq()))
-			self.figcanvas_tafel.draw()
+			self.refit_tafel(imin=new_min, imax=new_max)
 		except Exception as e:
 			self.update_status('ERROR: ' + str(e))
 
@@ -2047,29 +2465,67 @@ class FuelcellUI(QTabWidget):
 			new_max = None
 			self.update_status('bounds must be numbers')
 		try:
-			fig = self.figcanvas_tafel.figure
-			fig.clf()
-			ax = self.figcanvas_tafel.figure.subplots()
-			this_data = self.tafel_dict[self.lineselector_menu_tafel.currentText()]
-			fc.visuals.plot_tafel(data=[this_data], ax=ax, imax=new_max, imin=new_min)
-			self.tafel_slope_val.setText(str(this_data.get_tafel_slope()))
-			self.tafel_exchg_val.setText(str(this_data.get_exchg_curr()))
-			self.tafel_rsq_val.setText(str(this_data.get_tafel_rsq()))
-			self.figcanvas_tafel.draw()
+			self.refit_tafel(imin=new_min, imax=new_max)
 		except Exception as e:
 			self.update_status('ERROR: ' + str(e))
 	
+	def auto_action_tafel(self):
+		state = self.auto_chkbx_tafel.isChecked()
+		self.mincurr_lbl_tafel.setEnabled(not state)
+		self.mincurr_txtbx_tafel.setEnabled(not state)
+		self.maxcurr_lbl_tafel.setEnabled(not state)
+		self.maxcurr_txtbx_tafel.setEnabled(not state)
+		if not state:
+			self.mincurr_action_tafel()
+			return
+		try:
+			self.refit_tafel(auto=True)
+		except Exception as e:
+			self.update_status('ERROR: ' + str(e))
+
+	def refit_tafel(self, imin=None, imax=None, auto=False):
+		# move the fit bounds and fitted line of the current plot and blit them instead of replotting the data
+		this_data = self.tafel_dict[self.lineselector_menu_tafel.currentText()]
+		if self.tafel_artists is None:
+			self.plot_tafel_data(this_data, imin, imax, auto)
+			return
+		self.tafel_artists = fc.visuals.plot_tafel_fit(this_data, self.get_ax_tafel(), imin, imax, auto, artists=self.tafel_artists)
+		self.update_tafel_values(this_data)
+		self.blit_tafel.update()
+
+	def plot_tafel_data(self, data, imin=None, imax=None, auto=False):
+		self.blit_tafel.set_artists([])
+		fig = self.figcanvas_tafel.figure
+		fig.clf()
+		ax = fig.subplots()
+		fc.visuals.plot_tafel(data=[data], ax=ax, plot_slope=False)
+		self.tafel_artists = fc.visuals.plot_tafel_fit(data, ax, imin, imax, auto)
+		self.blit_tafel.set_artists(self.tafel_artists)
+		self.update_tafel_values(data)
+
+	def update_tafel_values(self, data):
+		self.tafel_slope_val.setText(str(data.get_tafel_slope()))
+		self.tafel_exchg_val.setText(str(data.get_exchg_curr()))
+		self.tafel_rsq_val.setText(str(data.get_tafel_rsq()))
+		if self.auto_chkbx_tafel.isChecked() and self.tafel_artists is not None:
+			# show the automatically selected bounds, read from the plotted bound lines, without triggering a manual refit
+			lower, upper, _ = self.tafel_artists
+			for txtbx, val in zip([self.mincurr_txtbx_tafel, self.maxcurr_txtbx_tafel], [lower.get_xdata()[0], upper.get_xdata()[0]]):
+				txtbx.blockSignals(True)
+				txtbx.setText(f'{val:.4g}')
+				txtbx.blockSignals(False)
+
 	def xlabel_action_tafel(self):
 		new_label = self.xlabel_txtbx_tafel.text()
 		ax = self.get_ax_tafel()
 		ax.set_xlabel(new_label)
-		self.figcanvas_tafel.draw()
+		self.figcanvas_tafel.draw_idle()
 
 	def ylabel_action_tafel(self):
 		new_label = self.ylabel_txtbx_tafel.text()
 		ax = self.get_ax_tafel()
 		ax.set_ylabel(new_label)
-		self.figcanvas_tafel.draw()
+		self.figcanvas_tafel.draw_idle()
 
 	def xlim_action_tafel(self):
 		xmin_text = self.xmin_txtbx_tafel.text()
@@ -2085,7 +2541,7 @@ class FuelcellUI(QTabWidget):
 			ax.set_xbound(upper=xmax)
 		except ValueError:
 			self.update_status('xmax must be a number')
-		self.figcanvas_tafel.draw()
+		self.figcanvas_tafel.draw_idle()
 
 	def ylim_action_tafel(self):
 		ymin_text = self.ymin_txtbx_tafel.text()
@@ -2101,7 +2557,7 @@ class FuelcellUI(QTabWidget):
 			ax.set_ybound(upper=ymax)
 		except ValueError:
 			self.update_status('ymax must be a number')
-		self.figcanvas_tafel.draw()
+		self.figcanvas_tafel.draw_idle()
 
 	def figsize_action_tafel(self):
 		fig = self.figcanvas_tafel.figure
@@ -2112,7 +2568,7 @@ class FuelcellUI(QTabWidget):
 			height = float(height)
 			fig.set_figwidth(width)
 			fig.set_figheight(height)
-			self.figcanvas_tafel.draw()
+			self.figcanvas_tafel.draw_idle()
 		except ValueError:
 			self.update_status('Figure width and height must be numbers')
 
@@ -2120,14 +2576,7 @@ class FuelcellUI(QTabWidget):
 		try:
 			new_label = self.lineselector_menu_tafel.currentText()
 			new_data = self.tafel_dict[new_label]
-			fig = self.figcanvas_tafel.figure
-			fig.clf()
-			ax = self.figcanvas_tafel.figure.subplots()
-			fc.visuals.plot_tafel(data=[new_data], ax=ax)
-			self.figcanvas_tafel.draw()
-			self.tafel_slope_val.setText(str(new_data.get_tafel_slope()))
-			self.tafel_exchg_val.setText(str(new_data.get_exchg_curr()))
-			self.tafel_rsq_val.setText(str(new_data.get_tafel_rsq()))
+			self.plot_tafel_data(new_data, auto=self.auto_chkbx_tafel.isChecked())
 		except TypeError:
 			self.update_status('Invalid fit parameters')
 
@@ -2157,9 +2606,6 @@ class FuelcellUI(QTabWidget):
 
 	def draw_plot_tafel(self):
 		try:
-			fig = self.figcanvas_tafel.figure
-			fig.clf()
-			ax = self.figcanvas_tafel.figure.subplots()
 			tafel_data = self.vishandler.get_tafel_data()
 			self.tafel_dict = {d.get_label():d for d in tafel_data}
 			for n in self.tafel_dict.keys():
@@ -2169,11 +2615,7 @@ class FuelcellUI(QTabWidget):
 			# data =  self.tafel_dict[name]
 			# self.hfrsemi_val.setText(str(data.get_hfr()))
 			# self.hfrlin_val.setText(str(data.get_hfr_linear()))
-			fc.visuals.plot_tafel(data=[this_data], ax=ax)
-			self.tafel_slope_val.setText(str(this_data.get_tafel_slope()))
-			self.tafel_exchg_val.setText(str(this_data.get_exchg_curr()))
-			self.tafel_rsq_val.setText(str(this_data.get_tafel_rsq()))
-			self.figcanvas_tafel.draw()
+			self.plot_tafel_data(this_data, auto=self.auto_chkbx_tafel.isChecked())
 		except Exception as e:
 			self.update_status('ERROR: ' + str(e))
 
@@ -2492,11 +2934,7 @@ class FuelcellUI(QTabWidget):
 			self.update_status('ERROR: ' + str(e))
 
 	def loaddata_action_bayes(self):
-		try:
-			self.vishandler.load_bayes()
-			self.draw_plot_bayes()
-		except Exception as e:
-			self.update_status('ERROR: ' + str(e))
+		self.start_worker(self.vishandler.load_bayes, lambda data: self.draw_plot_bayes(), buttons=[self.loaddata_btn_bayes])
 
 	def xcol_action_bayes(self):
 		col = self.xcol_txtbx_bayes.text()
@@ -2516,13 +2954,13 @@ class FuelcellUI(QTabWidget):
 		new_label = self.xlabel_txtbx_bayes.text()
 		ax = self.get_ax_bayes()
 		ax.set_xlabel(new_label)
-		self.figcanvas_bayes_cdf.draw()
+		self.figcanvas_bayes_cdf.draw_idle()
 
 	def ylabel_action_bayes(self):
 		new_label = self.ylabel_txtbx_bayes.text()
 		ax = self.get_ax_bayes()
 		ax.set_ylabel(new_label)
-		self.figcanvas_bayes_cdf.draw()
+		self.figcanvas_bayes_cdf.draw_idle()
 
 	def xlim_action_bayes(self):
 		xmin_text = self.xmin_txtbx_bayes.text()
@@ -2538,7 +2976,7 @@ class FuelcellUI(QTabWidget):
 			ax.set_xbound(upper=xmax)
 		except ValueError:
 			self.update_status('xmax must be a number')
-		self.figcanvas_bayes_cdf.draw()
+		self.figcanvas_bayes_cdf.draw_idle()
 
 	def ylim_action_bayes(self):
 		ymin_text = self.ymin_txtbx_bayes.text()
@@ -2554,7 +2992,7 @@ class FuelcellUI(QTabWidget):
 			ax.set_ybound(upper=ymax)
 		except ValueError:
 			self.update_status('ymax must be a number')
-		self.figcanvas_bayes_cdf.draw()
+		self.figcanvas_bayes_cdf.draw_idle()
 
 	def figsize_action_bayes(self):
 		fig = self.figcanvas_bayes_cdf.figure
@@ -2565,7 +3003,7 @@ class FuelcellUI(QTabWidget):
 			height = float(height)
 			fig.set_figwidth(width)
 			fig.set_figheight(height)
-			self.figcanvas_bayes_cdf.draw()
+			self.figcanvas_bayes_cdf.draw_idle()
 		except ValueError:
 			self.update_status('Figure width and height must be numbers')
 
@@ -2583,8 +3021,8 @@ class FuelcellUI(QTabWidget):
 			fc.visuals.plot_lsv(data=[new_data], ax=ax_cdf)
 			fc.visuals.plot_lsv(data=[new_data], ax=ax_kde)
 			###########################
-			self.figcanvas_bayes_cdf.draw()
-			self.figcanvas_bayes_kde.draw()
+			self.figcanvas_bayes_cdf.draw_idle()
+			self.figcanvas_bayes_kde.draw_idle()
 		except TypeError:
 			self.update_status('Invalid fit parameters')
 
@@ -2634,8 +3072,8 @@ class FuelcellUI(QTabWidget):
 			fc.visuals.plot_lsv(data=[this_data], ax=ax_cdf)
 			fc.visuals.plot_lsv(data=[this_data], ax=ax_kde)
 			###########################
-			self.figcanvas_bayes_cdf.draw()
-			self.figcanvas_bayes_kde.draw()
+			self.figcanvas_bayes_cdf.draw_idle()
+			self.figcanvas_bayes_kde.draw_idle()
 
 		except Exception as e:
 			self.update_status('ERROR: ' + str(e))
@@ -2939,11 +3377,7 @@ class FuelcellUI(QTabWidget):
 			self.update_status('ERROR: ' + str(e))
 
 	def loaddata_action_eis(self):
-		try:
-			self.vishandler.load_eis()
-			self.draw_plot_eis()
-		except Exception as e:
-			self.update_status('ERROR: ' + str(e))
+		self.start_worker(self.vishandler.load_eis, lambda data: self.draw_plot_eis(), buttons=[self.loaddata_btn_eis])
 
 	def xcol_action_eis(self):
 		col = self.xcol_txtbx_eis.text()
@@ -2963,13 +3397,13 @@ class FuelcellUI(QTabWidget):
 		new_label = self.xlabel_txtbx_eis.text()
 		ax = self.get_ax_eis()
 		ax.set_xlabel(new_label)
-		self.figcanvas_eis.draw()
+		self.figcanvas_eis.draw_idle()
 
 	def ylabel_action_eis(self):
 		new_label = self.ylabel_txtbx_eis.text()
 		ax = self.get_ax_eis()
 		ax.set_ylabel(new_label)
-		self.figcanvas_eis.draw()
+		self.figcanvas_eis.draw_idle()
 
 	def xlim_action_eis(self):
 		xmin_text = self.xmin_txtbx_eis.text()
@@ -2985,7 +3419,7 @@ class FuelcellUI(QTabWidget):
 			ax.set_xbound(upper=xmax)
 		except ValueError:
 			self.update_status('xmax must be a number')
-		self.figcanvas_eis.draw()
+		self.figcanvas_eis.draw_idle()
 
 	def ylim_action_eis(self):
 		ymin_text = self.ymin_txtbx_eis.text()
@@ -3001,7 +3435,7 @@ class FuelcellUI(QTabWidget):
 			ax.set_ybound(upper=ymax)
 		except ValueError:
 			self.update_status('ymax must be a number')
-		self.figcanvas_eis.draw()
+		self.figcanvas_eis.draw_idle()
 
 	def figsize_action_eis(self):
 		fig = self.figcanvas_eis.figure
@@ -3012,7 +3446,7 @@ class FuelcellUI(QTabWidget):
 			height = float(height)
 			fig.set_figwidth(width)
 			fig.set_figheight(height)
-			self.figcanvas_eis.draw()
+			self.figcanvas_eis.draw_idle()
 		except ValueError:
 			self.update_status('Figure width and height must be numbers')
 
@@ -3024,7 +3458,7 @@ class FuelcellUI(QTabWidget):
 			fig.clf()
 			ax = self.figcanvas_eis.figure.subplots()
 			fc.visuals.plot_hfr(data=new_data, ax=ax)
-			self.figcanvas_eis.draw()
+			self.figcanvas_eis.draw_idle()
 			self.hfrsemi_val.setText(str(new_data.get_hfr()))
 			self.hfrlin_val.setText(str(new_data.get_hfr_linear()))
 		except TypeError:
@@ -3072,7 +3506,7 @@ class FuelcellUI(QTabWidget):
 			# self.hfrsemi_val.setText(str(data.get_hfr()))
 			# self.hfrlin_val.setText(str(data.get_hfr_linear()))
 			fc.visuals.plot_hfr(data=this_data, ax=ax)
-			self.figcanvas_eis.draw()
+			self.figcanvas_eis.draw_idle()
 		except Exception as e:
 			self.update_status('ERROR: ' + str(e))
 
@@ -21,6 +21,10 @@ setuptools.setup(
   packages=setuptools.find_packages(),
   python_requires='>=3',
   install_requires=['numpy', 'pandas', 'matplotlib', 'scipy', 'PySide2', 'PyQT5', 'emn_sdk'],
+  extras_require={
+    'parquet': ['pyarrow'],
+    'hdf5': ['tables'],
+  },
   project_urls={
     'Documentation': 'https://fuelcell.readthedocs.io/en/latest/',
     'Source': 'https://github.com/samaygarg/fuelcell'
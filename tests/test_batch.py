@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import fuelcell as fc
+from fuelcell import utils
+
+testdata = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'testdata')
+
+@pytest.mark.parametrize('filetype, module', [('parquet', 'pyarrow'), ('h5', 'tables')])
+def test_batch_round_trip(tmp_path, filetype, module):
+	pytest.importorskip(module)
+	data = fc.eis_process(folder=os.path.join(testdata, 'eis'), pattern='eis_0[0-2]', cache=False)
+	data[0].set_circuit('R0-p(R1,C1)')
+	data[0].set_circuit_params({'R0':np.float64(0.05), 'R1':0.2, 'C1':1e-3})
+	data[0].set_circuit_chisq(np.float64(1.5e-4))
+	path = utils.save_batch(data, 'eis.' + filetype, str(tmp_path))
+	loaded = utils.load_batch(path)
+	assert len(loaded) == len(data)
+	for d, e in zip(data, loaded):
+		assert e.get_name() == d.get_name()
+		assert e.get_raw_data() is None
+		assert list(e.get_processed_data().columns) == list(d.get_processed_data().columns)
+		np.testing.assert_allclose(e.get_processed_data().values, d.get_processed_data().values)
+		for param in utils.batch_params:
+			expected = getattr(d, param)
+			if isinstance(expected, (float, tuple, np.ndarray)):
+				np.testing.assert_allclose(getattr(e, param), expected)
+			else:
+				assert getattr(e, param) == expected, param
+	assert loaded[0].get_circuit_params() == {'R0':0.05, 'R1':0.2, 'C1':1e-3}
+
+def ca_data(folder):
+	# potential staircase, as there are no CA files in testdata
+	rng = np.random.default_rng(0)
+	potential = np.repeat([0.9, 0.8, 0.7, 0.6], 100) + rng.normal(0, 1e-3, 400)
+	current = 100 * (1 - potential) + rng.normal(0, 0.5, 400)
+	pd.DataFrame({'time/s':np.arange(400) * 0.1, 'Ewe/V':potential, 'I/mA':current}).to_csv(os.path.join(folder, 'ca_00.txt'), sep='\t', index=False)
+	return fc.ca_process(folder=folder, cache=False, min_step_length=10, pts_to_average=50, thermo_potential=1.23)
+
+@pytest.mark.parametrize('expt_type', ['lsv', 'cv', 'cp', 'ca', 'eis'])
+def test_restore_datum(tmp_path, expt_type):
+	# with a thermodynamic potential, eta differs from v, which LSV stores as its overpotential
+	if expt_type == 'ca':
+		data = ca_data(str(tmp_path))
+	elif expt_type == 'eis':
+		data = fc.eis_process(folder=os.path.join(testdata, 'eis'), pattern='eis_01', cache=False)
+	else:
+		process = getattr(fc, expt_type + '_process')
+		data = process(folder=os.path.join(testdata, expt_type), cache=False, thermo_potential=1.23)
+	d = data[0]
+	processed = d.get_processed_data()
+	e = utils.restore_datum(utils.batch_entry(d, processed), processed)
+	assert e.get_name() == d.get_name()
+	assert e.get_expt_type() == expt_type
+	pd.testing.assert_frame_equal(e.get_processed_data(), processed)
+	for getter in ['get_current_data', 'get_potential_data', 'get_overpotential_data', 'get_logcurrent_data', 'get_error_data']:
+		expected = getattr(d, getter)()
+		restored = getattr(e, getter)()
+		if expected is None:
+			assert restored is None, getter
+		else:
+			np.testing.assert_array_equal(np.asarray(restored), np.asarray(expected), err_msg=getter)
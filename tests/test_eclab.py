@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+import pytest
+
+from fuelcell import eclab, utils
+
+testdata = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'testdata')
+
+def module_bytes(shortname, content, version, header_v2):
+	# module header as written by EC-Lab; newer versions put 0xffffffff in place of the length and the real length after it
+	name = shortname.ljust(10).encode()
+	longname = shortname.ljust(25).encode()
+	if header_v2:
+		hdr = np.array([(name, longname, 0xffffffff, len(content), version, 0, b'01/02/23')], dtype=eclab.module_hdr_v2)
+	else:
+		hdr = np.array([(name, longname, len(content), version, b'01/02/23')], dtype=eclab.module_hdr)
+	return eclab.module_magic + hdr.tobytes() + content
+
+def mpr_bytes(records, col_ids, version=3, header_v2=True):
+	"""
+	Builds the contents of an EC-Lab binary file holding records, following the published layout of the data module
+
+	The data module is preceded by a settings module and followed by a log module, as in files written by EC-Lab.
+	"""
+	if version == 0:
+		ids = np.array(col_ids, dtype='u1').tobytes()
+		data_start = 100
+	else:
+		ids = np.array(col_ids, dtype='<u2').tobytes()
+		data_start = 406 if version == 3 else 405
+	head = np.array([len(records)], dtype='<u4').tobytes() + bytes([len(col_ids)]) + ids
+	head = head.ljust(data_start, b'\x00')
+	modules = [
+		module_bytes('VMP Set', b'\x00' * 64, 0, header_v2),
+		module_bytes('VMP data', head + records.tobytes(), version, header_v2),
+		module_bytes('VMP LOG', b'\x00' * 32, 0, header_v2),
+	]
+	return eclab.mpr_magic + b''.join(modules)
+
+def test_read_mpr_matches_text_export():
+	folder = os.path.join(testdata, 'eclab')
+	data = eclab.read_mpr(os.path.join(folder, 'cv_eclab.mpr'))
+	text = utils.read_file(os.path.join(folder, 'cv_eclab.txt'), cache=False).get_raw_data()
+	assert list(data.columns) == [c for c in text.columns if not c.startswith('Unnamed')]
+	for col in data.columns:
+		# EC-Lab writes single precision columns with 8 significant digits
+		np.testing.assert_allclose(data[col].values, text[col].values, rtol=1e-7, atol=0, err_msg=col)
+	assert set(data['ox/red']) == {0, 1}
+	assert (data['mode'] == 2).all()
+
+def test_read_file_mpr():
+	d = utils.read_file(os.path.join(testdata, 'eclab', 'cv_eclab.mpr'))
+	assert d.get_name() == 'cv_eclab'
+	assert d.get_raw_data().shape == (40, 7)
+
+@pytest.mark.parametrize('version, header_v2', [(0, False), (2, False), (2, True), (3, True)])
+def test_data_module_layouts(tmp_path, version, header_v2):
+	dtype, flags = eclab.column_dtype([1, 2, 3, 4, 6, 11, 65])
+	assert flags == {'mode':0x03, 'ox/red':0x04, 'error':0x08, 'counter inc.':0x80}
+	records = np.zeros(5, dtype=dtype)
+	records['flags'] = [0x01, 0x06, 0x0b, 0x80, 0x8f]
+	records['time/s'] = np.arange(5) * 0.5
+	records['Ewe/V'] = np.linspace(0.1, 0.9, 5)
+	records['<I>/mA'] = np.linspace(-2, 2, 5)
+	path = tmp_path / 'ca_layout.mpr'
+	path.write_bytes(mpr_bytes(records, [1, 2, 3, 4, 6, 11, 65], version, header_v2))
+	data = eclab.read_mpr(str(path))
+	assert list(data.columns) == ['mode', 'ox/red', 'error', 'counter inc.', 'time/s', 'Ewe/V', '<I>/mA']
+	np.testing.assert_array_equal(data['mode'], [1, 2, 3, 0, 3])
+	np.testing.assert_array_equal(data['ox/red'], [0, 1, 0, 0, 1])
+	np.testing.assert_array_equal(data['error'], [0, 0, 1, 0, 1])
+	np.testing.assert_array_equal(data['counter inc.'], [0, 0, 0, 1, 1])
+	np.testing.assert_array_equal(data['time/s'], records['time/s'])
+	np.testing.assert_array_equal(data['Ewe/V'], records['Ewe/V'].astype(np.float64))
+	np.testing.assert_array_equal(data['<I>/mA'], records['<I>/mA'])
+
+def test_truncated_data_module(tmp_path, caplog):
+	dtype, _ = eclab.column_dtype([4, 6])
+	records = np.zeros(4, dtype=dtype)
+	records['time/s'] = np.arange(4)
+	contents = bytearray(mpr_bytes(records, [4, 6]))
+	# claim more points than the data module holds
+	start = contents.index(b'VMP data') + eclab.module_hdr_v2.itemsize
+	contents[start:start+4] = np.array([10], dtype='<u4').tobytes()
+	path = tmp_path / 'short.mpr'
+	path.write_bytes(bytes(contents))
+	data = eclab.read_mpr(str(path))
+	assert data.shape[0] == 4
+	assert 'expected 10 points but found 4' in caplog.text
+
+def test_not_mpr(tmp_path):
+	path = tmp_path / 'bad.mpr'
+	path.write_bytes(b'not an mpr file' * 10)
+	with pytest.raises(ValueError):
+		eclab.read_mpr(str(path))
@@ -0,0 +1,36 @@
+import os
+
+import numpy as np
+from scipy.optimize import curve_fit
+
+import fuelcell as fc
+from fuelcell import datums
+
+testdata = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'testdata')
+
+def test_semicircle_fit_matches_unseeded_fit():
+	data = fc.eis_process(folder=os.path.join(testdata, 'eis'), cache=False)
+	assert len(data) == 77
+	checked = 0
+	for d in data:
+		df = d.get_processed_data()
+		real, imag = df['real'].values, df['imag'].values
+		# the fit used before fits were seeded with fit_circles
+		base, _ = curve_fit(datums.semicircle, real, imag, maxfev=50000)
+		base_sse = datums._semicircle_sse(base, real, imag)
+		sse = datums._semicircle_sse(d.semicircle_params, real, imag)
+		# fits of nearly linear spectra stop on a plateau, within a tiny fraction of each other
+		assert sse <= base_sse * (1 + 1e-4), d.get_name()
+		# nearly linear spectra are fit equally well by very large circles with any hfr
+		if sse >= base_sse * (1 - 1e-6) and np.abs(base[0]) < 1:
+			base_hfr = base[1] - np.abs(base[0])
+			np.testing.assert_allclose(d.hfr, base_hfr, rtol=1e-3, err_msg=d.get_name())
+			checked += 1
+	assert checked >= 20
+
+def test_semicircle_fit_recovers_circle():
+	x = np.linspace(0.02, 0.1, 40)
+	y = datums.semicircle(x, 0.05, 0.07, -0.01)
+	popt, hfr, lfr = datums.fit_eis_semicircle(x, y + 1e-5 * np.sin(40 * x))
+	np.testing.assert_allclose(popt, [0.05, 0.07, -0.01], atol=1e-3)
+	np.testing.assert_allclose(hfr, 0.02, atol=1e-3)
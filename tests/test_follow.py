@@ -0,0 +1,59 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import fuelcell as fc
+from fuelcell import datums, utils
+
+testdata = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'testdata')
+
+def test_tail_reader_partial_line(tmp_path):
+	path = tmp_path / 'cp_live.txt'
+	path.write_bytes(b'time/s\tEwe/V\tI/mA\t\n0.0\t0.91\t1.5\t\n0.1\t0.92\t1.')
+	reader = utils.TailReader(str(path))
+	data = reader.read()
+	assert list(data.columns[:3]) == ['time/s', 'Ewe/V', 'I/mA']
+	assert data.shape[0] == 1
+	# the rest of the split line arrives, along with a last line which is still being written
+	with open(path, 'ab') as f:
+		f.write(b'25\t\n0.2\t0.93\t')
+	data = reader.read()
+	np.testing.assert_allclose(data.iloc[:, :3].values, [[0.1, 0.92, 1.25]])
+	assert reader.read() is None
+	with open(path, 'ab') as f:
+		f.write(b'2.5')
+	data = reader.read(final=True)
+	np.testing.assert_allclose(data.iloc[:, :3].values, [[0.2, 0.93, 2.5]])
+
+def test_cp_follow_growing_file(tmp_path, monkeypatch):
+	src = open(os.path.join(testdata, 'cp', 'cp_04.txt'), 'rb').read()
+	# cut the file into pieces at arbitrary bytes, so lines are split between writes
+	cuts = [0, 3000] + list(np.linspace(4000, len(src), 8, dtype=int))
+	assert any(src[c-1:c] != b'\n' for c in cuts[1:-1])
+	live = tmp_path / 'live'
+	live.mkdir()
+	out = tmp_path / 'processed'
+	path = live / 'cp_04.txt'
+	path.write_bytes(src[:cuts[1]])
+	pieces = [src[a:b] for a, b in zip(cuts[1:-1], cuts[2:])]
+	sleep = time.sleep
+	def write_piece(seconds):
+		# appends the next piece of the file in place of waiting between polls
+		if pieces:
+			with open(path, 'ab') as f:
+				f.write(pieces.pop(0))
+		else:
+			sleep(0.01)
+	monkeypatch.setattr(datums.time, 'sleep', write_piece)
+	updates = list(fc.cp_follow(folder=str(live), export_data=True, save_dir=str(out), poll_interval=0, idle_timeout=0.2))
+	assert not pieces
+	assert len(updates) > 1
+	followed = updates[-1].get_processed_data()
+	expected = fc.cp_process(filename='cp_04.txt', folder=os.path.join(testdata, 'cp'), cache=False)[0].get_processed_data()
+	pd.testing.assert_frame_equal(followed.reset_index(drop=True), expected.reset_index(drop=True), check_exact=False, rtol=1e-10)
+	# every update rewrote the same export file
+	assert os.listdir(out) == ['cp_04.csv']
+	exported = pd.read_csv(out / 'cp_04.csv')
+	np.testing.assert_allclose(exported.values, followed.values, rtol=1e-12)
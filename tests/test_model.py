@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fuelcell.model import Datum
+
+def float_frame():
+	return pd.DataFrame({'t':np.arange(5.), 'v':np.linspace(0, 1, 5)})
+
+def mixed_frame():
+	return pd.DataFrame({'t':np.arange(5.), 'n':np.arange(5), 'v':np.linspace(0, 1, 5)})
+
+@pytest.mark.parametrize('make', [float_frame, mixed_frame])
+def test_caller_frame_stays_writeable(make):
+	df = make()
+	Datum('x', df)
+	df.iloc[0, 0] = 7
+	assert df.iloc[0, 0] == 7
+
+@pytest.mark.parametrize('make', [float_frame, mixed_frame])
+@pytest.mark.parametrize('source', ['raw', 'processed'])
+def test_accessors_protect_stored_data(make, source):
+	d = Datum('x', make())
+	d.set_processed_data(make())
+	get = d.get_raw_data if source == 'raw' else d.get_processed_data
+	expected = get(copy=True)
+	returned = get()
+	for write in [lambda df: df.iloc.__setitem__((0, 0), 99), lambda df: df.loc.__setitem__((1, 'v'), 99), lambda df: df['t'].values.__setitem__(2, 99)]:
+		try:
+			write(returned)
+		except ValueError:
+			# values shared with the Datum are read-only
+			pass
+	returned['t'] = -1
+	returned['new'] = 1
+	pd.testing.assert_frame_equal(get(), expected)
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import fuelcell as fc
+from fuelcell import datums
+
+testdata = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'testdata')
+
+def reference_steps(control, response, threshold, min_step_length, pts_to_average, pyramid, area, reference, thermo_potential):
+	# per-step implementation of process_steps for cp data, as it was before the step statistics were vectorized
+	split_pts = np.where(np.abs(np.diff(control)) > threshold)[0] + 1
+	steps = [(c, r) for c, r in zip(np.split(control, split_pts), np.split(response, split_pts)) if len(c) > min_step_length]
+	control_avg = np.array([np.mean(c[-pts_to_average:]) for c, r in steps])
+	response_avg = np.array([np.mean(r[-pts_to_average:]) for c, r in steps])
+	control_std = np.array([np.std(c[-pts_to_average:], ddof=1) for c, r in steps])
+	response_std = np.array([np.std(r[-pts_to_average:], ddof=1) for c, r in steps])
+	if pyramid:
+		order = np.argsort(control_avg)
+		control_avg, response_avg, control_std, response_std = control_avg[order], response_avg[order], control_std[order], response_std[order]
+		groups = np.split(np.arange(len(control_avg)), np.where(np.abs(np.diff(control_avg)) > 2)[0] + 1)
+		control_avg = np.array([np.mean(control_avg[g]) for g in groups])
+		response_avg = np.array([np.mean(response_avg[g]) for g in groups])
+		control_std = np.array([np.sqrt(np.sum(control_std[g]**2)) for g in groups])
+		response_std = np.array([np.sqrt(np.sum(response_std[g]**2)) for g in groups])
+	response_avg = datums.electrode_correct(response_avg, reference)
+	overpotential = datums.overpotential_correct(response_avg, thermo_potential)
+	return pd.DataFrame({'i':control_avg / area, 'v':response_avg, 'i_sd':control_std / np.sqrt(area), 'v_sd':response_std, 'eta':overpotential})
+
+def staircase(levels, lengths, seed=0):
+	rng = np.random.default_rng(seed)
+	current = np.repeat(np.asarray(levels, dtype=float), lengths)
+	current = current + rng.normal(0, 0.5, current.shape)
+	potential = 0.9 - 1e-4 * current + rng.normal(0, 1e-3, current.shape)
+	return pd.DataFrame({'time/s':np.arange(len(current)) * 0.1, 'Ewe/V':potential, 'I/mA':current})
+
+def check_steps(data, threshold=5, min_step_length=25, pts_to_average=300, pyramid=True, area=5, reference='she', thermo_potential=0):
+	processed = datums.process_steps(data, 2, 1, threshold, min_step_length, pts_to_average, pyramid, 'cp', area, reference, thermo_potential)
+	expected = reference_steps(data['I/mA'].values, data['Ewe/V'].values, threshold, min_step_length, pts_to_average, pyramid, area, reference, thermo_potential)
+	pd.testing.assert_frame_equal(processed.reset_index(drop=True), expected, check_exact=False, rtol=1e-10, atol=1e-12)
+	return processed
+
+def test_process_steps_testdata():
+	for d in fc.cp_raw(folder=os.path.join(testdata, 'cp'), cache=False):
+		raw = d.get_raw_data()
+		control = datums.find_col(raw, 'current', 2, d.get_raw_index())
+		response = datums.find_col(raw, 'potential', 1, d.get_raw_index())
+		data = pd.DataFrame({'time/s':np.arange(len(control)), 'Ewe/V':np.asarray(response, dtype=float), 'I/mA':np.asarray(control, dtype=float)})
+		for pyramid in [True, False]:
+			processed = check_steps(data, pyramid=pyramid)
+			assert len(processed) > 0
+
+@pytest.mark.parametrize('pyramid', [True, False])
+def test_process_steps_staircase(pyramid):
+	levels = [0, 50, 100, 200, 400, 200, 100, 50, 0]
+	processed = check_steps(staircase(levels, 400), pyramid=pyramid)
+	assert len(processed) == (5 if pyramid else 9)
+
+def test_process_steps_single_step():
+	processed = check_steps(staircase([100], 500))
+	assert len(processed) == 1
+
+def test_process_steps_trailing_partial_step():
+	# the last hold was cut short, but is still longer than min_step_length
+	check_steps(staircase([0, 50, 100, 150], [400, 400, 400, 60]), pyramid=False)
+
+def test_process_steps_short_steps():
+	# every hold is shorter than pts_to_average, so whole holds are averaged
+	check_steps(staircase([0, 50, 100, 50, 0], [120, 80, 40, 90, 150]), pts_to_average=300)
+
+def test_process_steps_min_step_length():
+	# holds of exactly min_step_length points are dropped, like spikes in the control variable
+	data = staircase([0, 50, 100, 50, 0], [200, 25, 200, 26, 200])
+	processed = check_steps(data, min_step_length=25, pyramid=False)
+	assert len(processed) == 4
+	# holds of a single point have no standard deviation
+	check_steps(staircase([0, 50, 100], [100, 1, 100]), min_step_length=0, pyramid=False)
@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import fuelcell as fc
+
+testdata = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'testdata')
+
+def write_staircase(path, control, levels, length, seed=0):
+	# EC-Lab style text export of a staircase of holds of the same length, ending with a partial hold
+	rng = np.random.default_rng(seed)
+	lengths = [length] * (len(levels) - 1) + [length // 2]
+	steps = np.repeat(np.asarray(levels, dtype=float), lengths)
+	if control == 'current':
+		current = steps + rng.normal(0, 0.5, steps.shape)
+		potential = 0.9 - 1e-4 * current + rng.normal(0, 1e-3, steps.shape)
+	else:
+		potential = steps + rng.normal(0, 1e-3, steps.shape)
+		current = 100 * (1 - potential) + rng.normal(0, 0.5, steps.shape)
+	data = pd.DataFrame({'time/s':np.arange(len(steps)) * 0.1, 'Ewe/V':potential, 'I/mA':current})
+	data.to_csv(path, sep='\t', index=False)
+	return len(steps)
+
+def assert_same(streamed, processed):
+	assert streamed
+	assert [d.get_name() for d in streamed] == [d.get_name() for d in processed]
+	for s, p in zip(streamed, processed):
+		pd.testing.assert_frame_equal(s.get_processed_data().reset_index(drop=True), p.get_processed_data().reset_index(drop=True), check_exact=False, rtol=1e-10)
+
+@pytest.mark.parametrize('chunksize', [1, 7, 10**6])
+def test_cp_stream_chunks(tmp_path, chunksize):
+	# holds of 53 points, so with chunks of 7 rows steps begin and end inside chunks
+	rows = write_staircase(tmp_path / 'cp_synthetic.txt', 'current', [0, 50, 100, 200, 100, 50, 0, 25], 53)
+	assert rows % 53 and 53 % 7
+	params = dict(threshold=5, min_step_length=10, pts_to_average=20)
+	streamed = fc.cp_stream(folder=str(tmp_path), chunksize=chunksize, **params)
+	processed = fc.cp_process(folder=str(tmp_path), cache=False, **params)
+	assert_same(streamed, processed)
+	assert len(streamed[0].get_processed_data()) == 5
+
+@pytest.mark.parametrize('chunksize', [1, 7, 10**6])
+def test_ca_stream_chunks(tmp_path, chunksize):
+	write_staircase(tmp_path / 'ca_synthetic.txt', 'potential', [0.9, 0.8, 0.7, 0.6, 0.5], 53)
+	params = dict(threshold=0.05, min_step_length=10, pts_to_average=20)
+	streamed = fc.ca_stream(folder=str(tmp_path), chunksize=chunksize, **params)
+	processed = fc.ca_process(folder=str(tmp_path), cache=False, **params)
+	assert_same(streamed, processed)
+	assert len(streamed[0].get_processed_data()) == 5
+
+@pytest.mark.parametrize('chunksize, pattern', [(7, 'cp_04'), (10**6, 'cp_0[045]')])
+def test_cp_stream_testdata(chunksize, pattern):
+	folder = os.path.join(testdata, 'cp')
+	streamed = fc.cp_stream(folder=folder, pattern=pattern, filetype='', chunksize=chunksize)
+	processed = fc.cp_process(folder=folder, pattern=pattern, cache=False)
+	assert_same(streamed, processed)
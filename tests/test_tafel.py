@@ -0,0 +1,55 @@
+import os
+import warnings
+
+import numpy as np
+import pytest
+
+import fuelcell as fc
+from fuelcell import datums
+
+testdata = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'testdata')
+
+def piecewise_curve(noise=5e-4, seed=0):
+	# kinetic region, then a Tafel region of slope 0.12 V/decade between log(i) = -5 and -2.5, then a mass transport limited region
+	log_curr = np.linspace(-6, -1, 501)
+	eta = np.where(log_curr < -5, -0.6 + 0.02 * (log_curr + 5), np.where(log_curr < -2.5, 0.12 * log_curr, -0.3 + 0.6 * (log_curr + 2.5)))
+	eta = eta + 0.7 + np.random.default_rng(seed).normal(0, noise, log_curr.shape)
+	return log_curr, eta
+
+def test_tafel_auto_piecewise():
+	log_curr, eta = piecewise_curve()
+	candidates = datums.tafel_auto(log_curr, eta, min_rsq=0.9999)
+	best = candidates.iloc[0]
+	# the Tafel region spans indices 100 to 350
+	assert abs(best['start'] - 100) <= 5
+	assert abs(best['end'] - 351) <= 5
+	assert best['points'] >= 240
+	assert best['rsq'] >= 0.9999
+	np.testing.assert_allclose(best['slope'], 0.12, rtol=0.01)
+	np.testing.assert_allclose(best['exchg_curr'], 10 ** (-0.7 / 0.12), rtol=0.05)
+	a, exchg_curr, rsquare, log_curr_trim, eta_trim = datums.tafel_slope(log_curr, eta, auto=True, min_rsq=0.9999)
+	np.testing.assert_allclose(log_curr_trim, log_curr[int(best['start']):int(best['end'])])
+	np.testing.assert_allclose([a, exchg_curr, rsquare], best[['slope', 'exchg_curr', 'rsq']].values.astype(float))
+
+def test_tafel_flat_window():
+	log_curr = np.linspace(-6, -1, 100)
+	eta = 0.5 + 1e-15 * log_curr
+	with warnings.catch_warnings():
+		warnings.simplefilter('error', RuntimeWarning)
+		a, exchg_curr, rsquare, log_curr_trim, eta_trim = datums.tafel_slope(log_curr, eta)
+		assert np.isnan(exchg_curr)
+		assert len(datums.tafel_auto(log_curr, eta)) == 0
+
+def test_tafel_testdata_no_overflow():
+	data = fc.lsv_process(folder=os.path.join(testdata, 'lsv'), cache=False)
+	with warnings.catch_warnings():
+		warnings.simplefilter('error', RuntimeWarning)
+		for d in data:
+			processed = d.get_processed_data()
+			log_curr = datums.find_col(processed, 'tafelcurrent', 3, d.get_processed_index())
+			eta = datums.find_col(processed, 'overpotential', 2, d.get_processed_index())
+			# the full range, as plotted by plot_tafel_fit when no bounds are given
+			a, exchg_curr, rsquare, log_curr_trim, eta_trim = datums.tafel_slope(log_curr, eta, min(log_curr), max(log_curr))
+			assert np.isnan(exchg_curr) or exchg_curr > 0
+			a, exchg_curr, rsquare, log_curr_trim, eta_trim = datums.tafel_slope(log_curr, eta, auto=True)
+			assert np.isfinite(exchg_curr) and exchg_curr > 0